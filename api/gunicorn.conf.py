@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration hooks for the production start script.
+
+With preload_app the application is imported in the master; when_ready then
+builds the read-only evaluation state and freezes the GC before any worker is
+forked. Worker memory is logged after fork and after worker init.
+"""
+
+from src.utils.preload import memory_usage, preload
+
+preload_app = True
+
+
+def when_ready(server):
+    preload()
+    server.log.info("Preloaded evaluation state; master memory: %s", memory_usage())
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s forked; memory: %s", worker.pid, memory_usage())
+
+
+def post_worker_init(worker):
+    worker.log.info("Worker %s initialized; memory: %s", worker.pid, memory_usage())
@@ -1,7 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.core.config import settings
-from src.routes import health, credit, advanced
+from src.routes import health, credit
+from src.utils.async_io import io_executor
+from src.utils.execution import cpu_executor
+from src.utils.warmup import run_warmup
+
+
+async def restore_snapshot() -> None:
+    """
+    Create the managers saved in the last snapshot on the I/O pool, so a
+    large snapshot is loaded in the background instead of delaying
+    readiness or the first request that uses them.
+    """
+    from src.modules.file_manager import get_file_manager
+    from src.modules.snapshot_store import get_instantaneas
+    from src.modules.user_manager import get_user_manager
+
+    snapshots = get_instantaneas()
+    if snapshots is None:
+        return
+    sections = await io_executor.run(snapshots.secciones)
+    for section, get_manager in (("archivos", get_file_manager), ("usuarios", get_user_manager)):
+        if section in sections:
+            await io_executor.run(get_manager)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background; /api/v1/ready reports when it is done."""
+    warmup = asyncio.get_running_loop().run_in_executor(None, run_warmup)
+    tasks = []
+    if settings.enable_advanced:
+        from src.modules.snapshot_store import guardar_instantaneas
+        from src.modules.user_manager import barrer_sesiones
+        tasks.append(asyncio.create_task(barrer_sesiones(settings.session_sweep_interval)))
+        tasks.append(asyncio.create_task(restore_snapshot()))
+        if settings.snapshot_interval > 0:
+            tasks.append(asyncio.create_task(guardar_instantaneas(settings.snapshot_interval)))
+    yield
+    for task in tasks:
+        task.cancel()
+    if settings.enable_advanced:
+        # Final snapshot of the managers created by this worker
+        from src.modules.snapshot_store import guardar_al_cerrar
+        from src.modules.report_generator import cerrar_pdf
+        guardar_al_cerrar()
+        cerrar_pdf()
+    await warmup
+    cpu_executor.shutdown()
+    io_executor.shutdown()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -9,7 +61,8 @@ app = FastAPI(
     version=settings.version,
     description=settings.description,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -24,7 +77,10 @@ app.add_middleware(
 # Include routers
 app.include_router(health.router)
 app.include_router(credit.router)
-app.include_router(advanced.advanced_router)
+if settings.enable_advanced:
+    # Imported only when mounted; its managers are still created on first use
+    from src.routes import advanced
+    app.include_router(advanced.advanced_router)
 
 
 @app.get("/")
@@ -36,7 +92,8 @@ async def root():
         "description": settings.description,
         "docs": "/docs",
         "redoc": "/redoc",
-        "health": "/api/v1/health"
+        "health": "/api/v1/health",
+        "ready": "/api/v1/ready"
     }
 
 
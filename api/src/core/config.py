@@ -2,6 +2,7 @@
 Configuration settings for the credit evaluation API.
 """
 
+import hashlib
 import os
 from typing import Dict, Any
 
@@ -18,6 +19,16 @@ class PolicySettings:
     CURRENT_DTI_MAX = 0.40
     TOTAL_DTI_MAX = 0.50
     MAX_AFFECTATION = 0.30  # payment/income
+    RATE_TIERS = (0.18, 0.24, 0.32)  # annual rate for score >= 720, >= 660, >= 600
+
+    @classmethod
+    def version(cls) -> str:
+        """Policy version from POLICY_VERSION, or a fingerprint of the policy values."""
+        explicit = os.getenv("POLICY_VERSION")
+        if explicit:
+            return explicit
+        values = sorted((k, v) for k, v in vars(cls).items() if k.isupper())
+        return hashlib.sha256(repr(values).encode("utf-8")).hexdigest()[:12]
 
 
 class Messages:
@@ -58,6 +69,47 @@ class Settings:
         self.debug: bool = os.getenv("DEBUG", "false").lower() == "true"
         self.host: str = os.getenv("HOST", "0.0.0.0")
         self.port: int = int(os.getenv("PORT", "8000"))  # Vercel assigns PORT dynamically
+        # Set to false for evaluator-only deployments (credit and health routers only)
+        self.enable_advanced: bool = os.getenv("ENABLE_ADVANCED", "true").lower() == "true"
+        # CPU-bound evaluation work: inline, thread, process or adaptive
+        self.execution_policy: str = os.getenv("EXECUTION_POLICY", "adaptive").lower()
+        self.execution_workers: int = int(os.getenv("EXECUTION_WORKERS", "4"))
+        self.execution_adaptive_pool: str = os.getenv("EXECUTION_ADAPTIVE_POOL", "thread").lower()
+        self.execution_adaptive_threshold: int = int(os.getenv("EXECUTION_ADAPTIVE_THRESHOLD", "100"))
+        # Blocking disk work from the advanced routes (file store, reports)
+        self.io_workers: int = int(os.getenv("IO_WORKERS", "8"))
+        self.io_max_pending: int = int(os.getenv("IO_MAX_PENDING", "64"))
+        # File store durability: sync (fsync per write), group (writes queued
+        # together share one fsync) or deferred (fsync only at checkpoints)
+        self.file_durability: str = os.getenv("FILE_DURABILITY", "group").lower()
+        self.file_group_commit_ms: float = float(os.getenv("FILE_GROUP_COMMIT_MS", "2"))
+        self.file_group_commit_max: int = int(os.getenv("FILE_GROUP_COMMIT_MAX", "64"))
+        self.file_checkpoint_every: int = int(os.getenv("FILE_CHECKPOINT_EVERY", "1000"))
+        # Memory budget of each worker's file content cache; least recently used
+        # files are dropped and re-read from the store on access (0: unbounded)
+        self.file_cache_max_bytes: int = int(os.getenv("FILE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        # User sessions expire after this many seconds idle, or since login
+        self.session_idle_timeout: float = float(os.getenv("SESSION_IDLE_TIMEOUT", "600"))
+        self.session_max_age: float = float(os.getenv("SESSION_MAX_AGE", "43200"))
+        self.session_sweep_interval: float = float(os.getenv("SESSION_SWEEP_INTERVAL", "5"))
+        # In-memory store: sessions kept in memory per worker; least recently active
+        # ones beyond this move to a temporary on-disk table (0: unbounded)
+        self.session_max_resident: int = int(os.getenv("SESSION_MAX_RESIDENT", "50000"))
+        # memory (per worker) or sqlite (shared by every worker through SESSION_DB_PATH)
+        self.session_store: str = os.getenv("SESSION_STORE", "memory").lower()
+        self.session_db_path: str = os.getenv("SESSION_DB_PATH", "sesiones/sesiones.db")
+        self.session_cache_ttl: float = float(os.getenv("SESSION_CACHE_TTL", "1"))
+        # Check user statistics counters against a full recount on every read
+        self.user_stats_check: bool = os.getenv("USER_STATS_CHECK", "false").lower() == "true"
+        # In-memory manager state is snapshotted here (empty disables) every
+        # SNAPSHOT_INTERVAL seconds (0: only on shutdown) and restored on first use
+        self.snapshot_path: str = os.getenv("SNAPSHOT_PATH", "file_manager/estado.snap")
+        self.snapshot_interval: float = float(os.getenv("SNAPSHOT_INTERVAL", "60"))
+        # Server worker processes (start.sh exports WORKERS); each keeps its own
+        # snapshot, and those of workers beyond this count are merged on restore
+        self.server_workers: int = int(os.getenv("WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+        # Processes converting reports to PDF in the background
+        self.pdf_workers: int = int(os.getenv("PDF_WORKERS", "2"))
 
 
 # Global settings instances
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
 
 @dataclass
@@ -23,4 +23,15 @@ class Result:
     reference: str
     decision: str  # "APPROVED" | "COUNTEROFFER" | "REJECTED"
     reasons: list
-    details: Dict[str, Union[float, str]]
\ No newline at end of file
+    details: Dict[str, Union[float, str]]
+
+
+@dataclass
+class Assessment:
+    """Checks and loan figures an evaluation starts from, computed once per application."""
+    reasons: list
+    annual_rate: Optional[float]
+    monthly_payment: Optional[float]
+    current_dti: Optional[float]
+    total_dti: Optional[float]
+    cost: int  # estimated work, in monthly payment calculations
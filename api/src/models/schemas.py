@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
+from src.models.application import Application
 
 
 class CreditApplicationRequest(BaseModel):
@@ -15,6 +16,21 @@ class CreditApplicationRequest(BaseModel):
     term: int = Field(..., ge=1, description="Loan term in months")
     active_defaults: bool = Field(..., description="Has active payment defaults")
 
+    def to_application(self) -> Application:
+        """Convert to the Application dataclass used by the evaluator."""
+        return Application(
+            name=self.name,
+            age=self.age,
+            monthly_income=self.monthly_income,
+            monthly_debt=self.monthly_debt,
+            employment_type=self.employment_type.upper(),
+            months_of_experience=self.months_of_experience,
+            credit_score=self.credit_score,
+            amount=self.amount,
+            term=self.term,
+            active_defaults=self.active_defaults
+        )
+
 
 class CreditEvaluationResponse(BaseModel):
     """Response model for credit evaluation."""
@@ -24,7 +40,30 @@ class CreditEvaluationResponse(BaseModel):
     details: Dict[str, Any] = Field(default={}, description="Additional evaluation details")
 
 
+class CreditBatchRequest(BaseModel):
+    """Request model for evaluating several applications in one call."""
+    applications: List[CreditApplicationRequest] = Field(..., min_length=1, max_length=1000,
+                                                         description="Applications to evaluate")
+
+
+class CreditBatchResponse(BaseModel):
+    """Response model for batch evaluation, in request order."""
+    results: List[CreditEvaluationResponse]
+    total: int
+    decisions: Dict[str, int] = Field(default={}, description="Count of results per decision")
+
+
 class HealthCheckResponse(BaseModel):
     """Health check response model."""
     status: str
-    message: str
\ No newline at end of file
+    message: str
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response model."""
+    status: str = Field(..., description="ready, warming_up or failed")
+    ready: bool
+    warmup_duration_ms: Optional[float] = Field(None, description="Time spent in the startup warmup")
+    warmup_evaluations: int = Field(0, description="Evaluations run during the warmup")
+    policy_version: str = Field(..., description="Version of the credit policy being served")
+    error: Optional[str] = None
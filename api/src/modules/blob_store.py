@@ -0,0 +1,250 @@
+"""
+Almacén de Contenidos Direccionados por Hash - Sistema Avanzado
+==============================================================
+
+Este módulo guarda el contenido de los archivos como blobs identificados
+por el SHA-256 de su texto:
+- Cada contenido único se guarda una sola vez (deduplicación)
+- Los blobs que superan un umbral de tamaño se comprimen con zlib
+- Un contador de referencias elimina los blobs que ya nadie usa
+- En memoria, cada proceso conserva una sola copia por blob, de modo que
+  el consumo crece con el contenido único y no con el número de archivos
+- Se lleva la cuenta de los bytes retenidos en memoria, para que el almacén
+  de archivos pueda limitar su caché a un presupuesto
+
+Las operaciones de escritura se ejecutan dentro de la transacción del
+almacén de archivos que comparte la conexión SQLite, y mantienen en la
+misma transacción los contadores de blobs (ver counters).
+"""
+
+import hashlib
+import sqlite3
+import sys
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+from .counters import Contadores
+
+
+ESQUEMA_BLOBS = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    comprimido INTEGER NOT NULL,
+    datos BLOB NOT NULL,
+    tamaño INTEGER NOT NULL,
+    refs INTEGER NOT NULL
+);
+"""
+
+# Tamaño (bytes UTF-8) a partir del cual se intenta comprimir un blob
+UMBRAL_COMPRESION = 1024
+
+
+def calcular_hash(contenido: str) -> str:
+    """Hash SHA-256 (hex) del contenido codificado en UTF-8."""
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """
+    Blobs deduplicados y opcionalmente comprimidos sobre una conexión SQLite.
+    """
+
+    def __init__(self, conexion: sqlite3.Connection, contadores: Contadores,
+                 umbral_compresion: int = UMBRAL_COMPRESION):
+        """
+        Inicializa el almacén de blobs.
+
+        Args:
+            conexion (sqlite3.Connection): Conexión compartida con el almacén de archivos
+            contadores (Contadores): Contadores agregados compartidos
+            umbral_compresion (int): Tamaño mínimo en bytes para comprimir
+        """
+        self._conexion = conexion
+        self.contadores = contadores
+        self.umbral_compresion = umbral_compresion
+        self._conexion.executescript(ESQUEMA_BLOBS)
+        self._lock = threading.RLock()
+
+        # Textos en memoria de este proceso y cuántas entradas de caché los usan
+        self._textos: Dict[str, str] = {}
+        self._usos: Dict[str, int] = {}
+        # Memoria ocupada por esos textos y su tamaño lógico (UTF-8) por hash
+        self._tamaños: Dict[str, Tuple[int, int]] = {}
+        self.bytes_en_memoria = 0
+        self.bytes_logicos_en_memoria = 0
+
+    def _codificar(self, contenido: str) -> Tuple[bool, bytes]:
+        """Codifica el texto y lo comprime si supera el umbral y realmente reduce tamaño."""
+        datos = contenido.encode("utf-8")
+        if len(datos) >= self.umbral_compresion:
+            comprimidos = zlib.compress(datos, 6)
+            if len(comprimidos) < len(datos):
+                return True, comprimidos
+        return False, datos
+
+    def existe(self, hash_contenido: str) -> bool:
+        """Indica si el blob ya está guardado."""
+        return self._conexion.execute(
+            "SELECT 1 FROM blobs WHERE hash = ?", (hash_contenido,)
+        ).fetchone() is not None
+
+    def referenciar(self, contenido: str, hash_contenido: Optional[str] = None) -> str:
+        """
+        Suma una referencia al blob del contenido, guardándolo si no existe.
+        Debe llamarse dentro de una transacción abierta.
+
+        Args:
+            contenido (str): Texto del archivo
+            hash_contenido (Optional[str]): Hash ya calculado del texto
+
+        Returns:
+            str: Hash del blob
+        """
+        hash_contenido = hash_contenido or calcular_hash(contenido)
+        actualizado = self._conexion.execute(
+            "UPDATE blobs SET refs = refs + 1 WHERE hash = ?", (hash_contenido,)
+        ).rowcount
+        if actualizado:
+            self.contadores.sumar({"blobs:referencias": 1})
+        else:
+            # Contenido nuevo: solo entonces se paga la compresión
+            comprimido, datos = self._codificar(contenido)
+            tamaño = len(contenido.encode("utf-8"))
+            self._conexion.execute(
+                "INSERT INTO blobs (hash, comprimido, datos, tamaño, refs) VALUES (?, ?, ?, ?, 1)",
+                (hash_contenido, int(comprimido), datos, tamaño)
+            )
+            self.contadores.sumar(self._contribucion(1, tamaño, len(datos), int(comprimido), 1))
+        return hash_contenido
+
+    @staticmethod
+    def _contribucion(blobs: int, tamaño: int, guardados: int, comprimidos: int, refs: int) -> Dict[str, int]:
+        """Deltas de los contadores de blobs."""
+        return {
+            "blobs:unicos": blobs,
+            "blobs:bytes_logicos": tamaño,
+            "blobs:bytes_guardados": guardados,
+            "blobs:comprimidos": comprimidos,
+            "blobs:referencias": refs
+        }
+
+    def contribucion_total(self) -> Dict[str, int]:
+        """Contadores de blobs calculados recorriendo la tabla (para reconstruirlos)."""
+        return self._contribucion(*self._conexion.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamaño), 0), COALESCE(SUM(LENGTH(datos)), 0), "
+            "COALESCE(SUM(comprimido), 0), COALESCE(SUM(refs), 0) FROM blobs"
+        ).fetchone())
+
+    def liberar(self, hash_contenido: str) -> None:
+        """
+        Resta una referencia al blob y lo elimina si ya no se usa.
+        Debe llamarse dentro de una transacción abierta.
+        """
+        fila = self._conexion.execute(
+            "SELECT tamaño, LENGTH(datos), comprimido, refs FROM blobs WHERE hash = ?", (hash_contenido,)
+        ).fetchone()
+        if fila is None:
+            return
+        tamaño, guardados, comprimido, refs = fila
+        if refs > 1:
+            self._conexion.execute("UPDATE blobs SET refs = refs - 1 WHERE hash = ?", (hash_contenido,))
+            self.contadores.sumar({"blobs:referencias": -1})
+        else:
+            self._conexion.execute("DELETE FROM blobs WHERE hash = ?", (hash_contenido,))
+            self.contadores.sumar(self._contribucion(-1, -tamaño, -guardados, -comprimido, -refs))
+
+    def leer(self, hash_contenido: str, conservar: bool = True) -> str:
+        """
+        Obtiene el texto de un blob, desde memoria si este proceso ya lo tiene.
+
+        Args:
+            hash_contenido (str): Hash del blob
+            conservar (bool): Guardar el texto en memoria si hubo que leerlo de disco
+
+        Raises:
+            KeyError: Si el blob no existe
+        """
+        with self._lock:
+            texto = self._textos.get(hash_contenido)
+            if texto is not None:
+                return texto
+            fila = self._conexion.execute(
+                "SELECT comprimido, datos FROM blobs WHERE hash = ?", (hash_contenido,)
+            ).fetchone()
+            if fila is None:
+                raise KeyError(hash_contenido)
+            comprimido, datos = fila
+            texto = (zlib.decompress(datos) if comprimido else bytes(datos)).decode("utf-8")
+            if conservar:
+                self._guardar_texto(hash_contenido, texto, len(datos) if not comprimido else None)
+            return texto
+
+    def tamaño(self, hash_contenido: str) -> int:
+        """
+        Tamaño en bytes (UTF-8) del texto de un blob, sin leerlo ni descomprimirlo.
+
+        Raises:
+            KeyError: Si el blob no existe
+        """
+        with self._lock:
+            if hash_contenido in self._tamaños:
+                return self._tamaños[hash_contenido][1]
+            fila = self._conexion.execute("SELECT tamaño FROM blobs WHERE hash = ?", (hash_contenido,)).fetchone()
+            if fila is None:
+                raise KeyError(hash_contenido)
+            return fila[0]
+
+    def _guardar_texto(self, hash_contenido: str, texto: str, tamaño: Optional[int] = None) -> None:
+        """Conserva el texto de un blob en memoria y suma su tamaño."""
+        if hash_contenido in self._textos:
+            return
+        memoria = sys.getsizeof(texto)
+        logico = tamaño if tamaño is not None else len(texto.encode("utf-8"))
+        self._textos[hash_contenido] = texto
+        self._tamaños[hash_contenido] = (memoria, logico)
+        self.bytes_en_memoria += memoria
+        self.bytes_logicos_en_memoria += logico
+
+    def retener(self, hash_contenido: str, texto: Optional[str] = None) -> None:
+        """Marca que una entrada de caché usa el blob (y guarda su texto si se conoce)."""
+        with self._lock:
+            self._usos[hash_contenido] = self._usos.get(hash_contenido, 0) + 1
+            if texto is not None:
+                self._guardar_texto(hash_contenido, texto)
+
+    def soltar(self, hash_contenido: str) -> None:
+        """Marca que una entrada de caché dejó de usar el blob; libera el texto si nadie lo usa."""
+        with self._lock:
+            usos = self._usos.get(hash_contenido, 0) - 1
+            if usos > 0:
+                self._usos[hash_contenido] = usos
+            else:
+                self._usos.pop(hash_contenido, None)
+                if self._textos.pop(hash_contenido, None) is not None:
+                    memoria, logico = self._tamaños.pop(hash_contenido)
+                    self.bytes_en_memoria -= memoria
+                    self.bytes_logicos_en_memoria -= logico
+
+    def estadisticas(self) -> Dict[str, int]:
+        """
+        Estadísticas de almacenamiento de blobs.
+
+        Returns:
+            Dict[str, int]: Blobs únicos, bytes lógicos, bytes guardados,
+            blobs comprimidos, referencias y textos (y bytes) en memoria de este proceso
+        """
+        contadores = self.contadores.leer()
+        with self._lock:
+            en_memoria = len(self._textos)
+            bytes_en_memoria = self.bytes_en_memoria
+        return {
+            "blobs_unicos": contadores.get("blobs:unicos", 0),
+            "bytes_logicos_unicos": contadores.get("blobs:bytes_logicos", 0),
+            "bytes_guardados": contadores.get("blobs:bytes_guardados", 0),
+            "blobs_comprimidos": contadores.get("blobs:comprimidos", 0),
+            "referencias": contadores.get("blobs:referencias", 0),
+            "blobs_en_memoria": en_memoria,
+            "bytes_en_memoria": bytes_en_memoria
+        }
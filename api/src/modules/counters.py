@@ -0,0 +1,103 @@
+"""
+Contadores Agregados - Sistema Avanzado
+======================================
+
+Este módulo mantiene totales (número de archivos, bytes, líneas, tipos,
+blobs...) en una tabla SQLite que se actualiza en la misma transacción que
+cada escritura. Así las estadísticas se leen sin recorrer los archivos,
+sin importar cuántos haya, y todos los workers ven los mismos totales.
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Mapping, Optional
+
+
+ESQUEMA_CONTADORES = """
+CREATE TABLE IF NOT EXISTS contadores (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+
+class Contadores:
+    """
+    Totales por clave guardados junto a los datos que resumen.
+    Cada proceso conserva una copia que se recarga tras una escritura.
+    """
+
+    def __init__(self, conexion: sqlite3.Connection, conexion_lectura: Optional[sqlite3.Connection] = None):
+        """
+        Inicializa los contadores sobre una conexión compartida.
+
+        Args:
+            conexion (sqlite3.Connection): Conexión del almacén de archivos
+            conexion_lectura (Optional[sqlite3.Connection]): Conexión aparte para
+                leer solo totales confirmados; por la compartida se verían los
+                de una transacción abierta (None usa la compartida)
+        """
+        self._conexion = conexion
+        self._conexion_lectura = conexion_lectura if conexion_lectura is not None else conexion
+        self._conexion.executescript(ESQUEMA_CONTADORES)
+        self._lock = threading.RLock()
+        self._valores: Optional[Dict[str, int]] = None
+
+    def vacio(self) -> bool:
+        """Indica si todavía no se ha guardado ningún contador."""
+        return self._conexion.execute("SELECT 1 FROM contadores LIMIT 1").fetchone() is None
+
+    def sumar(self, deltas: Mapping[str, int]) -> None:
+        """
+        Suma cada delta a su contador. Debe llamarse dentro de una transacción abierta.
+
+        Args:
+            deltas (Mapping[str, int]): Incremento (o decremento) por clave
+        """
+        cambios = [(clave, delta) for clave, delta in deltas.items() if delta]
+        if cambios:
+            self._conexion.executemany(
+                "INSERT INTO contadores (clave, valor) VALUES (?, ?) "
+                "ON CONFLICT(clave) DO UPDATE SET valor = valor + excluded.valor",
+                cambios
+            )
+        self.invalidar()
+
+    def invalidar(self) -> None:
+        """Descarta la copia en memoria (tras escribir, confirmar o si otro proceso escribió)."""
+        with self._lock:
+            self._valores = None
+
+    def leer(self) -> Dict[str, int]:
+        """
+        Obtiene todos los contadores confirmados.
+
+        Returns:
+            Dict[str, int]: Copia de los valores por clave
+        """
+        with self._lock:
+            if self._valores is None:
+                self._valores = dict(
+                    self._conexion_lectura.execute("SELECT clave, valor FROM contadores").fetchall()
+                )
+            return dict(self._valores)
+
+    def valor(self, clave: str) -> int:
+        """Valor de un contador (0 si no existe)."""
+        return self.leer().get(clave, 0)
+
+    def con_prefijo(self, prefijo: str) -> Dict[str, int]:
+        """
+        Contadores cuya clave empieza por el prefijo, sin él y omitiendo los que valen 0.
+
+        Args:
+            prefijo (str): Prefijo de la clave, p. ej. "tipo:"
+
+        Returns:
+            Dict[str, int]: Valores por clave sin prefijo
+        """
+        return {
+            clave[len(prefijo):]: valor
+            for clave, valor in self.leer().items()
+            if clave.startswith(prefijo) and valor
+        }
@@ -13,14 +13,77 @@ Funcionalidades principales:
 - Escritura y modificación de archivos existentes
 - Creación de nuevos archivos con metadata
 - Registro de fechas usando tuplas
+- Búsqueda de texto completo sobre el contenido
+- Historial de versiones de cada archivo
+- Operaciones por lotes, opcionalmente transaccionales
 """
 
 import os
 import json
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Mapping
 from pathlib import Path
 
+from ..core.config import settings
+from .file_store import (
+    CONFIRMACIONES_POR_CHECKPOINT, DURABILIDAD_GRUPO, MAX_ESCRITURAS_GRUPO, VENTANA_GRUPO_MS,
+    FileStore, VistaArchivos
+)
+from .search_index import IndiceBusqueda
+from .snapshot_store import get_instantaneas
+from ..utils.locks import AtomicCounters
+
+
+ORIGEN_PREDEFINIDO = "predefinido"
+ORIGEN_USUARIO = "usuario"
+
+# Separador con el que se cuentan las líneas de los archivos (ver metricas_contenido)
+SEPARADOR_LINEA = "\n"
+
+# Versión del cálculo de metricas_contenido; al cambiar, el almacén recalcula
+# la metadata derivada de los archivos guardados (2: saltos de línea reales,
+# antes se contaba el texto literal "\\n" de los predefinidos)
+VERSION_METRICAS = 2
+
+# Índices de líneas que se conservan en memoria (por hash de contenido)
+MAX_INDICES_LINEAS = 32
+
+# Memoria máxima de los contenidos ya codificados en UTF-8 para las lecturas
+# por rangos (por hash de contenido)
+MAX_BYTES_CODIFICADOS = 32 * 1024 * 1024
+
+# Tamaño de cada bloque en las lecturas por streaming
+TAMAÑO_BLOQUE_STREAM = 64 * 1024
+
+# Operaciones admitidas en los lotes y código HTTP equivalente de cada error
+OPERACIONES_LOTE = ("leer", "escribir", "crear")
+CODIGOS_ERROR_LOTE = {FileNotFoundError: 404, PermissionError: 403, ValueError: 400}
+
+
+class _LoteRevertido(Exception):
+    """Interrumpe un lote transaccional cuando falla una operación."""
+
+
+def metricas_contenido(contenido: str) -> Dict[str, int]:
+    """
+    Metadata derivada del contenido que el almacén guarda en cada escritura.
+    
+    Args:
+        contenido (str): Texto del archivo
+        
+    Returns:
+        Dict[str, int]: Líneas y caracteres del contenido
+    """
+    return {
+        "lineas": contenido.count(SEPARADOR_LINEA) + 1,
+        "caracteres": len(contenido)
+    }
+
 
 class FileManager:
     """
@@ -28,20 +91,29 @@ class FileManager:
     Implementa diccionarios, tuplas, manejo de excepciones y ciclos.
     """
     
-    def __init__(self, directorio_base: str = "file_manager"):
+    def __init__(self, directorio_base: str = "file_manager", durabilidad: str = DURABILIDAD_GRUPO,
+                 ventana_grupo_ms: float = VENTANA_GRUPO_MS, max_escrituras_grupo: int = MAX_ESCRITURAS_GRUPO,
+                 confirmaciones_por_checkpoint: int = CONFIRMACIONES_POR_CHECKPOINT,
+                 max_bytes_cache: Optional[int] = None):
         """
         Inicializa el gestor de archivos.
         
         Args:
             directorio_base (str): Directorio base para almacenar archivos
+            durabilidad (str): "sync", "group" o "deferred" (ver file_store)
+            ventana_grupo_ms (float): Espera máxima de la confirmación agrupada
+            max_escrituras_grupo (int): Escrituras máximas por confirmación agrupada
+            confirmaciones_por_checkpoint (int): Cada cuántas confirmaciones se compacta el WAL
+            max_bytes_cache (Optional[int]): Presupuesto de memoria de la caché de
+                contenidos; lo menos usado se relee del disco (None sin límite)
         """
         self.directorio_base = Path(directorio_base)
         self.fecha_actual: Tuple[int, int, int] = (28, 9, 2025)  # tupla (día, mes, año)
         
         # Diccionario con mínimo 4 archivos predefinidos (requisito)
-        self.archivos_predefinidos: Dict[str, Dict[str, Any]] = {
+        archivos_predefinidos: Dict[str, Dict[str, Any]] = {
             "documento_crediticio.txt": {
-                "contenido": "Este archivo contiene información sobre evaluaciones crediticias realizadas por el sistema BBVA.\\nIncluye datos de clientes, montos aprobados y políticas aplicadas.",
+                "contenido": "Este archivo contiene información sobre evaluaciones crediticias realizadas por el sistema BBVA.\nIncluye datos de clientes, montos aprobados y políticas aplicadas.",
                 "tipo": "documento",
                 "fecha_creacion": (1, 9, 2025),  # tupla como se especifica
                 "fecha_modificacion": (15, 9, 2025),
@@ -51,7 +123,7 @@ class FileManager:
                 "descripcion": "Archivo principal de documentación crediticia"
             },
             "configuracion_sistema.json": {
-                "contenido": '{\\n  "servidor": {\\n    "host": "localhost",\\n    "puerto": 8000,\\n    "debug": true\\n  },\\n  "base_datos": {\\n    "tipo": "sqlite",\\n    "archivo": "bbva_credit.db"\\n  },\\n  "politicas": {\\n    "edad_minima": 18,\\n    "edad_maxima": 69,\\n    "ingreso_minimo": 7500\\n  }\\n}',
+                "contenido": '{\n  "servidor": {\n    "host": "localhost",\n    "puerto": 8000,\n    "debug": true\n  },\n  "base_datos": {\n    "tipo": "sqlite",\n    "archivo": "bbva_credit.db"\n  },\n  "politicas": {\n    "edad_minima": 18,\n    "edad_maxima": 69,\n    "ingreso_minimo": 7500\n  }\n}',
                 "tipo": "configuracion",
                 "fecha_creacion": (10, 8, 2025),
                 "fecha_modificacion": (20, 9, 2025),
@@ -61,7 +133,7 @@ class FileManager:
                 "descripcion": "Archivo de configuración principal del sistema"
             },
             "log_operaciones.log": {
-                "contenido": "[2025-09-01 10:00:00] INFO - Sistema iniciado correctamente\\n[2025-09-01 10:15:00] INFO - Usuario 'admin' conectado\\n[2025-09-15 14:30:00] INFO - Evaluación crediticia completada - ID: EC001\\n[2025-09-20 16:45:00] WARNING - Intento de acceso no autorizado\\n[2025-09-28 09:00:00] INFO - Sesión actual iniciada",
+                "contenido": "[2025-09-01 10:00:00] INFO - Sistema iniciado correctamente\n[2025-09-01 10:15:00] INFO - Usuario 'admin' conectado\n[2025-09-15 14:30:00] INFO - Evaluación crediticia completada - ID: EC001\n[2025-09-20 16:45:00] WARNING - Intento de acceso no autorizado\n[2025-09-28 09:00:00] INFO - Sesión actual iniciada",
                 "tipo": "log",
                 "fecha_creacion": (1, 9, 2025),
                 "fecha_modificacion": (28, 9, 2025),
@@ -71,7 +143,7 @@ class FileManager:
                 "descripcion": "Registro de operaciones del sistema"
             },
             "reporte_mensual.md": {
-                "contenido": "# Reporte Mensual - Septiembre 2025\\n\\n## Estadísticas Generales\\n- Evaluaciones realizadas: 156\\n- Aprobaciones: 89 (57%)\\n- Rechazos: 45 (29%)\\n- Contraofertas: 22 (14%)\\n\\n## Análisis de Riesgo\\n- Score promedio: 678\\n- DTI promedio: 32%\\n- Monto promedio solicitado: $125,000\\n\\n## Observaciones\\nSe observa un incremento en las solicitudes de crédito durante el último trimestre.",
+                "contenido": "# Reporte Mensual - Septiembre 2025\n\n## Estadísticas Generales\n- Evaluaciones realizadas: 156\n- Aprobaciones: 89 (57%)\n- Rechazos: 45 (29%)\n- Contraofertas: 22 (14%)\n\n## Análisis de Riesgo\n- Score promedio: 678\n- DTI promedio: 32%\n- Monto promedio solicitado: $125,000\n\n## Observaciones\nSe observa un incremento en las solicitudes de crédito durante el último trimestre.",
                 "tipo": "reporte",
                 "fecha_creacion": (25, 8, 2025),
                 "fecha_modificacion": (28, 9, 2025),
@@ -81,7 +153,7 @@ class FileManager:
                 "descripcion": "Reporte mensual de actividades crediticias"
             },
             "manual_usuario.txt": {
-                "contenido": "MANUAL DE USUARIO - SISTEMA AVANZADO DE GESTIÓN\\n\\n1. INTRODUCCIÓN\\nEste sistema permite gestionar archivos utilizando conceptos avanzados de programación.\\n\\n2. FUNCIONALIDADES\\n- Lectura de archivos existentes\\n- Escritura y modificación\\n- Creación de nuevos documentos\\n- Gestión de usuarios\\n\\n3. OPERACIONES BÁSICAS\\nPara leer un archivo, seleccione la opción 1 del menú principal.\\nPara escribir, use la opción 2.\\nPara crear nuevos archivos, use la opción 3.",
+                "contenido": "MANUAL DE USUARIO - SISTEMA AVANZADO DE GESTIÓN\n\n1. INTRODUCCIÓN\nEste sistema permite gestionar archivos utilizando conceptos avanzados de programación.\n\n2. FUNCIONALIDADES\n- Lectura de archivos existentes\n- Escritura y modificación\n- Creación de nuevos documentos\n- Gestión de usuarios\n\n3. OPERACIONES BÁSICAS\nPara leer un archivo, seleccione la opción 1 del menú principal.\nPara escribir, use la opción 2.\nPara crear nuevos archivos, use la opción 3.",
                 "tipo": "manual",
                 "fecha_creacion": (5, 9, 2025),
                 "fecha_modificacion": (10, 9, 2025),
@@ -92,19 +164,61 @@ class FileManager:
             }
         }
         
-        # Archivos creados dinámicamente por usuarios
-        self.archivos_usuarios: Dict[str, Dict[str, Any]] = {}
-        
-        # Estadísticas de uso
-        self.estadisticas = {
-            "archivos_leidos": 0,
-            "archivos_escritos": 0,
-            "archivos_creados": 0,
-            "errores_manejo": 0
-        }
+        # Estadísticas de uso (seguras entre hilos: las operaciones corren en el pool de E/S)
+        self.estadisticas = AtomicCounters(
+            ("archivos_leidos", "archivos_escritos", "archivos_creados", "errores_manejo")
+        )
         
         # Crear directorio si no existe
         self._inicializar_directorio()
+        
+        # Almacén persistente compartido por todos los workers; los predefinidos
+        # solo se siembran la primera vez para no pisar modificaciones previas
+        self.almacen = FileStore(
+            self.directorio_base / "archivos.db", derivar=metricas_contenido, separador_linea=SEPARADOR_LINEA,
+            durabilidad=durabilidad, ventana_grupo_ms=ventana_grupo_ms,
+            max_escrituras_grupo=max_escrituras_grupo, confirmaciones_por_checkpoint=confirmaciones_por_checkpoint,
+            max_bytes_cache=max_bytes_cache, version_derivada=VERSION_METRICAS
+        )
+        self.almacen.sembrar(archivos_predefinidos, ORIGEN_PREDEFINIDO)
+        self._normalizar_predefinidos(archivos_predefinidos)
+        
+        # Desplazamientos de inicio de línea por hash de contenido (LRU)
+        self._indices_lineas: "OrderedDict[str, array]" = OrderedDict()
+        self._indices_lineas_lock = threading.Lock()
+        
+        # Contenidos codificados en UTF-8 por hash (LRU), para que cada lectura
+        # por rangos no vuelva a leer, descomprimir y codificar el archivo entero
+        self._codificados: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes_codificados = 0
+        self._codificados_lock = threading.Lock()
+        
+        # Índice de texto completo; se construye en la primera búsqueda y luego
+        # se actualiza al crear/escribir y con los cambios de otros workers
+        self.indice = IndiceBusqueda(separador_linea=SEPARADOR_LINEA)
+        self._indice_construido = False
+        self._indice_lock = threading.RLock()
+        self.almacen.suscribir(self._reindexar)
+        
+        # Vistas de diccionario (solo lectura) sobre el almacén
+        self.archivos_predefinidos: Mapping[str, Dict[str, Any]] = VistaArchivos(self.almacen, ORIGEN_PREDEFINIDO)
+        # Archivos creados dinámicamente por usuarios
+        self.archivos_usuarios: Mapping[str, Dict[str, Any]] = VistaArchivos(self.almacen, ORIGEN_USUARIO)
+    
+    def _normalizar_predefinidos(self, archivos_predefinidos: Mapping[str, Dict[str, Any]]) -> None:
+        """
+        Reemplaza los predefinidos sembrados con el texto literal "\\n" en
+        lugar de saltos de línea, solo si nadie los modificó desde entonces.
+        """
+        for nombre, registro in archivos_predefinidos.items():
+            archivo = self.almacen.obtener(nombre)
+            if archivo is None or archivo["origen"] != ORIGEN_PREDEFINIDO:
+                continue
+            legado = registro["contenido"].replace(SEPARADOR_LINEA, "\\n")
+            if legado == registro["contenido"] or archivo["contenido"] != legado:
+                continue
+            archivo["contenido"] = registro["contenido"]
+            self.almacen.guardar(nombre, archivo.pop("origen"), archivo, autor=archivo["autor"])
     
     def _inicializar_directorio(self) -> None:
         """
@@ -164,57 +278,65 @@ class FileManager:
             }
             
         except ValueError as e:
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise ValueError(f"Error de validación de fecha: {e}")
         except Exception as e:
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise Exception(f"Error inesperado al configurar fecha: {e}")
     
-    def obtener_lista_archivos(self) -> Dict[str, List[Dict[str, Any]]]:
+    def obtener_lista_archivos(self, orden: str = "origen", descendente: bool = False,
+                               limite: Optional[int] = None, cursor: Optional[str] = None,
+                               autor: Optional[str] = None, tipo: Optional[str] = None) -> Dict[str, Any]:
         """
-        Obtiene la lista completa de archivos disponibles.
+        Obtiene la lista de archivos disponibles, ordenada y opcionalmente paginada.
         Implementa el diccionario con mínimo 4 archivos como se requiere.
         
+        Args:
+            orden (str): "origen" (predefinidos primero), "nombre", "fecha_modificacion" o "autor"
+            descendente (bool): Orden descendente
+            limite (Optional[int]): Archivos por página (None para todos)
+            cursor (Optional[str]): "siguiente_cursor" de la página anterior
+            autor (Optional[str]): Filtrar por autor
+            tipo (Optional[str]): Filtrar por tipo
+            
         Returns:
-            Dict[str, List[Dict[str, Any]]]: Diccionario con listas de archivos
+            Dict[str, Any]: Archivos de la página, cursor de la siguiente y totales
+            
+        Raises:
+            ValueError: Si el orden o el cursor no son válidos, o si el cursor
+                es de una consulta con otro orden o filtros
         """
         archivos_disponibles = []
         
-        # Agregar archivos predefinidos (mínimo 4 - requisito cumplido)
-        for nombre, info in self.archivos_predefinidos.items():
+        try:
+            pagina, siguiente_cursor = self.almacen.pagina(orden, descendente, limite, cursor, autor, tipo)
+        except ValueError:
+            self.estadisticas.increment("errores_manejo")
+            raise
+        
+        for nombre, info in pagina:
             archivo_info = {
                 "nombre": nombre,
                 "tipo": info["tipo"],
-                "descripcion": info["descripcion"],
+                "descripcion": info.get("descripcion", "Archivo creado por usuario"),
                 "fecha_creacion": info["fecha_creacion"],  # tupla
                 "fecha_modificacion": info["fecha_modificacion"],  # tupla
                 "autor": info["autor"],
                 "tamaño_bytes": info["tamaño_bytes"],
-                "solo_lectura": info["solo_lectura"],
-                "origen": "predefinido"
-            }
-            archivos_disponibles.append(archivo_info)
-        
-        # Agregar archivos creados por usuarios
-        for nombre, info in self.archivos_usuarios.items():
-            archivo_info = {
-                "nombre": nombre,
-                "tipo": info["tipo"],
-                "descripcion": info.get("descripcion", "Archivo creado por usuario"),
-                "fecha_creacion": info["fecha_creacion"],
-                "fecha_modificacion": info["fecha_modificacion"],
-                "autor": info["autor"],
-                "tamaño_bytes": len(info["contenido"].encode('utf-8')),
                 "solo_lectura": info.get("solo_lectura", False),
-                "origen": "usuario"
+                "origen": info["origen"]
             }
             archivos_disponibles.append(archivo_info)
         
         return {
             "archivos": archivos_disponibles,
-            "total_archivos": len(archivos_disponibles),
-            "archivos_predefinidos": len(self.archivos_predefinidos),
-            "archivos_usuarios": len(self.archivos_usuarios),
+            "total_archivos": self.almacen.contar(),
+            "archivos_en_pagina": len(archivos_disponibles),
+            "siguiente_cursor": siguiente_cursor,
+            "orden": orden,
+            "descendente": descendente,
+            "archivos_predefinidos": self.almacen.contar(ORIGEN_PREDEFINIDO),
+            "archivos_usuarios": self.almacen.contar(ORIGEN_USUARIO),
             "fecha_consulta": self.fecha_actual
         }
     
@@ -234,69 +356,205 @@ class FileManager:
             PermissionError: Si no hay permisos de lectura
         """
         try:
-            # Buscar en archivos predefinidos
-            if nombre_archivo in self.archivos_predefinidos:
-                archivo = self.archivos_predefinidos[nombre_archivo]
-                self.estadisticas["archivos_leidos"] += 1
-                
-                return {
-                    "nombre": nombre_archivo,
-                    "contenido": archivo["contenido"],
-                    "metadata": {
-                        "tipo": archivo["tipo"],
-                        "fecha_creacion": archivo["fecha_creacion"],
-                        "fecha_modificacion": archivo["fecha_modificacion"],
-                        "autor": archivo["autor"],
-                        "solo_lectura": archivo["solo_lectura"],
-                        "origen": "predefinido"
-                    },
-                    "estadisticas": {
-                        "tamaño_bytes": archivo["tamaño_bytes"],
-                        "lineas": archivo["contenido"].count('\\n') + 1,
-                        "caracteres": len(archivo["contenido"])
-                    },
-                    "timestamp_lectura": datetime.now().isoformat()
-                }
-            
-            # Buscar en archivos de usuarios
-            elif nombre_archivo in self.archivos_usuarios:
-                archivo = self.archivos_usuarios[nombre_archivo]
-                self.estadisticas["archivos_leidos"] += 1
-                
-                return {
-                    "nombre": nombre_archivo,
-                    "contenido": archivo["contenido"],
-                    "metadata": {
-                        "tipo": archivo["tipo"],
-                        "fecha_creacion": archivo["fecha_creacion"],
-                        "fecha_modificacion": archivo["fecha_modificacion"],
-                        "autor": archivo["autor"],
-                        "solo_lectura": archivo.get("solo_lectura", False),
-                        "origen": "usuario"
-                    },
-                    "estadisticas": {
-                        "tamaño_bytes": len(archivo["contenido"].encode('utf-8')),
-                        "lineas": archivo["contenido"].count('\\n') + 1,
-                        "caracteres": len(archivo["contenido"])
-                    },
-                    "timestamp_lectura": datetime.now().isoformat()
-                }
+            # Buscar en el almacén compartido (predefinidos y de usuarios)
+            archivo = self.almacen.obtener(nombre_archivo)
             
             # Archivo no encontrado - lanzar excepción
-            else:
-                archivos_disponibles = list(self.archivos_predefinidos.keys()) + list(self.archivos_usuarios.keys())
+            if archivo is None:
+                # Solo lo confirmado: en un lote transaccional este error revierte lo creado antes
+                archivos_disponibles = (self.almacen.nombres(ORIGEN_PREDEFINIDO, confirmados=True)
+                                        + self.almacen.nombres(ORIGEN_USUARIO, confirmados=True))
                 raise FileNotFoundError(
                     f"El archivo '{nombre_archivo}' no existe. "
                     f"Archivos disponibles: {', '.join(archivos_disponibles)}"
                 )
+            
+            self.estadisticas.increment("archivos_leidos")
+            
+            return {
+                "nombre": nombre_archivo,
+                "contenido": archivo["contenido"],
+                "metadata": {
+                    "tipo": archivo["tipo"],
+                    "fecha_creacion": archivo["fecha_creacion"],
+                    "fecha_modificacion": archivo["fecha_modificacion"],
+                    "autor": archivo["autor"],
+                    "solo_lectura": archivo.get("solo_lectura", False),
+                    "origen": archivo["origen"]
+                },
+                "estadisticas": {
+                    "tamaño_bytes": archivo["tamaño_bytes"],
+                    "lineas": archivo["lineas"],
+                    "caracteres": archivo["caracteres"]
+                },
+                "timestamp_lectura": datetime.now().isoformat()
+            }
                 
         except FileNotFoundError:
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise
         except Exception as e:
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise Exception(f"Error inesperado al leer archivo '{nombre_archivo}': {e}")
     
+    def obtener_hash(self, nombre_archivo: str) -> str:
+        """
+        Obtiene el hash del contenido actual de un archivo sin leerlo.
+        Permite responder 304 a clientes que ya tienen esa versión.
+        
+        Args:
+            nombre_archivo (str): Nombre del archivo
+            
+        Returns:
+            str: Hash SHA-256 del contenido
+            
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+        """
+        metadata = self.almacen.obtener_metadata(nombre_archivo)
+        if metadata is None:
+            self.estadisticas.increment("errores_manejo")
+            raise FileNotFoundError(f"El archivo '{nombre_archivo}' no existe")
+        return metadata["hash_contenido"]
+    
+    def obtener_tamaño(self, nombre_archivo: str) -> int:
+        """
+        Obtiene el tamaño real en bytes (UTF-8) del contenido actual sin leerlo.
+        El campo "tamaño_bytes" de la metadata no sirve: los predefinidos
+        declaran uno aproximado.
+        
+        Args:
+            nombre_archivo (str): Nombre del archivo
+            
+        Returns:
+            int: Bytes del contenido
+            
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+        """
+        while True:
+            hash_contenido = self.obtener_hash(nombre_archivo)
+            try:
+                return self.almacen.blobs.tamaño(hash_contenido)
+            except KeyError:
+                # Otro hilo lo reescribió y liberó ese blob: consultar la versión nueva
+                continue
+    
+    def leer_rango(self, nombre_archivo: str, inicio_byte: Optional[int] = None,
+                   fin_byte: Optional[int] = None, ultimos_bytes: Optional[int] = None,
+                   desde_linea: Optional[int] = None, hasta_linea: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Lee un fragmento del contenido de un archivo, por bytes o por líneas.
+        
+        Args:
+            nombre_archivo (str): Nombre del archivo
+            inicio_byte (Optional[int]): Primer byte (incluido)
+            fin_byte (Optional[int]): Último byte (incluido)
+            ultimos_bytes (Optional[int]): Leer solo los últimos n bytes
+            desde_linea (Optional[int]): Primera línea, desde 1 (incluida)
+            hasta_linea (Optional[int]): Última línea (incluida)
+            
+        Returns:
+            Dict[str, Any]: Fragmento en bytes UTF-8, rango servido, totales y hash
+            
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+            ValueError: Si el rango no es satisfacible
+        """
+        archivo, datos = self._contenido_codificado(nombre_archivo)
+        if archivo is None:
+            self.estadisticas.increment("errores_manejo")
+            raise FileNotFoundError(f"El archivo '{nombre_archivo}' no existe")
+        
+        total_bytes = len(datos)
+        resultado = {
+            "nombre": nombre_archivo,
+            "hash_contenido": archivo["hash_contenido"],
+            "tipo": archivo["tipo"],
+            "total_bytes": total_bytes
+        }
+        
+        if desde_linea is not None or hasta_linea is not None:
+            inicios = self._indice_lineas(archivo["hash_contenido"], datos)
+            total_lineas = len(inicios)
+            desde = desde_linea or 1
+            hasta = min(hasta_linea or total_lineas, total_lineas)
+            if desde < 1 or desde > total_lineas or hasta < desde:
+                self.estadisticas.increment("errores_manejo")
+                raise ValueError(f"Rango de líneas {desde}-{hasta_linea} fuera del archivo ({total_lineas} líneas)")
+            inicio = inicios[desde - 1]
+            fin = inicios[hasta] - len(SEPARADOR_LINEA) if hasta < total_lineas else total_bytes
+            resultado.update({"desde_linea": desde, "hasta_linea": hasta, "total_lineas": total_lineas})
+        else:
+            if ultimos_bytes is not None:
+                inicio_byte, fin_byte = max(total_bytes - ultimos_bytes, 0), total_bytes - 1
+            inicio = 0 if inicio_byte is None else inicio_byte
+            fin = total_bytes if fin_byte is None else min(fin_byte + 1, total_bytes)
+            if (inicio_byte is not None or fin_byte is not None) and not 0 <= inicio < fin:
+                self.estadisticas.increment("errores_manejo")
+                raise ValueError(f"Rango de bytes {inicio}-{fin_byte} fuera del archivo ({total_bytes} bytes)")
+        
+        self.estadisticas.increment("archivos_leidos")
+        resultado.update({"inicio_byte": inicio, "fin_byte": fin - 1, "datos": memoryview(datos)[inicio:fin]})
+        return resultado
+    
+    def _contenido_codificado(self, nombre_archivo: str) -> Tuple[Optional[Dict[str, Any]], bytes]:
+        """
+        Metadata de un archivo y su contenido codificado en UTF-8. Los bytes se
+        conservan en una caché LRU por hash de contenido, limitada a
+        MAX_BYTES_CODIFICADOS, así que no hace falta invalidarla al escribir.
+        """
+        while True:
+            metadata = self.almacen.obtener_metadata(nombre_archivo)
+            if metadata is None:
+                return None, b""
+            hash_contenido = metadata["hash_contenido"]
+            with self._codificados_lock:
+                datos = self._codificados.get(hash_contenido)
+                if datos is not None:
+                    self._codificados.move_to_end(hash_contenido)
+                    return metadata, datos
+            try:
+                # Sin conservar el texto en el almacén: aquí se guardan los bytes
+                datos = self.almacen.blobs.leer(hash_contenido, conservar=False).encode('utf-8')
+            except KeyError:
+                # Otro hilo lo reescribió y liberó ese blob: consultar la versión nueva
+                continue
+            break
+        
+        if len(datos) <= MAX_BYTES_CODIFICADOS:
+            with self._codificados_lock:
+                if hash_contenido not in self._codificados:
+                    self._codificados[hash_contenido] = datos
+                    self._bytes_codificados += len(datos)
+                while self._bytes_codificados > MAX_BYTES_CODIFICADOS:
+                    _, descartados = self._codificados.popitem(last=False)
+                    self._bytes_codificados -= len(descartados)
+        return metadata, datos
+    
+    def _indice_lineas(self, hash_contenido: str, datos: bytes) -> array:
+        """
+        Desplazamientos (en bytes) de inicio de cada línea de un contenido.
+        Se calcula una vez por contenido y se conserva en una caché LRU.
+        """
+        with self._indices_lineas_lock:
+            inicios = self._indices_lineas.get(hash_contenido)
+            if inicios is not None:
+                self._indices_lineas.move_to_end(hash_contenido)
+                return inicios
+        
+        separador = SEPARADOR_LINEA.encode('utf-8')
+        lineas = datos.split(separador)
+        inicios = array('q', [0])
+        inicios.extend(accumulate(len(linea) + len(separador) for linea in lineas[:-1]))
+        
+        with self._indices_lineas_lock:
+            self._indices_lineas[hash_contenido] = inicios
+            self._indices_lineas.move_to_end(hash_contenido)
+            if len(self._indices_lineas) > MAX_INDICES_LINEAS:
+                self._indices_lineas.popitem(last=False)
+        return inicios
+    
     def escribir_archivo(self, nombre_archivo: str, nuevo_contenido: str, autor: str) -> Dict[str, Any]:
         """
         Escribir/modificar contenido de un archivo existente.
@@ -315,60 +573,41 @@ class FileManager:
             PermissionError: Si el archivo es de solo lectura
         """
         try:
-            # Verificar si existe en predefinidos
-            if nombre_archivo in self.archivos_predefinidos:
-                archivo = self.archivos_predefinidos[nombre_archivo]
-                
-                if archivo["solo_lectura"]:
-                    raise PermissionError(f"El archivo '{nombre_archivo}' es de solo lectura")
-                
-                # Actualizar contenido y fecha usando tupla
-                archivo["contenido"] = nuevo_contenido
-                archivo["fecha_modificacion"] = self.fecha_actual  # tupla
-                archivo["tamaño_bytes"] = len(nuevo_contenido.encode('utf-8'))
-                
-                self.estadisticas["archivos_escritos"] += 1
-                
-                return {
-                    "mensaje": f"Archivo '{nombre_archivo}' modificado exitosamente",
-                    "nombre_archivo": nombre_archivo,
-                    "fecha_modificacion": self.fecha_actual,
-                    "autor_modificacion": autor,
-                    "tamaño_nuevo": archivo["tamaño_bytes"],
-                    "timestamp": datetime.now().isoformat()
-                }
-            
-            # Verificar si existe en archivos de usuarios
-            elif nombre_archivo in self.archivos_usuarios:
-                archivo = self.archivos_usuarios[nombre_archivo]
-                
-                if archivo.get("solo_lectura", False):
-                    raise PermissionError(f"El archivo '{nombre_archivo}' es de solo lectura")
-                
-                # Actualizar contenido y fecha usando tupla
-                archivo["contenido"] = nuevo_contenido
-                archivo["fecha_modificacion"] = self.fecha_actual  # tupla
-                
-                self.estadisticas["archivos_escritos"] += 1
-                
-                return {
-                    "mensaje": f"Archivo '{nombre_archivo}' modificado exitosamente",
-                    "nombre_archivo": nombre_archivo,
-                    "fecha_modificacion": self.fecha_actual,
-                    "autor_modificacion": autor,
-                    "tamaño_nuevo": len(nuevo_contenido.encode('utf-8')),
-                    "timestamp": datetime.now().isoformat()
-                }
+            archivo = self.almacen.obtener(nombre_archivo)
             
             # Archivo no existe
-            else:
+            if archivo is None:
                 raise FileNotFoundError(f"El archivo '{nombre_archivo}' no existe")
+            
+            if archivo.get("solo_lectura", False):
+                raise PermissionError(f"El archivo '{nombre_archivo}' es de solo lectura")
+            
+            # Actualizar contenido y fecha usando tupla
+            archivo["contenido"] = nuevo_contenido
+            archivo["fecha_modificacion"] = self.fecha_actual  # tupla
+            archivo["tamaño_bytes"] = len(nuevo_contenido.encode('utf-8'))
+            
+            # Persistir en el almacén compartido (visible para todos los workers)
+            self.almacen.guardar(nombre_archivo, archivo.pop("origen"), archivo, autor=autor)
+            self._indexar(nombre_archivo)
+            
+            # Como el índice, solo cuenta si se confirma (un lote transaccional puede revertirla)
+            self.almacen.al_confirmar(lambda: self.estadisticas.increment("archivos_escritos"))
+            
+            return {
+                "mensaje": f"Archivo '{nombre_archivo}' modificado exitosamente",
+                "nombre_archivo": nombre_archivo,
+                "fecha_modificacion": self.fecha_actual,
+                "autor_modificacion": autor,
+                "tamaño_nuevo": archivo["tamaño_bytes"],
+                "timestamp": datetime.now().isoformat()
+            }
                 
         except (FileNotFoundError, PermissionError):
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise
         except Exception as e:
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise Exception(f"Error inesperado al escribir archivo '{nombre_archivo}': {e}")
     
     def crear_archivo(self, nombre_archivo: str, contenido: str, autor: str, 
@@ -397,11 +636,6 @@ class FileManager:
             
             nombre_archivo = nombre_archivo.strip()
             
-            # Verificar si ya existe
-            if (nombre_archivo in self.archivos_predefinidos or 
-                nombre_archivo in self.archivos_usuarios):
-                raise ValueError(f"El archivo '{nombre_archivo}' ya existe")
-            
             # Crear archivo usando fecha actual (tupla)
             nuevo_archivo = {
                 "contenido": contenido,
@@ -410,12 +644,16 @@ class FileManager:
                 "fecha_modificacion": self.fecha_actual,  # tupla
                 "autor": autor,
                 "descripcion": descripcion if descripcion else f"Archivo {tipo} creado por {autor}",
+                "tamaño_bytes": len(contenido.encode('utf-8')),
                 "solo_lectura": False
             }
             
-            # Almacenar en archivos de usuarios
-            self.archivos_usuarios[nombre_archivo] = nuevo_archivo
-            self.estadisticas["archivos_creados"] += 1
+            # Almacenar en archivos de usuarios; la inserción falla si ya existe
+            # (comprobado de forma atómica entre workers)
+            if not self.almacen.insertar(nombre_archivo, ORIGEN_USUARIO, nuevo_archivo):
+                raise ValueError(f"El archivo '{nombre_archivo}' ya existe")
+            self._indexar(nombre_archivo)
+            self.almacen.al_confirmar(lambda: self.estadisticas.increment("archivos_creados"))
             
             return {
                 "mensaje": f"Archivo '{nombre_archivo}' creado exitosamente",
@@ -423,18 +661,266 @@ class FileManager:
                 "tipo": tipo,
                 "fecha_creacion": self.fecha_actual,
                 "autor": autor,
-                "tamaño_bytes": len(contenido.encode('utf-8')),
+                "tamaño_bytes": nuevo_archivo["tamaño_bytes"],
                 "descripcion": nuevo_archivo["descripcion"],
                 "timestamp": datetime.now().isoformat()
             }
             
         except ValueError:
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise
         except Exception as e:
-            self.estadisticas["errores_manejo"] += 1
+            self.estadisticas.increment("errores_manejo")
             raise Exception(f"Error inesperado al crear archivo '{nombre_archivo}': {e}")
     
+    def listar_versiones(self, nombre_archivo: str) -> Dict[str, Any]:
+        """
+        Lista el historial de versiones de un archivo.
+        
+        Args:
+            nombre_archivo (str): Nombre del archivo
+            
+        Returns:
+            Dict[str, Any]: Versiones de la más antigua a la más reciente
+            
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+        """
+        if not self.almacen.existe(nombre_archivo):
+            self.estadisticas.increment("errores_manejo")
+            raise FileNotFoundError(f"El archivo '{nombre_archivo}' no existe")
+        
+        versiones = self.almacen.versiones(nombre_archivo)
+        return {
+            "nombre": nombre_archivo,
+            "versiones": versiones,
+            "total_versiones": len(versiones),
+            "version_actual": versiones[-1]["version"] if versiones else None
+        }
+    
+    def leer_version(self, nombre_archivo: str, version: int) -> Dict[str, Any]:
+        """
+        Lee el contenido de una versión anterior de un archivo.
+        
+        Args:
+            nombre_archivo (str): Nombre del archivo
+            version (int): Número de versión
+            
+        Returns:
+            Dict[str, Any]: Contenido de la versión
+            
+        Raises:
+            FileNotFoundError: Si el archivo o la versión no existen
+        """
+        try:
+            contenido = self.almacen.leer_version(nombre_archivo, version)
+        except KeyError:
+            self.estadisticas.increment("errores_manejo")
+            raise FileNotFoundError(f"El archivo '{nombre_archivo}' no tiene versión {version}")
+        
+        self.estadisticas.increment("archivos_leidos")
+        return {
+            "nombre": nombre_archivo,
+            "version": version,
+            "contenido": contenido,
+            "estadisticas": dict(metricas_contenido(contenido), tamaño_bytes=len(contenido.encode('utf-8')))
+        }
+    
+    def comparar_versiones(self, nombre_archivo: str, desde: int, hasta: int) -> Dict[str, Any]:
+        """
+        Compara dos versiones de un archivo (diff unificado por líneas).
+        
+        Args:
+            nombre_archivo (str): Nombre del archivo
+            desde (int): Versión de origen
+            hasta (int): Versión de destino
+            
+        Returns:
+            Dict[str, Any]: Líneas del diff y resumen de líneas añadidas/eliminadas
+            
+        Raises:
+            FileNotFoundError: Si el archivo o alguna de las versiones no existen
+        """
+        try:
+            diff = self.almacen.diferencias(nombre_archivo, desde, hasta)
+        except KeyError as e:
+            self.estadisticas.increment("errores_manejo")
+            raise FileNotFoundError(f"El archivo '{nombre_archivo}' no tiene versión {e.args[0]}")
+        
+        return {
+            "nombre": nombre_archivo,
+            "desde": desde,
+            "hasta": hasta,
+            "diff": diff,
+            "lineas_añadidas": sum(1 for linea in diff if linea.startswith("+") and not linea.startswith("+++")),
+            "lineas_eliminadas": sum(1 for linea in diff if linea.startswith("-") and not linea.startswith("---"))
+        }
+    
+    def _ejecutar_operacion(self, operacion: Dict[str, Any]) -> Dict[str, Any]:
+        """Ejecuta una operación de un lote con los métodos de un solo archivo."""
+        tipo_operacion = operacion.get("operacion")
+        nombre = operacion.get("nombre_archivo", "")
+        if tipo_operacion not in OPERACIONES_LOTE:
+            raise ValueError(f"Operación '{tipo_operacion}' no válida; use {', '.join(OPERACIONES_LOTE)}")
+        if tipo_operacion == "leer":
+            return self.leer_archivo(nombre)
+        
+        if operacion.get("contenido") is None or not operacion.get("autor"):
+            raise ValueError(f"La operación '{tipo_operacion}' requiere contenido y autor")
+        if tipo_operacion == "escribir":
+            return self.escribir_archivo(nombre, operacion["contenido"], operacion["autor"])
+        return self.crear_archivo(
+            nombre, operacion["contenido"], operacion["autor"],
+            operacion.get("tipo") or "texto", operacion.get("descripcion") or ""
+        )
+    
+    def ejecutar_lote(self, operaciones: List[Dict[str, Any]], transaccional: bool = False) -> Dict[str, Any]:
+        """
+        Ejecuta una lista de operaciones de lectura, escritura y creación en una sola pasada.
+        
+        En modo transaccional todas las escrituras se confirman juntas; si una
+        operación falla no se aplica ninguna y el resto se marca como revertida
+        o no ejecutada.
+        
+        Args:
+            operaciones (List[Dict[str, Any]]): Operaciones con "operacion" (leer,
+                escribir o crear), "nombre_archivo" y, para escribir/crear,
+                "contenido" y "autor" ("tipo" y "descripcion" opcionales al crear)
+            transaccional (bool): Todo o nada
+            
+        Returns:
+            Dict[str, Any]: Resultado por operación y resumen del lote
+        """
+        resultados: List[Dict[str, Any]] = []
+        
+        def ejecutar(indice: int, operacion: Dict[str, Any]) -> bool:
+            resultado = {
+                "indice": indice,
+                "operacion": operacion.get("operacion"),
+                "nombre_archivo": operacion.get("nombre_archivo")
+            }
+            try:
+                resultado.update(exito=True, codigo=200, data=self._ejecutar_operacion(operacion))
+            except Exception as e:
+                resultado.update(exito=False, codigo=CODIGOS_ERROR_LOTE.get(type(e), 500), error=str(e))
+            resultados.append(resultado)
+            return resultado["exito"]
+        
+        confirmado = True
+        if not transaccional:
+            for indice, operacion in enumerate(operaciones):
+                ejecutar(indice, operacion)
+        else:
+            fallida: Optional[int] = None
+            try:
+                with self.almacen.transaccion():
+                    for indice, operacion in enumerate(operaciones):
+                        if not ejecutar(indice, operacion):
+                            fallida = indice
+                            raise _LoteRevertido()
+            except _LoteRevertido:
+                confirmado = False
+                for resultado in resultados[:fallida]:
+                    resultado.update(exito=False, codigo=409, data=None,
+                                     error=f"Revertida: falló la operación {fallida}")
+                for indice in range(fallida + 1, len(operaciones)):
+                    resultados.append({
+                        "indice": indice,
+                        "operacion": operaciones[indice].get("operacion"),
+                        "nombre_archivo": operaciones[indice].get("nombre_archivo"),
+                        "exito": False,
+                        "codigo": 409,
+                        "error": f"No ejecutada: falló la operación {fallida}"
+                    })
+        
+        exitosas = sum(1 for resultado in resultados if resultado["exito"])
+        return {
+            "resultados": resultados,
+            "total_operaciones": len(operaciones),
+            "exitosas": exitosas,
+            "fallidas": len(operaciones) - exitosas,
+            "transaccional": transaccional,
+            "confirmado": confirmado
+        }
+    
+    def _indexar(self, nombre: str) -> None:
+        """
+        Actualiza el índice tras una escritura de este worker (si ya se construyó
+        y se confirmó). Indexa el contenido vigente y no el que se escribió:
+        si dos hilos escriben el mismo archivo, el último en indexar deja la
+        versión más reciente aunque terminen en otro orden.
+        """
+        self.almacen.al_confirmar(lambda: self._reindexar([nombre]))
+    
+    def _reindexar(self, nombres: List[str]) -> None:
+        """Aplica al índice los archivos que otro worker modificó (feed de cambios del almacén)."""
+        with self._indice_lock:
+            if not self._indice_construido:
+                return
+            for nombre in nombres:
+                archivo = self.almacen.obtener(nombre)
+                if archivo is None:
+                    self.indice.eliminar(nombre)
+                else:
+                    self.indice.indexar(nombre, archivo["contenido"])
+    
+    def _construir_indice(self) -> None:
+        """Indexa todos los archivos la primera vez que se busca."""
+        if self._indice_construido:
+            return
+        with self._indice_lock:
+            if self._indice_construido:
+                return
+            for nombre, metadata in self.almacen.listar_metadata():
+                self.indice.indexar(nombre, self.almacen.blobs.leer(metadata["hash_contenido"], conservar=False))
+            self._indice_construido = True
+    
+    def buscar_archivos(self, consulta: str, limite: int = 10) -> Dict[str, Any]:
+        """
+        Busca archivos por contenido con el índice invertido.
+        
+        Args:
+            consulta (str): Términos separados por espacios; "término*" busca por prefijo
+            limite (int): Máximo de resultados
+            
+        Returns:
+            Dict[str, Any]: Resultados ordenados por relevancia con un fragmento de cada uno
+            
+        Raises:
+            ValueError: Si la consulta no contiene ningún término
+        """
+        if not self.indice.terminos(consulta.replace("*", " ")):
+            self.estadisticas.increment("errores_manejo")
+            raise ValueError("La consulta debe contener al menos un término")
+        
+        inicio = time.perf_counter()
+        self._construir_indice()
+        # Incorporar los cambios de otros workers antes de consultar
+        self.almacen.sincronizar()
+        encontrados, total = self.indice.buscar(consulta, limite)
+        
+        resultados = []
+        for nombre, puntuacion, terminos in encontrados:
+            archivo = self.almacen.obtener(nombre)
+            if archivo is None:
+                continue
+            resultados.append({
+                "nombre": nombre,
+                "puntuacion": puntuacion,
+                "tipo": archivo["tipo"],
+                "origen": archivo["origen"],
+                "terminos": sorted(set(terminos)),
+                "fragmento": self.indice.fragmento(archivo["contenido"], terminos)
+            })
+        
+        return {
+            "consulta": consulta,
+            "resultados": resultados,
+            "total_coincidencias": total,
+            "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 3),
+            "indice": self.indice.estadisticas()
+        }
+    
     def obtener_estadisticas(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas completas del sistema de archivos.
@@ -443,40 +929,93 @@ class FileManager:
         Returns:
             Dict[str, Any]: Estadísticas completas del sistema
         """
-        total_archivos = len(self.archivos_predefinidos) + len(self.archivos_usuarios)
-        
-        # Calcular tamaños totales
-        tamaño_predefinidos = sum(
-            archivo["tamaño_bytes"] for archivo in self.archivos_predefinidos.values()
-        )
-        tamaño_usuarios = sum(
-            len(archivo["contenido"].encode('utf-8')) for archivo in self.archivos_usuarios.values()
-        )
-        
-        # Análisis por tipos
-        tipos_archivos = {}
-        for archivo in self.archivos_predefinidos.values():
-            tipos_archivos[archivo["tipo"]] = tipos_archivos.get(archivo["tipo"], 0) + 1
-        for archivo in self.archivos_usuarios.values():
-            tipos_archivos[archivo["tipo"]] = tipos_archivos.get(archivo["tipo"], 0) + 1
+        # Totales mantenidos por el almacén en cada escritura (sin recorrer archivos)
+        archivos = self.almacen.totales("archivos")
+        archivos_predefinidos = archivos.get(ORIGEN_PREDEFINIDO, 0)
+        archivos_usuarios = archivos.get(ORIGEN_USUARIO, 0)
         
         return {
             "resumen": {
-                "total_archivos": total_archivos,
-                "archivos_predefinidos": len(self.archivos_predefinidos),
-                "archivos_creados_usuarios": len(self.archivos_usuarios),
-                "tamaño_total_bytes": tamaño_predefinidos + tamaño_usuarios
+                "total_archivos": archivos_predefinidos + archivos_usuarios,
+                "archivos_predefinidos": archivos_predefinidos,
+                "archivos_creados_usuarios": archivos_usuarios,
+                "tamaño_total_bytes": sum(self.almacen.totales("tamaño_bytes").values()),
+                "lineas_totales": sum(self.almacen.totales("lineas").values()),
+                "caracteres_totales": sum(self.almacen.totales("caracteres").values())
             },
-            "operaciones_realizadas": self.estadisticas.copy(),
-            "tipos_archivos": tipos_archivos,
+            "operaciones_realizadas": self.estadisticas.snapshot(),
+            "almacenamiento": self.almacen.blobs.estadisticas(),
+            "historial": self.almacen.totales("historial"),
+            "escritura": self.almacen.estadisticas_escritura(),
+            "memoria": self.almacen.estadisticas_memoria(),
+            "tipos_archivos": self.almacen.totales("tipo"),
             "fecha_actual_sistema": self.fecha_actual,
             "directorio_trabajo": str(self.directorio_base),
-            "archivos_solo_lectura": len([
-                a for a in self.archivos_predefinidos.values() if a["solo_lectura"]
-            ]),
+            "archivos_solo_lectura": sum(self.almacen.totales("solo_lectura").values()),
             "timestamp_estadisticas": datetime.now().isoformat()
         }
+    
+    def exportar_estado(self) -> Dict[str, Any]:
+        """
+        Estado que solo vive en memoria, para una instantánea (ver
+        snapshot_store). El contenido de los archivos ya está en el almacén.
+        
+        Returns:
+            Dict[str, Any]: Fecha del sistema y estadísticas de uso
+        """
+        return {"fecha_actual": list(self.fecha_actual), "estadisticas": self.estadisticas.snapshot()}
+    
+    def restaurar_estado(self, estado: Dict[str, Any]) -> None:
+        """
+        Carga una instantánea tomada con exportar_estado().
+        
+        Args:
+            estado (Dict[str, Any]): Estado exportado
+        """
+        if "fecha_actual" in estado:
+            self.fecha_actual = tuple(estado["fecha_actual"])
+        conocidas = self.estadisticas.snapshot()
+        for nombre, valor in estado.get("estadisticas", {}).items():
+            if nombre in conocidas:
+                self.estadisticas.increment(nombre, valor)
+
+
+# Instancia global del gestor de archivos, creada en el primer uso para que
+# importar el módulo no cree directorios ni escriba en stdout
+_file_manager: Optional[FileManager] = None
+_file_manager_lock = threading.Lock()
+
+
+def get_file_manager() -> FileManager:
+    """
+    Obtiene la instancia global del gestor de archivos, creándola si no existe.
+    
+    Returns:
+        FileManager: Gestor de archivos compartido por el proceso
+    """
+    global _file_manager
+    if _file_manager is None:
+        with _file_manager_lock:
+            if _file_manager is None:
+                file_manager = FileManager(
+                    durabilidad=settings.file_durability,
+                    ventana_grupo_ms=settings.file_group_commit_ms,
+                    max_escrituras_grupo=settings.file_group_commit_max,
+                    confirmaciones_por_checkpoint=settings.file_checkpoint_every,
+                    max_bytes_cache=settings.file_cache_max_bytes or None
+                )
+                # Recuperar el estado de la última instantánea y participar en las siguientes
+                instantaneas = get_instantaneas()
+                if instantaneas is not None:
+                    for estado, _ in instantaneas.restaurables("archivos"):
+                        file_manager.restaurar_estado(estado)
+                    instantaneas.registrar("archivos", file_manager.exportar_estado)
+                _file_manager = file_manager
+    return _file_manager
 
 
-# Instancia global del gestor de archivos
-file_manager = FileManager()
\ No newline at end of file
+def __getattr__(nombre: str) -> Any:
+    """Mantiene `from file_manager import file_manager` creando la instancia al acceder."""
+    if nombre == "file_manager":
+        return get_file_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
\ No newline at end of file
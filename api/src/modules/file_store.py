@@ -0,0 +1,1100 @@
+"""
+Almacén Persistente de Archivos - Sistema Avanzado
+=================================================
+
+Este módulo implementa el almacenamiento compartido del gestor de archivos:
+- Base de datos SQLite en modo WAL bajo el directorio base
+- Búsqueda indexada por nombre (clave primaria)
+- Caché de lectura en cada proceso (worker), LRU con presupuesto de memoria
+- Invalidación de la caché cuando otro proceso escribe un archivo
+- Contenidos deduplicados y comprimidos por hash (ver blob_store)
+- Metadata derivada del contenido (p. ej. líneas y caracteres) calculada al escribir
+- Totales por origen y por tipo mantenidos en cada escritura (ver counters)
+- Historial de versiones de cada archivo (ver version_store)
+- Listado paginado por cursor sobre índices ordenados por nombre, fecha y autor
+- Confirmación agrupada: escrituras concurrentes comparten un mismo fsync
+
+La base hace de nivel en disco de la caché: con un presupuesto de memoria,
+los archivos usados hace más tiempo salen de la caché cuando los textos
+retenidos lo superan, y se vuelven a leer de la base en el siguiente acceso.
+
+Cada escritura recibe un número de secuencia creciente. Cuando otro proceso
+confirma una transacción, `PRAGMA data_version` cambia y el almacén consulta
+qué archivos tienen una secuencia mayor a la última vista para invalidar
+solo esas entradas de la caché.
+
+El WAL de SQLite hace de diario de escrituras: cada confirmación se agrega
+al final del archivo -wal, al abrir la base tras una caída se reproducen
+las transacciones confirmadas y se descartan las incompletas, y un
+checkpoint periódico compacta el diario en el archivo principal. La
+durabilidad elige cuándo se sincroniza con el disco:
+- "sync": cada escritura es su propia transacción con fsync
+- "group": las escrituras que llegan dentro de una ventana corta se
+  confirman juntas con un solo fsync; cada llamada vuelve cuando el suyo
+  terminó, así que la garantía es la misma que con "sync"
+- "deferred": el WAL solo se sincroniza en los checkpoints; lo más rápido,
+  pero un corte de energía puede perder las últimas escrituras (una caída
+  del proceso no)
+"""
+
+import base64
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .blob_store import BlobStore, calcular_hash
+from .counters import Contadores
+from .version_store import HistorialVersiones
+
+
+# Campos de metadata que se guardan como tuplas (día, mes, año)
+CAMPOS_FECHA = ("fecha_creacion", "fecha_modificacion")
+
+# Campos numéricos de metadata que se suman por origen en los contadores
+CAMPOS_SUMADOS = ("tamaño_bytes", "lineas", "caracteres")
+
+# Contador con la versión del cálculo de metadata derivada aplicada a la base
+CLAVE_VERSION_DERIVADA = "meta:version_derivada"
+
+TABLA_ARCHIVOS = """
+CREATE TABLE IF NOT EXISTS archivos (
+    nombre TEXT PRIMARY KEY,
+    origen TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    autor TEXT,
+    tipo TEXT,
+    fecha_orden INTEGER
+)"""
+
+# Columnas copiadas de la metadata para ordenar y filtrar con índices
+COLUMNAS_ORDEN = ("autor", "tipo", "fecha_orden")
+
+ESQUEMA = TABLA_ARCHIVOS + """;
+CREATE INDEX IF NOT EXISTS idx_archivos_seq ON archivos (seq);
+CREATE INDEX IF NOT EXISTS idx_archivos_origen ON archivos (origen, nombre);
+CREATE INDEX IF NOT EXISTS idx_archivos_fecha ON archivos (fecha_orden, nombre);
+CREATE INDEX IF NOT EXISTS idx_archivos_autor ON archivos (autor, nombre);
+CREATE INDEX IF NOT EXISTS idx_archivos_autor_fecha ON archivos (autor, fecha_orden, nombre);
+CREATE INDEX IF NOT EXISTS idx_archivos_tipo ON archivos (tipo, nombre);
+"""
+
+# Criterios de orden del listado paginado -> columna indexada
+ORDENES_LISTADO = {
+    "origen": "origen",
+    "nombre": "nombre",
+    "fecha_modificacion": "fecha_orden",
+    "autor": "autor"
+}
+
+# Niveles de durabilidad de las escrituras (ver docstring del módulo)
+DURABILIDAD_SINCRONA = "sync"
+DURABILIDAD_GRUPO = "group"
+DURABILIDAD_DIFERIDA = "deferred"
+DURABILIDADES = (DURABILIDAD_SINCRONA, DURABILIDAD_GRUPO, DURABILIDAD_DIFERIDA)
+
+# Confirmación agrupada: espera máxima a las escrituras en cola y máximo por grupo
+VENTANA_GRUPO_MS = 2.0
+MAX_ESCRITURAS_GRUPO = 64
+
+# Confirmaciones entre checkpoints que compactan el WAL en la base principal
+CONFIRMACIONES_POR_CHECKPOINT = 1000
+
+
+def columnas_orden(metadata: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str], int]:
+    """
+    Valores de las columnas de orden de un archivo.
+
+    Returns:
+        Tuple: (autor, tipo, fecha de modificación como entero AAAAMMDD)
+    """
+    dia, mes, año = metadata.get("fecha_modificacion") or (0, 0, 0)
+    return metadata.get("autor"), metadata.get("tipo"), año * 10000 + mes * 100 + dia
+
+
+def codificar_cursor(consulta: List[Any], valor: Any, nombre: str) -> str:
+    """
+    Cursor opaco con la consulta que lo generó (orden, descendente, autor y
+    tipo) y la clave de orden y el nombre del último archivo de una página.
+    """
+    return base64.urlsafe_b64encode(json.dumps([consulta, valor, nombre]).encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[List[Any], Any, str]:
+    """
+    Recupera la consulta, la clave de orden y el nombre de un cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        consulta, valor, nombre = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+    if not isinstance(consulta, list) or not isinstance(nombre, str):
+        raise ValueError("Cursor de paginación inválido")
+    return consulta, valor, nombre
+
+
+class FileStore:
+    """
+    Almacén de archivos respaldado por SQLite y compartido entre procesos.
+    Los registros son diccionarios con "contenido", "origen", "hash_contenido"
+    y la metadata; cada archivo referencia su contenido por hash.
+    """
+
+    def __init__(self, ruta_db: Path, derivar: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 separador_linea: str = "\n", durabilidad: str = DURABILIDAD_GRUPO,
+                 ventana_grupo_ms: float = VENTANA_GRUPO_MS, max_escrituras_grupo: int = MAX_ESCRITURAS_GRUPO,
+                 confirmaciones_por_checkpoint: int = CONFIRMACIONES_POR_CHECKPOINT,
+                 max_bytes_cache: Optional[int] = None, version_derivada: int = 0):
+        """
+        Abre (o crea) la base de datos del almacén.
+
+        Args:
+            ruta_db (Path): Ruta del archivo SQLite
+            derivar: Función que calcula metadata a partir del contenido;
+                se aplica en cada escritura y se guarda con el archivo
+            separador_linea (str): Separador de líneas para las diferencias del historial
+            durabilidad (str): "sync", "group" o "deferred"
+            ventana_grupo_ms (float): Espera máxima de un grupo por más escrituras
+            max_escrituras_grupo (int): Escrituras que confirman un grupo sin esperar la ventana
+            confirmaciones_por_checkpoint (int): Cada cuántas confirmaciones se compacta el WAL
+            max_bytes_cache (Optional[int]): Memoria máxima de los textos en caché
+                (None sin límite)
+            version_derivada (int): Versión del cálculo de `derivar`; si la base
+                se guardó con una anterior, la metadata derivada se recalcula
+
+        Raises:
+            ValueError: Si la durabilidad no es válida
+        """
+        if durabilidad not in DURABILIDADES:
+            raise ValueError(f"Durabilidad no válida: {durabilidad!r}")
+        self.ruta_db = Path(ruta_db)
+        self.derivar = derivar
+        self.durabilidad = durabilidad
+        self.ventana_grupo = ventana_grupo_ms / 1000
+        self.max_escrituras_grupo = max(1, max_escrituras_grupo)
+        self.confirmaciones_por_checkpoint = confirmaciones_por_checkpoint
+        self.max_bytes_cache = max_bytes_cache
+        self._conexion = sqlite3.connect(
+            str(self.ruta_db), isolation_level=None, check_same_thread=False, timeout=30.0
+        )
+        # Abrir la base ya reproduce el WAL que dejó una caída
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            "PRAGMA synchronous=" + ("NORMAL" if durabilidad == DURABILIDAD_DIFERIDA else "FULL")
+        )
+        # Los totales se leen por una conexión propia (WAL: lectores sin
+        # bloqueo). Por la compartida se verían los de un grupo o una
+        # transacción aún sin confirmar, incluso con el lock tomado, porque el
+        # líder de un grupo lo suelta mientras espera la ventana
+        self._conexion_lectura = sqlite3.connect(
+            str(self.ruta_db), isolation_level=None, check_same_thread=False, timeout=30.0
+        )
+        self.contadores = Contadores(self._conexion, self._conexion_lectura)
+        self.blobs = BlobStore(self._conexion, self.contadores)
+        self.historial = HistorialVersiones(self._conexion, self.contadores, separador_linea)
+        self._migrar_contenido_en_linea()
+        self._migrar_columnas_orden()
+        self._conexion.executescript(ESQUEMA)
+        self._inicializar_contadores()
+        self._actualizar_derivada(version_derivada)
+        self._inicializar_historial()
+        # Un solo lock para todo el almacén, no uno por archivo: todas las
+        # sentencias van por la misma conexión SQLite, que no admite dos
+        # transacciones a la vez, y SQLite solo tiene un escritor por base
+        # (BEGIN IMMEDIATE). Con locks por nombre dos escritores de archivos
+        # distintos se encontrarían igualmente en la conexión; además la
+        # confirmación agrupada necesita que cada escritura se sume, en orden,
+        # a la transacción abierta del grupo, y la caché LRU, los blobs
+        # retenidos y los contadores son estructuras compartidas entre
+        # archivos. El lock se toma solo para SQLite y la caché: hash,
+        # metadata derivada y JSON se calculan antes (ver _preparar).
+        self._lock = threading.RLock()
+
+        # Caché de lectura de este proceso: nombre -> metadata con hash (sin
+        # texto), del uso más antiguo al más reciente
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.metricas_cache = {"aciertos": 0, "lecturas_disco": 0, "desalojos": 0}
+        self._data_version = self._leer_data_version()
+        self._ultimo_seq = self._conexion.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM archivos"
+        ).fetchone()[0]
+        self._suscriptores: List[Callable[[List[str]], None]] = []
+
+        # Transacción explícita en curso (ver transaccion()): nombres escritos
+        # y funciones a ejecutar al confirmar
+        self._transaccion: Optional[Dict[str, Any]] = None
+
+        # Grupo de escrituras abierto en modo "group" (ver _esperar_grupo())
+        self._grupo: Optional[Dict[str, Any]] = None
+        # Escrituras esperando el lock; el grupo no espera si no hay ninguna
+        self._pendientes = 0
+        self._lock_pendientes = threading.Lock()
+        self._confirmaciones_desde_checkpoint = 0
+        self.metricas_escritura = {"escrituras": 0, "confirmaciones": 0, "checkpoints": 0}
+
+        # Lo que quedó en el WAL de la ejecución anterior pasa a la base principal
+        self.compactar()
+
+    def _migrar_contenido_en_linea(self) -> None:
+        """
+        Convierte bases de datos que guardaban el texto en la columna
+        `archivos.contenido` al esquema con blobs direccionados por hash.
+        """
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(archivos)")}
+            if "contenido" not in columnas:
+                self._conexion.execute("ROLLBACK")
+                return
+            filas = self._conexion.execute(
+                "SELECT nombre, origen, metadata, contenido, seq FROM archivos"
+            ).fetchall()
+            self._conexion.execute("ALTER TABLE archivos RENAME TO archivos_en_linea")
+            self._conexion.execute(TABLA_ARCHIVOS)
+            for nombre, origen, metadata, contenido, seq in filas:
+                self._conexion.execute(
+                    "INSERT INTO archivos (nombre, origen, metadata, blob, seq, autor, tipo, fecha_orden) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (nombre, origen, metadata, self.blobs.referenciar(contenido), seq,
+                     *columnas_orden(json.loads(metadata)))
+                )
+            self._conexion.execute("DROP TABLE archivos_en_linea")
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+
+    def _migrar_columnas_orden(self) -> None:
+        """Agrega y rellena las columnas de orden en bases de datos creadas sin ellas."""
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(archivos)")}
+            if not columnas or "fecha_orden" in columnas:
+                self._conexion.execute("ROLLBACK")
+                return
+            for columna, tipo_sql in zip(COLUMNAS_ORDEN, ("TEXT", "TEXT", "INTEGER")):
+                self._conexion.execute(f"ALTER TABLE archivos ADD COLUMN {columna} {tipo_sql}")
+            filas = self._conexion.execute("SELECT nombre, metadata FROM archivos").fetchall()
+            self._conexion.executemany(
+                "UPDATE archivos SET autor = ?, tipo = ?, fecha_orden = ? WHERE nombre = ?",
+                [(*columnas_orden(json.loads(metadata)), nombre) for nombre, metadata in filas]
+            )
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+
+    def _inicializar_contadores(self) -> None:
+        """
+        Calcula la metadata derivada y los contadores de bases de datos creadas
+        antes de que existieran. Solo recorre los archivos esa primera vez.
+        """
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            hay_archivos = self._conexion.execute("SELECT 1 FROM archivos LIMIT 1").fetchone() is not None
+            if not hay_archivos or not self.contadores.vacio():
+                self._conexion.execute("ROLLBACK")
+                return
+            seq = self._conexion.execute("SELECT COALESCE(MAX(seq), 0) FROM archivos").fetchone()[0]
+            deltas: Dict[str, int] = self.blobs.contribucion_total()
+            filas = self._conexion.execute("SELECT nombre, origen, metadata, blob FROM archivos").fetchall()
+            for nombre, origen, metadata_json, hash_contenido in filas:
+                metadata = json.loads(metadata_json)
+                if self.derivar is not None:
+                    derivada = self.derivar(self.blobs.leer(hash_contenido, conservar=False))
+                    if any(metadata.get(campo) != valor for campo, valor in derivada.items()):
+                        metadata.update(derivada)
+                        seq += 1
+                        self._conexion.execute(
+                            "UPDATE archivos SET metadata = ?, seq = ? WHERE nombre = ?",
+                            (json.dumps(metadata, ensure_ascii=False), seq, nombre)
+                        )
+                for clave, valor in self._contribucion(origen, metadata).items():
+                    deltas[clave] = deltas.get(clave, 0) + valor
+            self.contadores.sumar(deltas)
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+
+    def _actualizar_derivada(self, version: int) -> None:
+        """
+        Recalcula la metadata derivada de todos los archivos (y sus contadores)
+        si la base se guardó con una versión anterior del cálculo. Solo
+        recorre los archivos una vez por versión.
+        """
+        if self.derivar is None:
+            return
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            fila = self._conexion.execute(
+                "SELECT valor FROM contadores WHERE clave = ?", (CLAVE_VERSION_DERIVADA,)
+            ).fetchone()
+            actual = fila[0] if fila is not None else 0
+            if actual >= version:
+                self._conexion.execute("ROLLBACK")
+                return
+            seq = self._conexion.execute("SELECT COALESCE(MAX(seq), 0) FROM archivos").fetchone()[0]
+            deltas: Dict[str, int] = {CLAVE_VERSION_DERIVADA: version - actual}
+            filas = self._conexion.execute("SELECT nombre, origen, metadata, blob FROM archivos").fetchall()
+            for nombre, origen, metadata_json, hash_contenido in filas:
+                metadata = json.loads(metadata_json)
+                derivada = self.derivar(self.blobs.leer(hash_contenido, conservar=False))
+                if all(metadata.get(campo) == valor for campo, valor in derivada.items()):
+                    continue
+                for clave, valor in self._contribucion(origen, metadata).items():
+                    deltas[clave] = deltas.get(clave, 0) - valor
+                metadata.update(derivada)
+                for clave, valor in self._contribucion(origen, metadata).items():
+                    deltas[clave] = deltas.get(clave, 0) + valor
+                seq += 1
+                self._conexion.execute(
+                    "UPDATE archivos SET metadata = ?, seq = ? WHERE nombre = ?",
+                    (json.dumps(metadata, ensure_ascii=False), seq, nombre)
+                )
+            self.contadores.sumar(deltas)
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+
+    def _inicializar_historial(self) -> None:
+        """Registra como versión 1 el contenido actual de los archivos que aún no tienen historial."""
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            filas = self._conexion.execute(
+                "SELECT nombre, metadata, blob FROM archivos "
+                "WHERE NOT EXISTS (SELECT 1 FROM versiones WHERE versiones.nombre = archivos.nombre)"
+            ).fetchall()
+            for nombre, metadata_json, hash_contenido in filas:
+                metadata = json.loads(metadata_json)
+                self.historial.registrar(
+                    nombre, self.blobs.leer(hash_contenido, conservar=False), hash_contenido,
+                    autor=metadata.get("autor"), fecha=metadata.get("fecha_modificacion")
+                )
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _contribucion(origen: str, metadata: Mapping[str, Any]) -> Dict[str, int]:
+        """Lo que aporta un archivo a los contadores por origen y por tipo."""
+        contribucion = {
+            f"archivos:{origen}": 1,
+            f"solo_lectura:{origen}": int(bool(metadata.get("solo_lectura", False))),
+            f"tipo:{metadata.get('tipo', 'texto')}": 1
+        }
+        for campo in CAMPOS_SUMADOS:
+            contribucion[f"{campo}:{origen}"] = int(metadata.get(campo, 0))
+        return contribucion
+
+    # ------------------------------------------------------------------
+    # Sincronización entre procesos
+    # ------------------------------------------------------------------
+
+    def _leer_data_version(self) -> int:
+        return self._conexion.execute("PRAGMA data_version").fetchone()[0]
+
+    def suscribir(self, callback: Callable[[List[str]], None]) -> None:
+        """
+        Registra una función que recibe los nombres modificados por otros procesos.
+
+        Args:
+            callback: Función llamada con la lista de nombres invalidados
+        """
+        self._suscriptores.append(callback)
+
+    def sincronizar(self) -> List[str]:
+        """
+        Invalida las entradas de caché que otro proceso modificó.
+
+        Returns:
+            List[str]: Nombres de archivos modificados externamente
+        """
+        with self._lock:
+            version = self._leer_data_version()
+            if version == self._data_version:
+                return []
+            self._data_version = version
+            self.contadores.invalidar()
+
+            filas = self._conexion.execute(
+                "SELECT nombre, seq FROM archivos WHERE seq > ? ORDER BY seq", (self._ultimo_seq,)
+            ).fetchall()
+            nombres = [nombre for nombre, _ in filas]
+            for nombre in nombres:
+                self._descartar(nombre)
+            if filas:
+                self._ultimo_seq = filas[-1][1]
+            if nombres and self._transaccion is not None:
+                # Dentro de una transacción el lock sigue tomado: se avisa al terminarla
+                self._transaccion["sincronizados"].extend(nombres)
+                return nombres
+
+        self._notificar(nombres)
+        return nombres
+
+    def _notificar(self, nombres: List[str]) -> None:
+        """Avisa a los suscriptores; nunca con el lock tomado, para que puedan usar sus propios locks."""
+        if nombres:
+            for callback in self._suscriptores:
+                callback(nombres)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _decodificar(origen: str, metadata: str, hash_contenido: str) -> Dict[str, Any]:
+        registro = json.loads(metadata)
+        for campo in CAMPOS_FECHA:
+            if campo in registro:
+                registro[campo] = tuple(registro[campo])
+        registro["origen"] = origen
+        registro["hash_contenido"] = hash_contenido
+        return registro
+
+    def _cachear(self, nombre: str, registro: Dict[str, Any], texto: Optional[str] = None) -> None:
+        """Guarda la metadata en caché y retiene su blob en memoria."""
+        self._descartar(nombre)
+        self._cache[nombre] = registro
+        self.blobs.retener(registro["hash_contenido"], texto)
+
+    def _descartar(self, nombre: str) -> None:
+        """Quita un archivo de la caché y suelta su blob."""
+        registro = self._cache.pop(nombre, None)
+        if registro is not None:
+            self.blobs.soltar(registro["hash_contenido"])
+
+    def _en_cache(self, nombre: str) -> Optional[Dict[str, Any]]:
+        """Metadata en caché, marcada como la usada más recientemente."""
+        registro = self._cache.get(nombre)
+        if registro is not None:
+            self._cache.move_to_end(nombre)
+            self.metricas_cache["aciertos"] += 1
+        return registro
+
+    def _ajustar_cache(self) -> None:
+        """Desaloja los archivos usados hace más tiempo hasta cumplir el presupuesto."""
+        if self.max_bytes_cache is None:
+            return
+        while self._cache and self.blobs.bytes_en_memoria > self.max_bytes_cache:
+            self._descartar(next(iter(self._cache)))
+            self.metricas_cache["desalojos"] += 1
+
+    def obtener(self, nombre: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un archivo por nombre, usando la caché del proceso.
+
+        Args:
+            nombre (str): Nombre del archivo
+
+        Returns:
+            Optional[Dict[str, Any]]: Copia del registro con su contenido o None si no existe
+        """
+        self.sincronizar()
+        with self._lock:
+            registro = self._en_cache(nombre)
+            if registro is None:
+                fila = self._conexion.execute(
+                    "SELECT origen, metadata, blob FROM archivos WHERE nombre = ?", (nombre,)
+                ).fetchone()
+                if fila is None:
+                    return None
+                registro = self._decodificar(*fila)
+                self._cachear(nombre, registro)
+                self.metricas_cache["lecturas_disco"] += 1
+            copia = dict(registro, contenido=self.blobs.leer(registro["hash_contenido"]))
+            self._ajustar_cache()
+            return copia
+
+    def obtener_metadata(self, nombre: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene la metadata de un archivo (incluido su hash) sin leer el contenido.
+
+        Args:
+            nombre (str): Nombre del archivo
+
+        Returns:
+            Optional[Dict[str, Any]]: Copia de la metadata o None si no existe
+        """
+        self.sincronizar()
+        with self._lock:
+            registro = self._en_cache(nombre)
+            if registro is None:
+                fila = self._conexion.execute(
+                    "SELECT origen, metadata, blob FROM archivos WHERE nombre = ?", (nombre,)
+                ).fetchone()
+                if fila is None:
+                    return None
+                registro = self._decodificar(*fila)
+                self._cachear(nombre, registro)
+                self.metricas_cache["lecturas_disco"] += 1
+            return dict(registro)
+
+    def existe(self, nombre: str) -> bool:
+        """Indica si existe un archivo con ese nombre."""
+        self.sincronizar()
+        with self._lock:
+            if nombre in self._cache:
+                return True
+            return self._conexion.execute(
+                "SELECT 1 FROM archivos WHERE nombre = ?", (nombre,)
+            ).fetchone() is not None
+
+    def contar(self, origen: Optional[str] = None) -> int:
+        """Cuenta los archivos, opcionalmente solo los de un origen (sin recorrerlos)."""
+        if origen is None:
+            return sum(self.totales("archivos").values())
+        return self.totales("archivos").get(origen, 0)
+
+    def totales(self, campo: str) -> Dict[str, int]:
+        """
+        Totales mantenidos en cada escritura, por origen o por tipo.
+
+        Args:
+            campo (str): "archivos", "solo_lectura", "tipo" o uno de CAMPOS_SUMADOS
+
+        Returns:
+            Dict[str, int]: Valor por origen (o por tipo si campo es "tipo")
+        """
+        self.sincronizar()
+        return self.contadores.con_prefijo(f"{campo}:")
+
+    def nombres(self, origen: Optional[str] = None, confirmados: bool = False) -> List[str]:
+        """
+        Nombres de archivos ordenados, opcionalmente solo los de un origen.
+
+        Args:
+            origen (Optional[str]): Filtrar por "predefinido" o "usuario"
+            confirmados (bool): Omitir los archivos que creó la transacción
+                explícita en curso y que aún no se confirmaron
+        """
+        with self._lock:
+            if origen is None:
+                filas = self._conexion.execute("SELECT nombre FROM archivos ORDER BY nombre")
+            else:
+                filas = self._conexion.execute(
+                    "SELECT nombre FROM archivos WHERE origen = ? ORDER BY nombre", (origen,)
+                )
+            creados = self._transaccion["creados"] if confirmados and self._transaccion is not None else ()
+            return [nombre for (nombre,) in filas.fetchall() if nombre not in creados]
+
+    def listar_metadata(self, origen: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Recorre la metadata de los archivos sin cargar su contenido.
+
+        Args:
+            origen (Optional[str]): Filtrar por "predefinido" o "usuario"
+
+        Returns:
+            Iterator[Tuple[str, Dict[str, Any]]]: Pares (nombre, metadata con origen)
+        """
+        with self._lock:
+            if origen is None:
+                filas = self._conexion.execute(
+                    "SELECT nombre, origen, metadata, blob FROM archivos ORDER BY origen, nombre"
+                ).fetchall()
+            else:
+                filas = self._conexion.execute(
+                    "SELECT nombre, origen, metadata, blob FROM archivos WHERE origen = ? ORDER BY nombre", (origen,)
+                ).fetchall()
+        for nombre, origen_fila, metadata, hash_contenido in filas:
+            yield nombre, self._decodificar(origen_fila, metadata, hash_contenido)
+
+    def pagina(self, orden: str = "origen", descendente: bool = False, limite: Optional[int] = None,
+               cursor: Optional[str] = None, autor: Optional[str] = None,
+               tipo: Optional[str] = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[str]]:
+        """
+        Página del listado de archivos ordenada por una columna indexada.
+        Con cursor, la consulta continúa justo después del último archivo de
+        la página anterior, así que el costo depende del tamaño de la página
+        y no de cuántos archivos haya antes. El cursor solo vale para la
+        misma consulta (orden, descendente, autor y tipo) que lo generó.
+
+        Args:
+            orden (str): "origen", "nombre", "fecha_modificacion" o "autor"
+            descendente (bool): Orden descendente
+            limite (Optional[int]): Tamaño de página (None para todos)
+            cursor (Optional[str]): Cursor devuelto por la página anterior
+            autor (Optional[str]): Filtrar por autor
+            tipo (Optional[str]): Filtrar por tipo
+
+        Returns:
+            Tuple: (pares (nombre, metadata con origen), cursor de la siguiente página o None)
+
+        Raises:
+            ValueError: Si el orden o el cursor no son válidos, o si el cursor
+                es de otra consulta
+        """
+        if orden not in ORDENES_LISTADO:
+            raise ValueError(f"Orden '{orden}' no válido; use {', '.join(ORDENES_LISTADO)}")
+        columna = ORDENES_LISTADO[orden]
+        consulta_cursor = [orden, bool(descendente), autor, tipo]
+        direccion, comparador = ("DESC", "<") if descendente else ("ASC", ">")
+
+        condiciones: List[str] = []
+        parametros: List[Any] = []
+        if autor is not None:
+            condiciones.append("autor = ?")
+            parametros.append(autor)
+        if tipo is not None:
+            condiciones.append("tipo = ?")
+            parametros.append(tipo)
+        if cursor is not None:
+            consulta_anterior, valor, nombre = decodificar_cursor(cursor)
+            if consulta_anterior != consulta_cursor:
+                raise ValueError(
+                    "El cursor es de otra consulta: repita orden, descendente, autor y tipo de la página anterior"
+                )
+            if columna == "nombre":
+                condiciones.append(f"nombre {comparador} ?")
+                parametros.append(nombre)
+            else:
+                condiciones.append(f"({columna}, nombre) {comparador} (?, ?)")
+                parametros.extend((valor, nombre))
+
+        consulta = f"SELECT nombre, origen, metadata, blob, {columna} FROM archivos"
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        consulta += f" ORDER BY {columna} {direccion}"
+        if columna != "nombre":
+            consulta += f", nombre {direccion}"
+        if limite is not None:
+            consulta += " LIMIT ?"
+            parametros.append(limite + 1)
+
+        self.sincronizar()
+        with self._lock:
+            filas = self._conexion.execute(consulta, parametros).fetchall()
+
+        siguiente = None
+        if limite is not None and len(filas) > limite:
+            filas = filas[:limite]
+            siguiente = codificar_cursor(consulta_cursor, filas[-1][4], filas[-1][0])
+        return [
+            (nombre, self._decodificar(origen, metadata, hash_contenido))
+            for nombre, origen, metadata, hash_contenido, _ in filas
+        ], siguiente
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _preparar(self, origen: str, registro: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calcula lo que una escritura necesita y no depende del estado del
+        almacén: hash, metadata derivada, su JSON y los deltas de contadores.
+        Se llama antes de tomar el lock, así el trabajo de CPU proporcional
+        al contenido no alarga la sección crítica que comparten los escritores.
+        """
+        contenido = registro["contenido"]
+        metadata = {k: v for k, v in registro.items() if k not in ("contenido", "origen", "hash_contenido")}
+        if self.derivar is not None:
+            metadata.update(self.derivar(contenido))
+        return {
+            "contenido": contenido,
+            "hash_contenido": calcular_hash(contenido),
+            "metadata": metadata,
+            "metadata_json": json.dumps(metadata, ensure_ascii=False),
+            "deltas": self._contribucion(origen, metadata)
+        }
+
+    def _escribir(self, nombre: str, origen: str, preparado: Dict[str, Any],
+                  reemplazar: bool, autor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Escribe un archivo, su blob y (si cambió el contenido) una nueva
+        versión en una sola transacción. Debe llamarse con el lock tomado.
+
+        Args:
+            preparado: Resultado de _preparar para el registro a escribir
+
+        Returns:
+            Optional[Dict[str, Any]]: Metadata guardada, o None si el archivo
+            ya existía y no se pidió reemplazarlo
+        """
+        contenido = preparado["contenido"]
+        hash_contenido = preparado["hash_contenido"]
+        metadata = preparado["metadata"]
+        deltas = preparado["deltas"]
+
+        self._iniciar_escritura()
+        try:
+            fila = self._conexion.execute(
+                "SELECT origen, metadata, blob FROM archivos WHERE nombre = ?", (nombre,)
+            ).fetchone()
+            if fila is not None and not reemplazar:
+                self._revertir_escritura()
+                return None
+            anterior = None
+            if fila is not None:
+                origen_anterior, metadata_anterior, anterior = fila
+                for clave, valor in self._contribucion(origen_anterior, json.loads(metadata_anterior)).items():
+                    deltas[clave] = deltas.get(clave, 0) - valor
+            if anterior != hash_contenido:
+                self.historial.registrar(
+                    nombre, contenido, hash_contenido,
+                    anterior=self.blobs.leer(anterior, conservar=False) if anterior is not None else None,
+                    autor=autor or metadata.get("autor"), fecha=metadata.get("fecha_modificacion")
+                )
+                self.blobs.referenciar(contenido, hash_contenido)
+                if anterior is not None:
+                    self.blobs.liberar(anterior)
+            seq = self._conexion.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM archivos").fetchone()[0]
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO archivos (nombre, origen, metadata, blob, seq, autor, tipo, fecha_orden) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (nombre, origen, preparado["metadata_json"], hash_contenido, seq, *columnas_orden(metadata))
+            )
+            self.contadores.sumar(deltas)
+            self._confirmar_escritura()
+        except BaseException:
+            self._revertir_escritura()
+            raise
+
+        metadata["origen"] = origen
+        metadata["hash_contenido"] = hash_contenido
+        self._cachear(nombre, metadata, contenido)
+        self._ajustar_cache()
+        self.metricas_escritura["escrituras"] += 1
+        if self._transaccion is not None:
+            self._transaccion["nombres"].add(nombre)
+            if fila is None:
+                self._transaccion["creados"].add(nombre)
+        elif self._grupo is not None:
+            self._grupo["nombres"].add(nombre)
+            if len(self._grupo["nombres"]) >= self.max_escrituras_grupo:
+                self._grupo["lleno"].set()
+        return metadata
+
+    def _iniciar_escritura(self) -> None:
+        """
+        Abre una transacción, o un savepoint si hay una transacción explícita
+        en curso o si la escritura se suma a un grupo (modo "group").
+        """
+        if self._transaccion is None and self.durabilidad == DURABILIDAD_GRUPO and self._grupo is None:
+            self._conexion.execute("BEGIN IMMEDIATE")
+            self._grupo = {
+                "lider": threading.get_ident(), "nombres": set(),
+                "lleno": threading.Event(), "confirmado": threading.Event(), "error": None
+            }
+        if self._transaccion is None and self._grupo is None:
+            self._conexion.execute("BEGIN IMMEDIATE")
+        else:
+            self._conexion.execute("SAVEPOINT escritura")
+
+    def _confirmar_escritura(self) -> None:
+        if self._transaccion is None and self._grupo is None:
+            self._conexion.execute("COMMIT")
+            self._despues_de_confirmar()
+        else:
+            self._conexion.execute("RELEASE escritura")
+
+    def _revertir_escritura(self) -> None:
+        if self._transaccion is None and self._grupo is None:
+            self._conexion.execute("ROLLBACK")
+        else:
+            self._conexion.execute("ROLLBACK TO escritura")
+            self._conexion.execute("RELEASE escritura")
+
+    def _escribir_confirmado(self, nombre: str, origen: str, registro: Dict[str, Any],
+                             reemplazar: bool, autor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Escribe un archivo y vuelve cuando la escritura está confirmada en
+        disco. En modo "group" se suma al grupo abierto y espera su fsync.
+        """
+        self.sincronizar()
+        preparado = self._preparar(origen, registro)
+        error: Optional[BaseException] = None
+        with self._lock_pendientes:
+            self._pendientes += 1
+        with self._lock:
+            try:
+                metadata = self._escribir(nombre, origen, preparado, reemplazar, autor)
+            except BaseException as e:
+                error = e
+            with self._lock_pendientes:
+                self._pendientes -= 1
+                sin_pendientes = self._pendientes == 0
+            grupo = self._grupo
+            if grupo is not None and sin_pendientes:
+                grupo["lleno"].set()
+        # Quien abrió el grupo debe confirmarlo aunque su propia escritura fallara
+        if grupo is not None and (error is None or grupo["lider"] == threading.get_ident()):
+            self._esperar_grupo(grupo)
+        if error is not None:
+            raise error
+        return metadata
+
+    def _esperar_grupo(self, grupo: Dict[str, Any]) -> None:
+        """
+        Espera a que se confirme el grupo. El hilo que lo abrió espera a que
+        se sumen las escrituras que estaban en cola (como mucho la ventana,
+        o hasta que el grupo se llene) y lo confirma con un solo COMMIT; los
+        demás esperan ese COMMIT. Una escritura sin competencia se confirma
+        sin esperar.
+
+        Raises:
+            Exception: El error del COMMIT, si falló
+        """
+        if grupo["lider"] == threading.get_ident():
+            grupo["lleno"].wait(self.ventana_grupo)
+            with self._lock:
+                self._confirmar_grupo(grupo)
+        else:
+            grupo["confirmado"].wait()
+        if grupo["error"] is not None:
+            raise grupo["error"]
+
+    def _confirmar_grupo(self, grupo: Dict[str, Any]) -> None:
+        """Confirma el grupo si sigue abierto. Debe llamarse con el lock tomado."""
+        if self._grupo is not grupo:
+            return
+        self._grupo = None
+        try:
+            self._conexion.execute("COMMIT")
+        except BaseException as e:
+            self._conexion.execute("ROLLBACK")
+            # La caché tenía los valores no confirmados
+            for nombre in grupo["nombres"]:
+                self._descartar(nombre)
+            self.contadores.invalidar()
+            grupo["error"] = e
+        else:
+            self._despues_de_confirmar()
+        finally:
+            grupo["confirmado"].set()
+
+    def _despues_de_confirmar(self) -> None:
+        """Cuenta la confirmación y compacta el WAL cada cierto número de ellas."""
+        # La copia de los contadores pudo cargarse antes del COMMIT
+        self.contadores.invalidar()
+        self.metricas_escritura["confirmaciones"] += 1
+        self._confirmaciones_desde_checkpoint += 1
+        if self._confirmaciones_desde_checkpoint >= self.confirmaciones_por_checkpoint:
+            self.compactar()
+
+    def compactar(self) -> bool:
+        """
+        Copia al archivo principal las transacciones del WAL y lo trunca.
+        Si hay lectores de otros procesos en curso se compacta lo posible y
+        el resto queda para el siguiente checkpoint.
+
+        Returns:
+            bool: True si el WAL quedó vacío
+        """
+        with self._lock:
+            if self._grupo is not None:
+                self._confirmar_grupo(self._grupo)
+            if self._transaccion is not None:
+                return False
+            ocupado = self._conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+            self._confirmaciones_desde_checkpoint = 0
+            self.metricas_escritura["checkpoints"] += 1
+            return not ocupado
+
+    def estadisticas_escritura(self) -> Dict[str, Any]:
+        """
+        Durabilidad y contadores de escritura de este proceso.
+
+        Returns:
+            Dict[str, Any]: Escrituras, confirmaciones (fsync del WAL salvo en
+            "deferred"), escrituras por confirmación y checkpoints
+        """
+        with self._lock:
+            metricas = dict(self.metricas_escritura)
+        confirmaciones = metricas["confirmaciones"]
+        return {
+            "durabilidad": self.durabilidad,
+            **metricas,
+            "escrituras_por_confirmacion": round(metricas["escrituras"] / confirmaciones, 2) if confirmaciones else 0.0
+        }
+
+    def estadisticas_memoria(self) -> Dict[str, Any]:
+        """
+        Archivos y bytes residentes en la caché de este proceso frente a los
+        que solo están en disco.
+
+        Returns:
+            Dict[str, Any]: Presupuesto, archivos y bytes residentes y en
+            disco, aciertos, lecturas de disco y desalojos de la caché
+        """
+        total_archivos = self.contar()
+        bytes_logicos = self.contadores.leer().get("blobs:bytes_logicos", 0)
+        with self._lock:
+            residentes = len(self._cache)
+            return {
+                "presupuesto_bytes": self.max_bytes_cache,
+                "archivos_residentes": residentes,
+                "archivos_en_disco": max(0, total_archivos - residentes),
+                "bytes_residentes": self.blobs.bytes_en_memoria,
+                "bytes_en_disco": max(0, bytes_logicos - self.blobs.bytes_logicos_en_memoria),
+                **self.metricas_cache
+            }
+
+    @contextmanager
+    def transaccion(self) -> Iterator[None]:
+        """
+        Agrupa varias escrituras en una sola transacción: o se confirman todas
+        o no se aplica ninguna. Mientras dura, las lecturas de este proceso
+        ven las escrituras pendientes y los demás procesos no ven ninguna.
+
+        Uso:
+            with almacen.transaccion():
+                almacen.guardar(...)
+                almacen.insertar(...)
+        """
+        transaccion: Dict[str, Any] = {
+            "nombres": set(), "creados": set(), "al_confirmar": [], "sincronizados": [],
+            "hilo": threading.get_ident()
+        }
+        try:
+            with self._lock:
+                if self._transaccion is not None:
+                    raise RuntimeError("Ya hay una transacción en curso")
+                if self._grupo is not None:
+                    self._confirmar_grupo(self._grupo)
+                self._transaccion = transaccion
+                try:
+                    self.sincronizar()
+                    self._conexion.execute("BEGIN IMMEDIATE")
+                    try:
+                        yield
+                        self._conexion.execute("COMMIT")
+                        self._despues_de_confirmar()
+                    except BaseException:
+                        self._conexion.execute("ROLLBACK")
+                        # La caché tenía los valores no confirmados
+                        for nombre in transaccion["nombres"]:
+                            self._descartar(nombre)
+                        self.contadores.invalidar()
+                        raise
+                finally:
+                    self._transaccion = None
+        finally:
+            # Cambios de otros procesos vistos durante la transacción, ya sin el lock
+            self._notificar(transaccion["sincronizados"])
+
+        for callback in transaccion["al_confirmar"]:
+            callback()
+
+    def al_confirmar(self, callback: Callable[[], None]) -> None:
+        """
+        Ejecuta una función cuando se confirmen las escrituras actuales:
+        de inmediato, o al final de la transacción explícita en curso si la
+        abrió este hilo. Si la transacción se revierte no se ejecuta.
+        """
+        transaccion = self._transaccion
+        if transaccion is None or transaccion["hilo"] != threading.get_ident():
+            callback()
+        else:
+            transaccion["al_confirmar"].append(callback)
+
+    def insertar(self, nombre: str, origen: str, registro: Dict[str, Any]) -> bool:
+        """
+        Inserta un archivo nuevo de forma atómica entre procesos.
+
+        Args:
+            nombre (str): Nombre del archivo
+            origen (str): "predefinido" o "usuario"
+            registro (Dict[str, Any]): Contenido y metadata
+
+        Returns:
+            bool: False si ya existía un archivo con ese nombre
+        """
+        return self._escribir_confirmado(nombre, origen, registro, reemplazar=False) is not None
+
+    def guardar(self, nombre: str, origen: str, registro: Dict[str, Any], autor: Optional[str] = None) -> str:
+        """
+        Guarda (inserta o reemplaza) un archivo y actualiza la caché.
+
+        Args:
+            nombre (str): Nombre del archivo
+            origen (str): "predefinido" o "usuario"
+            registro (Dict[str, Any]): Contenido y metadata
+            autor (Optional[str]): Usuario que hace el cambio (para el historial)
+
+        Returns:
+            str: Hash del contenido guardado
+        """
+        return self._escribir_confirmado(nombre, origen, registro, reemplazar=True, autor=autor)["hash_contenido"]
+
+    def sembrar(self, archivos: Mapping[str, Dict[str, Any]], origen: str) -> int:
+        """
+        Inserta los archivos que aún no existan (p. ej. los predefinidos al iniciar).
+
+        Returns:
+            int: Número de archivos insertados
+        """
+        return sum(1 for nombre, registro in archivos.items() if self.insertar(nombre, origen, registro))
+
+    # ------------------------------------------------------------------
+    # Historial de versiones
+    # ------------------------------------------------------------------
+
+    def versiones(self, nombre: str) -> List[Dict[str, Any]]:
+        """Versiones registradas de un archivo (ver HistorialVersiones.listar)."""
+        with self._lock:
+            return self.historial.listar(nombre)
+
+    def leer_version(self, nombre: str, version: int) -> str:
+        """
+        Contenido de una versión de un archivo.
+
+        Raises:
+            KeyError: Si la versión no existe
+        """
+        with self._lock:
+            return self.historial.reconstruir(nombre, version)
+
+    def diferencias(self, nombre: str, desde: int, hasta: int) -> List[str]:
+        """
+        Diff unificado entre dos versiones de un archivo.
+
+        Raises:
+            KeyError: Si alguna de las versiones no existe
+        """
+        with self._lock:
+            return self.historial.diferencias(nombre, desde, hasta)
+
+    def cerrar(self) -> None:
+        """Confirma el grupo pendiente, compacta el WAL y cierra las conexiones."""
+        with self._lock:
+            self.compactar()
+            self._conexion_lectura.close()
+            self._conexion.close()
+
+
+class VistaArchivos(Mapping):
+    """
+    Vista de solo lectura de los archivos de un origen del almacén.
+    Mantiene la interfaz de diccionario de `archivos_predefinidos` y `archivos_usuarios`.
+    """
+
+    def __init__(self, almacen: FileStore, origen: str):
+        self._almacen = almacen
+        self._origen = origen
+
+    def __getitem__(self, nombre: str) -> Dict[str, Any]:
+        registro = self._almacen.obtener(nombre)
+        if registro is None or registro["origen"] != self._origen:
+            raise KeyError(nombre)
+        return registro
+
+    def __contains__(self, nombre: object) -> bool:
+        return isinstance(nombre, str) and self.get(nombre) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._almacen.nombres(self._origen))
+
+    def __len__(self) -> int:
+        return self._almacen.contar(self._origen)
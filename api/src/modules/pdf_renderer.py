@@ -0,0 +1,378 @@
+"""
+Renderizado de Reportes a PDF
+=============================
+
+Convierte el Markdown de los reportes en un PDF usando solo la biblioteca
+estándar: maqueta el texto en páginas A4 con las fuentes estándar de PDF
+(Helvetica, Helvetica-Bold y Courier, que todo visor trae y no hace falta
+incrustar) y escribe el archivo a mano, con los flujos de contenido
+comprimidos con zlib.
+
+Cubre lo que usan los reportes: títulos, párrafos, listas, tablas, bloques
+de código y separadores. El texto se codifica en WinAnsiEncoding; los
+caracteres que esa codificación no tiene (emojis, flechas, líneas de
+árbol) se sustituyen por equivalentes ASCII o se omiten.
+
+La maquetación es trabajo de CPU: `renderizar_archivo` está pensada para
+ejecutarse en un pool de procesos (ver ReportGenerator.solicitar_pdf).
+"""
+
+import functools
+import os
+import re
+import time
+import unicodedata
+import zlib
+from typing import Any, Dict, List, Tuple
+
+# Página A4 en puntos y márgenes
+ANCHO_PAGINA = 595.28
+ALTO_PAGINA = 841.89
+MARGEN = 56.0
+
+# Fuentes estándar: nombre del recurso en la página -> fuente base
+FUENTES = {"F1": "Helvetica", "F2": "Helvetica-Bold", "F3": "Courier"}
+
+# Estilos de bloque: (fuente, tamaño, espacio antes)
+ESTILOS = {
+    "h1": ("F2", 18.0, 10.0),
+    "h2": ("F2", 14.0, 12.0),
+    "h3": ("F2", 12.0, 8.0),
+    "h4": ("F2", 11.0, 6.0),
+    "texto": ("F1", 10.0, 0.0),
+    "tabla": ("F1", 9.0, 0.0),
+    "codigo": ("F3", 8.5, 0.0),
+}
+INTERLINEADO = 1.35
+TAMAÑO_PIE = 8.0
+
+# Anchos de los caracteres 32-126 en milésimas del tamaño de fuente
+_ANCHOS_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_ANCHOS_HELVETICA_NEGRITA = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+_ANCHOS = {"F1": _ANCHOS_HELVETICA, "F2": _ANCHOS_HELVETICA_NEGRITA}
+ANCHO_COURIER = 600
+
+# Caracteres fuera de Latin-1 que WinAnsiEncoding sí tiene
+_WINANSI_EXTRA = {
+    "€": 0x80, "…": 0x85, "‘": 0x91, "’": 0x92, "“": 0x93, "”": 0x94,
+    "•": 0x95, "–": 0x96, "—": 0x97, "™": 0x99,
+}
+
+# Sustitutos para caracteres que las fuentes estándar no tienen
+_SUSTITUTOS = {
+    "→": "->", "←": "<-", "✅": "[OK]", "❌": "[X]", "✓": "[OK]",
+    "├": "|", "└": "`", "│": "|", "─": "-",
+}
+
+_PATRON_NUMERADA = re.compile(r"(\d+\.)\s+(.*)")
+_PATRON_SEPARADOR_TABLA = re.compile(r"\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?")
+_PATRON_MARCAS = re.compile(r"\*\*|`")
+
+
+@functools.lru_cache(maxsize=1024)
+def _codificar_caracter(caracter: str) -> bytes:
+    """Bytes WinAnsi de un carácter, su sustituto o nada si no tiene representación."""
+    codigo = ord(caracter)
+    if codigo < 0x80 or 0xA0 <= codigo <= 0xFF:
+        return bytes((codigo,))
+    if caracter in _WINANSI_EXTRA:
+        return bytes((_WINANSI_EXTRA[caracter],))
+    if caracter in _SUSTITUTOS:
+        return _SUSTITUTOS[caracter].encode("latin-1")
+    # Emojis, selectores de variación y demás símbolos se omiten
+    if unicodedata.category(caracter) in ("So", "Sk", "Mn", "Cf", "Co", "Cs"):
+        return b""
+    plegado = unicodedata.normalize("NFKD", caracter).encode("latin-1", "ignore")
+    return plegado or b"?"
+
+
+def codificar(texto: str) -> bytes:
+    """Texto en WinAnsiEncoding, listo para un string de PDF."""
+    return b"".join(_codificar_caracter(caracter) for caracter in texto)
+
+
+def ancho_texto(datos: bytes, fuente: str, tamaño: float) -> float:
+    """Ancho en puntos de un texto ya codificado."""
+    if fuente == "F3":
+        return len(datos) * ANCHO_COURIER * tamaño / 1000
+    anchos = _ANCHOS[fuente]
+    total = 0
+    for byte in datos:
+        if 32 <= byte <= 126:
+            total += anchos[byte - 32]
+        elif byte >= 0xC0:
+            # Letras acentuadas: el ancho de su letra base
+            base = unicodedata.normalize("NFKD", bytes((byte,)).decode("latin-1"))[0]
+            total += anchos[ord(base) - 32] if 32 <= ord(base) <= 126 else 556
+        else:
+            total += 556
+    return total * tamaño / 1000
+
+
+def _partir(datos: bytes, fuente: str, tamaño: float, ancho: float) -> List[bytes]:
+    """Parte un texto codificado en líneas que caben en ancho, por palabras."""
+    if ancho_texto(datos, fuente, tamaño) <= ancho:
+        return [datos]
+    lineas = []
+    actual = b""
+    for palabra in datos.split(b" "):
+        candidata = actual + b" " + palabra if actual else palabra
+        if ancho_texto(candidata, fuente, tamaño) <= ancho:
+            actual = candidata
+            continue
+        if actual:
+            lineas.append(actual)
+        # Una palabra más ancha que la línea se corta por caracteres
+        while ancho_texto(palabra, fuente, tamaño) > ancho and len(palabra) > 1:
+            corte = len(palabra) - 1
+            while corte > 1 and ancho_texto(palabra[:corte], fuente, tamaño) > ancho:
+                corte -= 1
+            lineas.append(palabra[:corte])
+            palabra = palabra[corte:]
+        actual = palabra
+    if actual:
+        lineas.append(actual)
+    return lineas
+
+
+def _bloques_markdown(markdown: str) -> List[Tuple[str, str, float]]:
+    """
+    Interpreta el Markdown línea a línea.
+
+    Returns:
+        List[Tuple[str, str, float]]: (estilo, texto, sangría en puntos); los
+        estilos "regla" y "espacio" no llevan texto
+    """
+    bloques = []
+    en_codigo = False
+    fila_tabla = 0
+    for linea in markdown.splitlines():
+        if linea.lstrip().startswith("```"):
+            en_codigo = not en_codigo
+            bloques.append(("espacio", "", 0.0))
+            continue
+        if en_codigo:
+            bloques.append(("codigo", linea.rstrip(), 12.0))
+            continue
+
+        limpia = linea.strip()
+        if not limpia.startswith("|"):
+            fila_tabla = 0
+        if not limpia:
+            bloques.append(("espacio", "", 0.0))
+        elif limpia in ("---", "***", "___"):
+            bloques.append(("regla", "", 0.0))
+        elif limpia.startswith("#"):
+            nivel = min(len(limpia) - len(limpia.lstrip("#")), 4)
+            bloques.append((f"h{nivel}", _PATRON_MARCAS.sub("", limpia.lstrip("#")).strip(), 0.0))
+        elif limpia.startswith("|"):
+            if _PATRON_SEPARADOR_TABLA.fullmatch(limpia):
+                continue
+            celdas = [_PATRON_MARCAS.sub("", celda).strip() for celda in limpia.strip("|").split("|")]
+            # La primera fila de la tabla es la cabecera
+            bloques.append(("h4" if fila_tabla == 0 else "tabla", "  |  ".join(celdas), 0.0))
+            fila_tabla += 1
+        else:
+            sangria = (len(linea) - len(linea.lstrip())) * 4.0
+            texto = _PATRON_MARCAS.sub("", limpia)
+            if texto[:2] in ("- ", "* "):
+                texto = "• " + texto[2:]
+                sangria += 10.0
+            elif _PATRON_NUMERADA.fullmatch(texto):
+                sangria += 10.0
+            bloques.append(("texto", texto, sangria))
+    return bloques
+
+
+def maquetar(markdown: str) -> List[List[Tuple[str, Any]]]:
+    """
+    Distribuye el Markdown en páginas.
+
+    Args:
+        markdown: Contenido del reporte
+
+    Returns:
+        List: Por página, operaciones ("texto", (fuente, tamaño, x, y, datos))
+        o ("regla", y)
+    """
+    ancho_util = ANCHO_PAGINA - 2 * MARGEN
+    limite_inferior = MARGEN + TAMAÑO_PIE * 2
+    paginas: List[List[Tuple[str, Any]]] = [[]]
+    y = ALTO_PAGINA - MARGEN
+
+    def reservar(alto: float) -> float:
+        nonlocal y
+        if y - alto < limite_inferior and paginas[-1]:
+            paginas.append([])
+            y = ALTO_PAGINA - MARGEN
+        y -= alto
+        return y
+
+    for estilo, texto, sangria in _bloques_markdown(markdown):
+        if estilo == "espacio":
+            if paginas[-1]:
+                y -= ESTILOS["texto"][1] * 0.6
+            continue
+        if estilo == "regla":
+            paginas[-1].append(("regla", reservar(12.0) + 6.0))
+            continue
+
+        fuente, tamaño, espacio_antes = ESTILOS[estilo]
+        if espacio_antes and paginas[-1]:
+            y -= espacio_antes
+        datos = codificar(texto)
+        if estilo == "codigo":
+            caracteres = max(1, int((ancho_util - sangria) * 1000 / (ANCHO_COURIER * tamaño)))
+            lineas = [datos[i:i + caracteres] for i in range(0, len(datos), caracteres)] or [b""]
+        else:
+            # Sin el emoji que lo encabezaba, un título no debe empezar con espacio
+            lineas = _partir(datos.strip(), fuente, tamaño, ancho_util - sangria)
+        for numero, linea in enumerate(lineas):
+            # Las líneas de continuación de una lista quedan alineadas con su texto
+            x = MARGEN + sangria + (10.0 if numero and texto.startswith("• ") else 0.0)
+            paginas[-1].append(("texto", (fuente, tamaño, x, reservar(tamaño * INTERLINEADO), linea)))
+    return paginas
+
+
+def _escapar(datos: bytes) -> bytes:
+    """Escapa un texto para un string literal de PDF."""
+    return datos.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"")
+
+
+def _contenido_pagina(operaciones: List[Tuple[str, Any]], numero: int, total: int, titulo: bytes) -> bytes:
+    """Flujo de contenido de una página, con su pie."""
+    partes = []
+    for tipo, valor in operaciones:
+        if tipo == "regla":
+            partes.append(b"0.7 G 0.5 w %.2f %.2f m %.2f %.2f l S" % (MARGEN, valor, ANCHO_PAGINA - MARGEN, valor))
+        else:
+            fuente, tamaño, x, y, datos = valor
+            partes.append(b"BT /%s %.1f Tf %.2f %.2f Td (%s) Tj ET" % (
+                fuente.encode("ascii"), tamaño, x, y, _escapar(datos)
+            ))
+
+    pie = codificar(f"Página {numero} de {total}")
+    y_pie = MARGEN - TAMAÑO_PIE
+    partes.append(b"0.4 g")
+    partes.append(b"BT /F1 %.1f Tf %.2f %.2f Td (%s) Tj ET" % (TAMAÑO_PIE, MARGEN, y_pie, _escapar(titulo)))
+    partes.append(b"BT /F1 %.1f Tf %.2f %.2f Td (%s) Tj ET" % (
+        TAMAÑO_PIE, ANCHO_PAGINA - MARGEN - ancho_texto(pie, "F1", TAMAÑO_PIE), y_pie, _escapar(pie)
+    ))
+    return b"\n".join(partes)
+
+
+def escribir_pdf(paginas: List[List[Tuple[str, Any]]], titulo: str = "") -> bytes:
+    """
+    Escribe las páginas maquetadas como un documento PDF 1.4.
+
+    Args:
+        paginas: Resultado de maquetar
+        titulo: Título del documento (metadatos y pie de página)
+
+    Returns:
+        bytes: Documento PDF
+    """
+    titulo_codificado = codificar(titulo)
+    objetos: List[bytes] = []
+
+    def agregar(cuerpo: bytes) -> int:
+        objetos.append(cuerpo)
+        return len(objetos)
+
+    catalogo = agregar(b"")
+    arbol_paginas = agregar(b"")
+    recursos = b"<< /Font << " + b" ".join(
+        b"/%s %d 0 R" % (nombre.encode("ascii"), agregar(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base.encode("ascii")
+        ))
+        for nombre, base in FUENTES.items()
+    ) + b" >> >>"
+    info = agregar(b"<< /Title (%s) /Producer (Sistema Avanzado de Gestion de Archivos) >>" % _escapar(titulo_codificado))
+
+    hijos = []
+    for numero, operaciones in enumerate(paginas, start=1):
+        flujo = zlib.compress(_contenido_pagina(operaciones, numero, len(paginas), titulo_codificado))
+        contenido = agregar(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(flujo), flujo))
+        hijos.append(agregar(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources %s /Contents %d 0 R >>"
+            % (arbol_paginas, ANCHO_PAGINA, ALTO_PAGINA, recursos, contenido)
+        ))
+    objetos[catalogo - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % arbol_paginas
+    objetos[arbol_paginas - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % hijo for hijo in hijos), len(hijos)
+    )
+
+    salida = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    posiciones = []
+    for numero, cuerpo in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += b"%d 0 obj\n%s\nendobj\n" % (numero, cuerpo)
+    inicio_xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    salida += b"".join(b"%010d 00000 n \n" % posicion for posicion in posiciones)
+    salida += b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objetos) + 1, catalogo, info, inicio_xref
+    )
+    return bytes(salida)
+
+
+def renderizar_pdf(markdown: str, titulo: str = "") -> bytes:
+    """
+    Convierte Markdown en un documento PDF.
+
+    Args:
+        markdown: Contenido a renderizar
+        titulo: Título del documento
+
+    Returns:
+        bytes: Documento PDF
+    """
+    return escribir_pdf(maquetar(markdown), titulo)
+
+
+def renderizar_archivo(origen: str, destino: str) -> Dict[str, Any]:
+    """
+    Renderiza un reporte Markdown del disco a un PDF del disco.
+
+    Se ejecuta en un proceso del pool: recibe y devuelve solo rutas y datos
+    pequeños, y escribe en un temporal que luego reemplaza al destino para
+    que una descarga nunca vea un PDF a medio escribir.
+
+    Args:
+        origen: Ruta del reporte Markdown
+        destino: Ruta del PDF a escribir
+
+    Returns:
+        Dict[str, Any]: Páginas, tamaño en bytes y duración en milisegundos
+    """
+    inicio = time.perf_counter()
+    with open(origen, encoding="utf-8") as archivo:
+        markdown = archivo.read()
+
+    paginas = maquetar(markdown)
+    documento = escribir_pdf(paginas, os.path.splitext(os.path.basename(origen))[0])
+
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(documento)
+    os.replace(temporal, destino)
+
+    return {
+        "paginas": len(paginas),
+        "tamaño_bytes": len(documento),
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 2),
+    }
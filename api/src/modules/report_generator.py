@@ -4,7 +4,7 @@ Módulo de Generación de Reportes - Sistema Avanzado
 
 Este módulo implementa la generación automática de reportes en formato:
 - Markdown (.md) con toda la documentación del proyecto
-- PDF generado a partir del Markdown
+- PDF generado a partir del Markdown en un pool de procesos (ver pdf_renderer)
 - Incluye código, resultados, evidencias y observaciones
 
 Funcionalidades:
@@ -16,58 +16,28 @@ Funcionalidades:
 
 import os
 import json
+import hashlib
+import functools
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 import base64
 
+from ..core.config import settings
+from .pdf_renderer import renderizar_archivo
 
-class ReportGenerator:
-    """
-    Generador de reportes en Markdown y PDF.
-    Incluye toda la información del proyecto y evidencias de ejecución.
-    """
-    
-    def __init__(self):
-        """
-        Inicializa el generador de reportes.
-        """
-        self.directorio_reportes = Path("resumen_manager")
-        self.fecha_generacion = datetime.now()
-        self._crear_directorio_reportes()
-    
-    def _crear_directorio_reportes(self) -> None:
-        """
-        Crea el directorio para almacenar reportes si no existe.
-        """
-        try:
-            self.directorio_reportes.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            print(f"Error al crear directorio de reportes: {e}")
-            # Fallback
-            self.directorio_reportes = Path("/tmp/reportes")
-            self.directorio_reportes.mkdir(exist_ok=True)
-    
-    def generar_reporte_markdown(self, datos_sistema: Dict[str, Any]) -> str:
-        """
-        Genera el reporte completo en formato Markdown.
-        
-        Args:
-            datos_sistema: Diccionario con toda la información del sistema
-            
-        Returns:
-            str: Contenido del reporte en Markdown
-        """
-        fecha_str = self.fecha_generacion.strftime("%d/%m/%Y %H:%M:%S")
-        
-        markdown_content = f"""# Reporte Final - Sistema Avanzado de Gestión de Archivos
 
-**Proyecto:** Programa en Python (FastAPI) y Vite (Bulma)  
-**Fecha de generación:** {fecha_str}  
-**Autor:** Sistema Avanzado de Programación  
-**Versión:** 1.0.0
+# Secciones del reporte en el orden en que se componen
+SECCIONES_REPORTE = (
+    "encabezado", "resumen", "estadisticas", "usuarios", "archivos", "operaciones", "documentacion", "pie"
+)
 
----
+# Texto fijo entre las secciones con datos: se escribe una sola vez aquí y
+# cada reporte lo reutiliza tal cual
+_TEXTO_RESUMEN = """---
 
 ## 📋 Resumen Ejecutivo
 
@@ -207,26 +177,9 @@ except Exception as e:
 
 ---
 
-## 📊 Resultados de Ejecución
-
-### Estadísticas del Sistema
-
-{self._generar_estadisticas_sistema(datos_sistema)}
-
-### Evidencias de Funcionalidad
-
-#### ✅ Usuarios Registrados
-{self._generar_evidencia_usuarios(datos_sistema)}
-
-#### ✅ Archivos Gestionados  
-{self._generar_evidencia_archivos(datos_sistema)}
-
-#### ✅ Operaciones Realizadas
-{self._generar_evidencia_operaciones(datos_sistema)}
-
----
+"""
 
-## 💻 Fragmentos de Código Relevantes
+_TEXTO_DOCUMENTACION = """## 💻 Fragmentos de Código Relevantes
 
 ### Módulo de Usuarios (user_manager.py)
 ```python
@@ -411,73 +364,264 @@ npm run dev
 
 ---
 
-**Reporte generado automáticamente por el Sistema Avanzado de Gestión de Archivos**  
-**Fecha:** {fecha_str}  
-**Versión del sistema:** 1.0.0
 """
+
+SECCIONES_ESTATICAS = {"resumen": _TEXTO_RESUMEN, "documentacion": _TEXTO_DOCUMENTACION}
+
+# Secciones que dependen de los datos: las únicas que tiene sentido regenerar
+SECCIONES_REGENERABLES = tuple(nombre for nombre in SECCIONES_REPORTE if nombre not in SECCIONES_ESTATICAS)
+
+
+def _huella(entradas: Any) -> str:
+    """Hash SHA-256 de los datos de entrada de una sección o del reporte."""
+    return hashlib.sha256(json.dumps(entradas, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ReportGenerator:
+    """
+    Generador de reportes en Markdown y PDF.
+    Incluye toda la información del proyecto y evidencias de ejecución.
+    
+    El reporte se compone por secciones: las fijas son texto constante y las
+    que dependen de los datos se cachean con el hash de sus entradas, así que
+    solo se vuelven a renderizar las que cambiaron. El archivo se nombra con
+    el hash de todas las entradas; si el sistema no cambió se devuelve el
+    reporte ya escrito sin renderizar ni escribir nada.
+    """
+    
+    def __init__(self, max_procesos_pdf: int = 2):
+        """
+        Inicializa el generador de reportes.
         
-        return markdown_content
+        Args:
+            max_procesos_pdf: Procesos que convierten reportes a PDF a la vez
+        """
+        self.directorio_reportes = Path("resumen_manager")
+        self.fecha_generacion = datetime.now()
+        self._crear_directorio_reportes()
+        
+        # Secciones con datos: nombre -> (hash de sus entradas, texto renderizado)
+        self._cache_secciones: Dict[str, Tuple[str, str]] = {}
+        self._generadores: Dict[str, Callable[[Dict[str, Any]], str]] = {
+            "encabezado": self._generar_encabezado,
+            "estadisticas": self._generar_estadisticas_sistema,
+            "usuarios": self._generar_evidencia_usuarios,
+            "archivos": self._generar_evidencia_archivos,
+            "operaciones": self._generar_evidencia_operaciones,
+            "pie": self._generar_pie,
+        }
+        self.metricas = {"reportes_escritos": 0, "reportes_reutilizados": 0, "secciones_renderizadas": 0}
+        # Las peticiones de reporte llegan desde hilos del pool de E/S
+        self._lock = threading.RLock()
+        
+        # Conversión a PDF en un pool de procesos propio, creado en el primer uso;
+        # los trabajos se identifican por el nombre del PDF que producen
+        self.max_procesos_pdf = max_procesos_pdf
+        self._pool_pdf: Optional[ProcessPoolExecutor] = None
+        self._trabajos_pdf: Dict[str, Dict[str, Any]] = {}
+        self._futuros_pdf: Dict[str, Future] = {}
     
-    def _generar_estadisticas_sistema(self, datos: Dict[str, Any]) -> str:
-        """Genera la sección de estadísticas del sistema."""
-        if not datos:
-            return "No hay datos disponibles del sistema."
+    def _crear_directorio_reportes(self) -> None:
+        """
+        Crea el directorio para almacenar reportes si no existe.
+        """
+        try:
+            self.directorio_reportes.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            print(f"Error al crear directorio de reportes: {e}")
+            # Fallback
+            self.directorio_reportes = Path("/tmp/reportes")
+            self.directorio_reportes.mkdir(exist_ok=True)
+    
+    def _entradas_secciones(self, datos: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Extrae de los datos del sistema solo los valores que muestra cada
+        sección, de modo que marcas de tiempo u otros campos que el reporte
+        no usa no invaliden la caché.
         
+        Args:
+            datos: Diccionario con toda la información del sistema
+            
+        Returns:
+            Dict: Entradas de cada sección con datos, salvo encabezado y pie
+        """
         stats_usuarios = datos.get('estadisticas_usuarios', {})
         stats_archivos = datos.get('estadisticas_archivos', {})
+        resumen = stats_archivos.get('resumen', {})
+        ops = stats_archivos.get('operaciones_realizadas', {})
+        # El usuario de la sesión que pide el reporte, no uno global del worker
+        usuario_actual = (datos.get('usuario_actual') or {}).get('nombre')
+        
+        return {
+            "estadisticas": {
+                "sin_datos": not datos,
+                "total_usuarios": stats_usuarios.get('total_usuarios_registrados', 0),
+                "sesiones_activas": stats_usuarios.get('sesiones_actualmente_activas', 0),
+                "usuario_actual": usuario_actual or 'Sin usuario',
+                "total_archivos": resumen.get('total_archivos', 0),
+                "archivos_predefinidos": resumen.get('archivos_predefinidos', 0),
+                "archivos_leidos": ops.get('archivos_leidos', 0),
+                "fecha_sistema": datos.get('fecha_sistema', '(no configurada)'),
+                "directorio_trabajo": stats_archivos.get('directorio_trabajo', 'No especificado'),
+            },
+            "usuarios": {
+                "usuario_actual": usuario_actual or 'Ninguno',
+                "total_usuarios": stats_usuarios.get('total_usuarios_registrados', 0),
+                "sesiones_historicas": stats_usuarios.get('total_sesiones_historicas', 0),
+            },
+            "archivos": {
+                "total_archivos": resumen.get('total_archivos', 0),
+                "archivos_predefinidos": resumen.get('archivos_predefinidos', 0),
+                "archivos_usuarios": resumen.get('archivos_creados_usuarios', 0),
+                "tamaño_total": resumen.get('tamaño_total_bytes', 0),
+            },
+            "operaciones": {
+                "lecturas": ops.get('archivos_leidos', 0),
+                "escrituras": ops.get('archivos_escritos', 0),
+                "creados": ops.get('archivos_creados', 0),
+                "errores": ops.get('errores_manejo', 0),
+            },
+        }
+    
+    def _componer(self, entradas: Dict[str, Dict[str, Any]], regenerar: Iterable[str] = ()) -> Tuple[str, List[str]]:
+        """
+        Une las secciones del reporte, renderizando solo las que no están en
+        caché, cuyas entradas cambiaron o que se piden en regenerar.
+        
+        Args:
+            entradas: Entradas de cada sección (ver _entradas_secciones)
+            regenerar: Secciones a renderizar aunque estén en caché
+            
+        Returns:
+            Tuple[str, List[str]]: (contenido Markdown, secciones renderizadas)
+        """
+        fecha = {"fecha": self.fecha_generacion.strftime("%d/%m/%Y %H:%M:%S")}
+        partes = []
+        renderizadas = []
+        
+        with self._lock:
+            for nombre in SECCIONES_REPORTE:
+                texto = SECCIONES_ESTATICAS.get(nombre)
+                if texto is None:
+                    entradas_seccion = entradas.get(nombre, fecha)
+                    huella = _huella(entradas_seccion)
+                    cache = self._cache_secciones.get(nombre)
+                    if cache is None or cache[0] != huella or nombre in regenerar:
+                        cache = (huella, self._generadores[nombre](entradas_seccion))
+                        self._cache_secciones[nombre] = cache
+                        renderizadas.append(nombre)
+                    texto = cache[1]
+                partes.append(texto)
+            self.metricas["secciones_renderizadas"] += len(renderizadas)
+        
+        return "".join(partes), renderizadas
+    
+    def generar_reporte_markdown(self, datos_sistema: Dict[str, Any], regenerar: Iterable[str] = ()) -> str:
+        """
+        Genera el reporte completo en formato Markdown.
         
-        return f"""
+        Args:
+            datos_sistema: Diccionario con toda la información del sistema
+            regenerar: Secciones a renderizar de nuevo aunque estén en caché
+            
+        Returns:
+            str: Contenido del reporte en Markdown
+        """
+        return self._componer(self._entradas_secciones(datos_sistema), regenerar)[0]
+    
+    def _generar_encabezado(self, entradas: Dict[str, Any]) -> str:
+        """Genera el título y los datos del proyecto."""
+        return f"""# Reporte Final - Sistema Avanzado de Gestión de Archivos
+
+**Proyecto:** Programa en Python (FastAPI) y Vite (Bulma)  
+**Fecha de generación:** {entradas['fecha']}  
+**Autor:** Sistema Avanzado de Programación  
+**Versión:** 1.0.0
+
+"""
+    
+    def _generar_estadisticas_sistema(self, entradas: Dict[str, Any]) -> str:
+        """Genera la sección de estadísticas del sistema."""
+        if entradas['sin_datos']:
+            estadisticas = "No hay datos disponibles del sistema."
+        else:
+            estadisticas = f"""
 **Usuarios del Sistema:**
-- Total registrados: {stats_usuarios.get('total_usuarios_registrados', 0)}
-- Sesiones activas: {stats_usuarios.get('sesiones_actualmente_activas', 0)}
-- Usuario actual: {stats_usuarios.get('usuario_actual', 'Sin usuario')}
+- Total registrados: {entradas['total_usuarios']}
+- Sesiones activas: {entradas['sesiones_activas']}
+- Usuario actual: {entradas['usuario_actual']}
 
 **Sistema de Archivos:**
-- Archivos disponibles: {stats_archivos.get('resumen', {}).get('total_archivos', 0)}
-- Archivos predefinidos: {stats_archivos.get('resumen', {}).get('archivos_predefinidos', 0)}
-- Operaciones realizadas: {stats_archivos.get('operaciones_realizadas', {}).get('archivos_leidos', 0)} lecturas
+- Archivos disponibles: {entradas['total_archivos']}
+- Archivos predefinidos: {entradas['archivos_predefinidos']}
+- Operaciones realizadas: {entradas['archivos_leidos']} lecturas
 
 **Configuración:**
-- Fecha sistema: {datos.get('fecha_sistema', '(no configurada)')}
-- Directorio trabajo: {stats_archivos.get('directorio_trabajo', 'No especificado')}
+- Fecha sistema: {entradas['fecha_sistema']}
+- Directorio trabajo: {entradas['directorio_trabajo']}
+"""
+        
+        return f"""## 📊 Resultados de Ejecución
+
+### Estadísticas del Sistema
+
+{estadisticas}
+
 """
     
-    def _generar_evidencia_usuarios(self, datos: Dict[str, Any]) -> str:
+    def _generar_evidencia_usuarios(self, entradas: Dict[str, Any]) -> str:
         """Genera evidencia de usuarios registrados."""
-        stats = datos.get('estadisticas_usuarios', {})
-        return f"""
-- Usuario activo: `{stats.get('usuario_actual', 'Ninguno')}`
-- Total de usuarios registrados: **{stats.get('total_usuarios_registrados', 0)}**
-- Sesiones históricas: {stats.get('total_sesiones_historicas', 0)}
+        return f"""### Evidencias de Funcionalidad
+
+#### ✅ Usuarios Registrados
+
+- Usuario activo: `{entradas['usuario_actual']}`
+- Total de usuarios registrados: **{entradas['total_usuarios']}**
+- Sesiones históricas: {entradas['sesiones_historicas']}
+
+
 """
     
-    def _generar_evidencia_archivos(self, datos: Dict[str, Any]) -> str:
+    def _generar_evidencia_archivos(self, entradas: Dict[str, Any]) -> str:
         """Genera evidencia de archivos gestionados."""
-        stats = datos.get('estadisticas_archivos', {})
-        resumen = stats.get('resumen', {})
-        
-        return f"""
-- **Total de archivos:** {resumen.get('total_archivos', 0)}
-- **Archivos predefinidos:** {resumen.get('archivos_predefinidos', 0)} ✅ (Cumple mínimo de 4)
-- **Archivos de usuarios:** {resumen.get('archivos_creados_usuarios', 0)}
-- **Tamaño total:** {resumen.get('tamaño_total_bytes', 0)} bytes
+        return f"""#### ✅ Archivos Gestionados  
+
+- **Total de archivos:** {entradas['total_archivos']}
+- **Archivos predefinidos:** {entradas['archivos_predefinidos']} ✅ (Cumple mínimo de 4)
+- **Archivos de usuarios:** {entradas['archivos_usuarios']}
+- **Tamaño total:** {entradas['tamaño_total']} bytes
+
+
 """
     
-    def _generar_evidencia_operaciones(self, datos: Dict[str, Any]) -> str:
+    def _generar_evidencia_operaciones(self, entradas: Dict[str, Any]) -> str:
         """Genera evidencia de operaciones realizadas."""
-        ops = datos.get('estadisticas_archivos', {}).get('operaciones_realizadas', {})
-        
-        return f"""
-- **Lecturas de archivo:** {ops.get('archivos_leidos', 0)}
-- **Escrituras realizadas:** {ops.get('archivos_escritos', 0)}
-- **Archivos creados:** {ops.get('archivos_creados', 0)}
-- **Errores manejados:** {ops.get('errores_manejo', 0)}
+        return f"""#### ✅ Operaciones Realizadas
+
+- **Lecturas de archivo:** {entradas['lecturas']}
+- **Escrituras realizadas:** {entradas['escrituras']}
+- **Archivos creados:** {entradas['creados']}
+- **Errores manejados:** {entradas['errores']}
+
+
+---
+
+"""
+    
+    def _generar_pie(self, entradas: Dict[str, Any]) -> str:
+        """Genera el pie del reporte."""
+        return f"""**Reporte generado automáticamente por el Sistema Avanzado de Gestión de Archivos**  
+**Fecha:** {entradas['fecha']}  
+**Versión del sistema:** 1.0.0
 """
     
     def guardar_reporte(self, contenido_markdown: str, nombre_archivo: str = None) -> Dict[str, Any]:
         """
         Guarda el reporte en archivo Markdown.
         
+        Se escribe en un archivo temporal que luego reemplaza al final, así
+        una descarga simultánea nunca ve un reporte a medio escribir.
+        
         Args:
             contenido_markdown: Contenido del reporte
             nombre_archivo: Nombre personalizado del archivo
@@ -491,22 +635,14 @@ npm run dev
                 nombre_archivo = f"reporte_sistema_avanzado_{timestamp}.md"
             
             ruta_archivo = self.directorio_reportes / nombre_archivo
+            temporal = ruta_archivo.with_name(f"{nombre_archivo}.{os.getpid()}.{threading.get_ident()}.tmp")
             
             # Guardar archivo Markdown
-            with open(ruta_archivo, 'w', encoding='utf-8') as f:
+            with open(temporal, 'w', encoding='utf-8') as f:
                 f.write(contenido_markdown)
+            os.replace(temporal, ruta_archivo)
             
-            tamaño_archivo = ruta_archivo.stat().st_size
-            
-            return {
-                "exito": True,
-                "nombre_archivo": nombre_archivo,
-                "ruta_completa": str(ruta_archivo),
-                "tamaño_bytes": tamaño_archivo,
-                "formato": "Markdown",
-                "fecha_creacion": self.fecha_generacion.isoformat(),
-                "mensaje": f"Reporte guardado exitosamente en {ruta_archivo}"
-            }
+            return self._info_reporte(ruta_archivo, f"Reporte guardado exitosamente en {ruta_archivo}")
             
         except Exception as e:
             return {
@@ -515,23 +651,54 @@ npm run dev
                 "mensaje": f"Error al guardar reporte: {e}"
             }
     
-    def generar_reporte_completo(self, datos_sistema: Dict[str, Any] = None) -> Dict[str, Any]:
+    def _info_reporte(self, ruta_archivo: Path, mensaje: str) -> Dict[str, Any]:
+        """Información de un reporte escrito en disco."""
+        estado = ruta_archivo.stat()
+        return {
+            "exito": True,
+            "nombre_archivo": ruta_archivo.name,
+            "ruta_completa": str(ruta_archivo),
+            "tamaño_bytes": estado.st_size,
+            "formato": "Markdown",
+            "fecha_creacion": datetime.fromtimestamp(estado.st_mtime).isoformat(),
+            "mensaje": mensaje
+        }
+    
+    def generar_reporte_completo(self, datos_sistema: Dict[str, Any] = None,
+                                 regenerar: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         """
         Genera el reporte completo del sistema.
         
+        Si ya existe el reporte de estos mismos datos se devuelve sin
+        renderizarlo ni escribirlo otra vez, salvo que se pidan secciones a
+        regenerar.
+        
         Args:
             datos_sistema: Datos del sistema para incluir en el reporte
+            regenerar: Secciones a renderizar de nuevo (ver SECCIONES_REGENERABLES);
+                fuerzan a escribir el reporte aunque los datos no cambiaran
             
         Returns:
             Dict con información del reporte generado
+            
+        Raises:
+            ValueError: Si regenerar incluye una sección que no existe o una
+                fija, que no se renderiza
         """
+        regenerar = set(regenerar or ())
+        invalidas = regenerar.difference(SECCIONES_REGENERABLES)
+        if invalidas:
+            raise ValueError(
+                f"Secciones de reporte desconocidas o fijas: {', '.join(sorted(invalidas))}; "
+                f"se pueden regenerar: {', '.join(SECCIONES_REGENERABLES)}"
+            )
+        
         try:
             # Si no se proporcionan datos, crear estructura básica
             if not datos_sistema:
                 datos_sistema = {
                     "estadisticas_usuarios": {
                         "total_usuarios_registrados": 0,
-                        "usuario_actual": None,
                         "sesiones_actualmente_activas": 0,
                         "total_sesiones_historicas": 0
                     },
@@ -553,11 +720,37 @@ npm run dev
                     "fecha_sistema": "(28, 9, 2025)"
                 }
             
-            # Generar contenido Markdown
-            contenido_markdown = self.generar_reporte_markdown(datos_sistema)
+            entradas = self._entradas_secciones(datos_sistema)
+            huella = _huella(entradas)
+            ruta_archivo = self.directorio_reportes / f"reporte_sistema_avanzado_{huella[:16]}.md"
             
-            # Guardar archivo
-            resultado_guardado = self.guardar_reporte(contenido_markdown)
+            with self._lock:
+                if not regenerar and ruta_archivo.is_file():
+                    # El sistema no cambió desde el último reporte: se reutiliza
+                    self.metricas["reportes_reutilizados"] += 1
+                    with open(ruta_archivo, encoding='utf-8') as f:
+                        inicio = f.read(500)
+                    resultado_guardado = self._info_reporte(ruta_archivo, f"Reporte sin cambios en {ruta_archivo}")
+                    return {
+                        "exito": True,
+                        "reporte_markdown": resultado_guardado,
+                        "contenido_preview": inicio + "...",
+                        "estadisticas_incluidas": datos_sistema,
+                        "fecha_generacion": resultado_guardado["fecha_creacion"],
+                        "huella": huella,
+                        "reutilizado": True,
+                        "secciones_renderizadas": [],
+                        "mensaje": "Reporte sin cambios: se devuelve el ya generado"
+                    }
+                
+                # Generar contenido Markdown (solo las secciones que cambiaron)
+                self.fecha_generacion = datetime.now()
+                contenido_markdown, renderizadas = self._componer(entradas, regenerar)
+                
+                # Guardar archivo
+                resultado_guardado = self.guardar_reporte(contenido_markdown, ruta_archivo.name)
+                if resultado_guardado["exito"]:
+                    self.metricas["reportes_escritos"] += 1
             
             return {
                 "exito": True,
@@ -565,6 +758,9 @@ npm run dev
                 "contenido_preview": contenido_markdown[:500] + "...",
                 "estadisticas_incluidas": datos_sistema,
                 "fecha_generacion": self.fecha_generacion.isoformat(),
+                "huella": huella,
+                "reutilizado": False,
+                "secciones_renderizadas": renderizadas,
                 "mensaje": "Reporte completo generado exitosamente"
             }
             
@@ -574,7 +770,149 @@ npm run dev
                 "error": str(e),
                 "mensaje": f"Error al generar reporte completo: {e}"
             }
+    
+    def solicitar_pdf(self, nombre_reporte: str) -> Dict[str, Any]:
+        """
+        Encola la conversión a PDF de un reporte Markdown ya escrito.
+        
+        La maquetación se hace en el pool de procesos, nunca en el hilo que
+        atiende la petición. Si el PDF ya está al día con el reporte, o su
+        conversión sigue en curso, se devuelve ese trabajo sin encolar otro.
+        
+        Args:
+            nombre_reporte: Nombre del archivo .md en el directorio de reportes
+            
+        Returns:
+            Dict[str, Any]: Estado del trabajo (ver estado_pdf)
+            
+        Raises:
+            FileNotFoundError: Si el reporte no existe
+        """
+        origen = self.directorio_reportes / nombre_reporte
+        if origen.suffix != ".md" or not origen.is_file():
+            raise FileNotFoundError(f"Reporte '{nombre_reporte}' no encontrado")
+        destino = origen.with_suffix(".pdf")
+        
+        with self._lock:
+            futuro = self._futuros_pdf.get(destino.name)
+            if futuro is not None and not futuro.done():
+                return self.estado_pdf(destino.name)
+            if destino.is_file() and destino.stat().st_mtime >= origen.stat().st_mtime:
+                return self.estado_pdf(destino.name)
+            
+            if self._pool_pdf is None:
+                self._pool_pdf = ProcessPoolExecutor(max_workers=self.max_procesos_pdf)
+            self._trabajos_pdf[destino.name] = {
+                "trabajo_id": destino.name,
+                "estado": "en_cola",
+                "reporte": nombre_reporte,
+                "nombre_archivo": destino.name,
+                "solicitado": datetime.now().isoformat(),
+                "finalizado": None,
+                "error": None
+            }
+            futuro = self._pool_pdf.submit(renderizar_archivo, str(origen), str(destino))
+            self._futuros_pdf[destino.name] = futuro
+            futuro.add_done_callback(functools.partial(self._terminar_pdf, destino.name))
+            return self.estado_pdf(destino.name)
+    
+    def _terminar_pdf(self, trabajo_id: str, futuro: Future) -> None:
+        """Registra el resultado de una conversión (callback del futuro)."""
+        with self._lock:
+            if self._futuros_pdf.get(trabajo_id) is not futuro:
+                return
+            del self._futuros_pdf[trabajo_id]
+            trabajo = self._trabajos_pdf[trabajo_id]
+            trabajo["finalizado"] = datetime.now().isoformat()
+            try:
+                trabajo.update(futuro.result())
+                trabajo["estado"] = "completado"
+            except Exception as e:
+                trabajo["estado"] = "error"
+                trabajo["error"] = str(e) or type(e).__name__
+                if isinstance(e, BrokenProcessPool):
+                    # Un proceso murió: la próxima solicitud crea un pool nuevo
+                    self._pool_pdf = None
+    
+    def estado_pdf(self, trabajo_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado de una conversión a PDF: en_cola, procesando, completado o error.
+        
+        Args:
+            trabajo_id: Nombre del PDF, devuelto por solicitar_pdf
+            
+        Returns:
+            Optional[Dict[str, Any]]: Copia del trabajo, con url_descarga si el
+            PDF está listo, o None si no existe (también un PDF escrito por otro
+            proceso se informa como completado)
+        """
+        with self._lock:
+            trabajo = self._trabajos_pdf.get(trabajo_id)
+            if trabajo is not None:
+                trabajo = dict(trabajo)
+                futuro = self._futuros_pdf.get(trabajo_id)
+                if futuro is not None and futuro.running():
+                    trabajo["estado"] = "procesando"
+        
+        if trabajo is None:
+            ruta = self.directorio_reportes / trabajo_id
+            if ruta.suffix != ".pdf" or not ruta.is_file():
+                return None
+            estado = ruta.stat()
+            trabajo = {
+                "trabajo_id": trabajo_id,
+                "estado": "completado",
+                "reporte": ruta.with_suffix(".md").name,
+                "nombre_archivo": trabajo_id,
+                "finalizado": datetime.fromtimestamp(estado.st_mtime).isoformat(),
+                "tamaño_bytes": estado.st_size,
+                "error": None
+            }
+        if trabajo["estado"] == "completado":
+            trabajo["url_descarga"] = f"/advanced/reports/download/{trabajo_id}"
+        return trabajo
+    
+    def pdf_en_curso(self, nombre_pdf: str) -> bool:
+        """Indica si la conversión que produce nombre_pdf aún no terminó."""
+        with self._lock:
+            return nombre_pdf in self._futuros_pdf
+    
+    def cerrar_pdf(self) -> None:
+        """Cancela las conversiones en cola y detiene el pool de procesos."""
+        with self._lock:
+            pool, self._pool_pdf = self._pool_pdf, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Instancia global del generador de reportes, creada en el primer uso
+_report_generator: Optional[ReportGenerator] = None
+_report_generator_lock = threading.Lock()
+
+
+def get_report_generator() -> ReportGenerator:
+    """
+    Obtiene la instancia global del generador de reportes, creándola si no existe.
+    
+    Returns:
+        ReportGenerator: Generador de reportes compartido por el proceso
+    """
+    global _report_generator
+    if _report_generator is None:
+        with _report_generator_lock:
+            if _report_generator is None:
+                _report_generator = ReportGenerator(max_procesos_pdf=settings.pdf_workers)
+    return _report_generator
+
+
+def cerrar_pdf() -> None:
+    """Detiene la conversión a PDF si este proceso llegó a crear el generador."""
+    if _report_generator is not None:
+        _report_generator.cerrar_pdf()
 
 
-# Instancia global del generador de reportes
-report_generator = ReportGenerator()
\ No newline at end of file
+def __getattr__(nombre: str) -> Any:
+    """Mantiene `from report_generator import report_generator` creando la instancia al acceder."""
+    if nombre == "report_generator":
+        return get_report_generator()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
\ No newline at end of file
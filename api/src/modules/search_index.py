@@ -0,0 +1,236 @@
+"""
+Índice de Búsqueda de Texto Completo - Sistema Avanzado
+======================================================
+
+Este módulo implementa un índice invertido en memoria sobre el contenido
+de los archivos:
+- Términos normalizados (minúsculas y sin acentos)
+- Listas de apariciones término -> {archivo: frecuencia}
+- Vocabulario ordenado para consultas por prefijo (término*)
+- Ranking BM25 y fragmentos alrededor de la primera coincidencia
+
+El índice se actualiza por archivo: indexar un archivo existente solo
+cambia las entradas de sus términos, sin recorrer el resto.
+"""
+
+import bisect
+import functools
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Máximo de términos en que se expande un prefijo
+MAX_EXPANSION_PREFIJO = 200
+
+# Caracteres de contexto a cada lado de la coincidencia en los fragmentos
+CONTEXTO_FRAGMENTO = 60
+
+_PATRON_TERMINO = re.compile(r"\w+")
+_PATRON_MARCAS = re.compile("[\u0300-\u036f]")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin acentos (p. ej. "Evaluación" -> "evaluacion")."""
+    return _PATRON_MARCAS.sub("", unicodedata.normalize("NFKD", texto.lower()))
+
+
+@functools.lru_cache(maxsize=4096)
+def _plegar_caracter(caracter: str) -> str:
+    """Versión normalizada de un solo carácter, conservando la longitud."""
+    plegado = normalizar(caracter)
+    return plegado[0] if plegado else caracter
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido de archivos por término, seguro entre hilos.
+    """
+
+    def __init__(self, separador_linea: str = "\n"):
+        """
+        Inicializa un índice vacío.
+
+        Args:
+            separador_linea (str): Separador de líneas del contenido, tratado como espacio
+        """
+        self.separador_linea = separador_linea
+        self._lock = threading.RLock()
+        self._apariciones: Dict[str, Dict[str, int]] = {}
+        self._terminos_archivo: Dict[str, Dict[str, int]] = {}
+        self._longitudes: Dict[str, int] = {}
+        self._longitud_total = 0
+        self._vocabulario: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._longitudes)
+
+    def __contains__(self, nombre: object) -> bool:
+        return nombre in self._longitudes
+
+    def terminos(self, texto: str) -> List[str]:
+        """
+        Divide un texto en términos normalizados.
+
+        Args:
+            texto (str): Texto a dividir
+
+        Returns:
+            List[str]: Términos en orden de aparición
+        """
+        return _PATRON_TERMINO.findall(normalizar(texto.replace(self.separador_linea, " ")))
+
+    def indexar(self, nombre: str, contenido: str) -> None:
+        """
+        Indexa (o reindexa) el contenido de un archivo.
+
+        Args:
+            nombre (str): Nombre del archivo
+            contenido (str): Contenido actual del archivo
+        """
+        frecuencias: Dict[str, int] = {}
+        terminos = self.terminos(contenido)
+        for termino in terminos:
+            frecuencias[termino] = frecuencias.get(termino, 0) + 1
+
+        with self._lock:
+            self._quitar(nombre)
+            for termino, frecuencia in frecuencias.items():
+                apariciones = self._apariciones.get(termino)
+                if apariciones is None:
+                    apariciones = self._apariciones[termino] = {}
+                    bisect.insort(self._vocabulario, termino)
+                apariciones[nombre] = frecuencia
+            self._terminos_archivo[nombre] = frecuencias
+            self._longitudes[nombre] = len(terminos)
+            self._longitud_total += len(terminos)
+
+    def eliminar(self, nombre: str) -> None:
+        """Quita un archivo del índice."""
+        with self._lock:
+            self._quitar(nombre)
+
+    def _quitar(self, nombre: str) -> None:
+        frecuencias = self._terminos_archivo.pop(nombre, None)
+        if frecuencias is None:
+            return
+        for termino in frecuencias:
+            apariciones = self._apariciones[termino]
+            del apariciones[nombre]
+            if not apariciones:
+                del self._apariciones[termino]
+                posicion = bisect.bisect_left(self._vocabulario, termino)
+                del self._vocabulario[posicion]
+        self._longitud_total -= self._longitudes.pop(nombre)
+
+    def _expandir(self, termino: str, prefijo: bool) -> List[str]:
+        """Términos del vocabulario que corresponden a un término de la consulta."""
+        if not prefijo:
+            return [termino] if termino in self._apariciones else []
+        inicio = bisect.bisect_left(self._vocabulario, termino)
+        fin = bisect.bisect_left(self._vocabulario, termino + "\U0010ffff")
+        expandidos = self._vocabulario[inicio:fin]
+        if len(expandidos) > MAX_EXPANSION_PREFIJO:
+            expandidos = heapq.nlargest(
+                MAX_EXPANSION_PREFIJO, expandidos, key=lambda t: len(self._apariciones[t])
+            )
+        return expandidos
+
+    def buscar(self, consulta: str, limite: int = 10) -> Tuple[List[Tuple[str, float, List[str]]], int]:
+        """
+        Busca archivos que contengan todos los términos de la consulta.
+        Un término terminado en * se trata como prefijo.
+
+        Args:
+            consulta (str): Términos separados por espacios, p. ej. "evaluacion cred*"
+            limite (int): Máximo de resultados
+
+        Returns:
+            Tuple: (lista de (nombre, puntuación, términos coincidentes) ordenada
+            por puntuación, total de archivos que coinciden)
+        """
+        consultas: List[Tuple[str, bool]] = []
+        for parte in consulta.split():
+            prefijo = parte.endswith("*")
+            for termino in self.terminos(parte.rstrip("*")):
+                consultas.append((termino, prefijo))
+        if not consultas:
+            return [], 0
+
+        with self._lock:
+            total_archivos = len(self._longitudes)
+            if not total_archivos:
+                return [], 0
+            longitud_media = self._longitud_total / total_archivos
+
+            # norma(archivo) = k1 * (1 - b + b * longitud / longitud_media)
+            base_norma = BM25_K1 * (1 - BM25_B)
+            escala_norma = BM25_K1 * BM25_B / longitud_media
+            longitudes = self._longitudes
+
+            puntuaciones: Optional[Dict[str, float]] = None
+            coincidencias: Dict[str, List[str]] = {}
+            for termino, prefijo in consultas:
+                parciales: Dict[str, float] = {}
+                for expandido in self._expandir(termino, prefijo):
+                    apariciones = self._apariciones[expandido]
+                    idf = math.log(1 + (total_archivos - len(apariciones) + 0.5) / (len(apariciones) + 0.5))
+                    peso = idf * (BM25_K1 + 1)
+                    for nombre, frecuencia in apariciones.items():
+                        if puntuaciones is not None and nombre not in puntuaciones:
+                            continue
+                        norma = base_norma + escala_norma * longitudes[nombre]
+                        parciales[nombre] = parciales.get(nombre, 0.0) + peso * frecuencia / (frecuencia + norma)
+                        coincidencias.setdefault(nombre, []).append(expandido)
+                if puntuaciones is None:
+                    puntuaciones = parciales
+                else:
+                    puntuaciones = {nombre: puntuaciones[nombre] + valor for nombre, valor in parciales.items()}
+                if not puntuaciones:
+                    return [], 0
+
+            mejores = heapq.nlargest(limite, puntuaciones.items(), key=lambda item: (item[1], item[0]))
+            return [
+                (nombre, round(puntuacion, 4), coincidencias[nombre]) for nombre, puntuacion in mejores
+            ], len(puntuaciones)
+
+    def fragmento(self, contenido: str, terminos: Iterable[str]) -> str:
+        """
+        Extrae el texto alrededor de la primera aparición de alguno de los términos.
+
+        Args:
+            contenido (str): Contenido del archivo
+            terminos (Iterable[str]): Términos normalizados que coincidieron
+
+        Returns:
+            str: Fragmento con separadores de línea convertidos en espacios
+        """
+        # Plegado carácter a carácter para que las posiciones coincidan con el original
+        sin_separadores = contenido.replace(self.separador_linea, " " * len(self.separador_linea))
+        plegado = "".join(_plegar_caracter(c) for c in sin_separadores)
+        alternativas = "|".join(re.escape(t) for t in sorted(set(terminos), key=len, reverse=True))
+        patron = re.compile(r"(?<!\w)(?:" + alternativas + r")(?!\w)")
+        encontrado = patron.search(plegado)
+        if encontrado is None:
+            inicio, fin = 0, min(len(contenido), 2 * CONTEXTO_FRAGMENTO)
+        else:
+            inicio = max(encontrado.start() - CONTEXTO_FRAGMENTO, 0)
+            fin = min(encontrado.end() + CONTEXTO_FRAGMENTO, len(contenido))
+        texto = contenido[inicio:fin].replace(self.separador_linea, " ")
+        return ("…" if inicio > 0 else "") + texto.strip() + ("…" if fin < len(contenido) else "")
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Archivos indexados, términos distintos y términos totales."""
+        with self._lock:
+            return {
+                "archivos_indexados": len(self._longitudes),
+                "terminos_distintos": len(self._vocabulario),
+                "terminos_totales": self._longitud_total
+            }
@@ -0,0 +1,887 @@
+"""
+Almacén de Sesiones - Sistema Avanzado
+=====================================
+
+Este módulo guarda las sesiones vivas del gestor de usuarios:
+- Búsqueda por identificador de sesión
+- Índice por usuario para contar y cerrar sus sesiones sin recorrer las demás
+- Caducidad por inactividad y caducidad absoluta desde el inicio
+- Las sesiones cerradas o caducadas se eliminan; solo quedan sus contadores
+
+Las sesiones se mantienen en dos órdenes (última actividad e inicio), así
+que purgar las caducadas solo mira las que están al frente de cada uno y
+el costo no crece con las sesiones creadas desde que arrancó el proceso.
+
+Estos órdenes cumplen el papel de una rueda de temporizadores: tocar una
+sesión la mueve al final en O(1) y cada barrido periódico (ver barrer())
+saca del frente solo las que ya caducaron, así que un barrido cuesta O(1)
+más O(1) por sesión caducada, sin temporizadores por sesión.
+
+Con un máximo de sesiones residentes, las que llevan más tiempo sin
+actividad pasan a una tabla SQLite temporal en disco (privada del proceso,
+SQLite la borra al cerrarla) y vuelven a memoria cuando el cliente las usa,
+así que la memoria de un worker no crece con las sesiones abandonadas.
+
+AlmacenSesionesCompartido ofrece la misma interfaz sobre una base SQLite
+compartida por todos los workers, para que cualquiera atienda cualquier
+sesión. Cada worker guarda en caché las sesiones que resolvió durante
+unos instantes, así que una petición normal no consulta la base.
+"""
+
+import itertools
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Caducidad por defecto (segundos): sin actividad (la misma regla de
+# 10 minutos que aplica el cliente) y desde el inicio
+INACTIVIDAD_MAXIMA = 10 * 60
+DURACION_MAXIMA = 12 * 60 * 60
+
+# Sesiones que elimina como máximo un barrido (el resto queda para el siguiente)
+MAX_CADUCADAS_POR_BARRIDO = 1000
+
+# Páginas de la tabla en disco que SQLite mantiene en memoria (KiB)
+CACHE_DISCO_KIB = 1024
+
+# Al superar el máximo de residentes se baja hasta esta fracción de una vez,
+# para que mover sesiones a disco no cueste una transacción por login
+FRACCION_TRAS_DESBORDE = 0.95
+
+# Almacén compartido: segundos que una sesión resuelta se sirve desde la caché
+# del worker (y cada cuánto se escribe su actividad) y tamaño de esa caché
+TTL_CACHE_SESIONES = 1.0
+MAX_CACHE_SESIONES = 10000
+
+ESQUEMA_SESIONES = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    session_id TEXT PRIMARY KEY,
+    usuario TEXT NOT NULL,
+    inicio_sesion TEXT NOT NULL,
+    inicio REAL NOT NULL,
+    actividad REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sesiones_usuario ON sesiones (usuario);
+CREATE INDEX IF NOT EXISTS idx_sesiones_actividad ON sesiones (actividad);
+CREATE INDEX IF NOT EXISTS idx_sesiones_inicio ON sesiones (inicio);
+"""
+
+# Almacén compartido: sesiones vivas y usuarios con sesión, mantenidos por
+# triggers en la misma transacción que cada alta o baja (de cualquier worker),
+# para que contarlos no recorra la tabla
+ESQUEMA_CONTADORES_SESIONES = """
+CREATE TABLE IF NOT EXISTS sesiones_contadores (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sesiones_por_usuario (
+    usuario TEXT PRIMARY KEY,
+    sesiones INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS sesiones_alta AFTER INSERT ON sesiones BEGIN
+    UPDATE sesiones_contadores SET valor = valor + 1 WHERE clave = 'sesiones';
+    INSERT INTO sesiones_por_usuario (usuario, sesiones) VALUES (NEW.usuario, 1)
+        ON CONFLICT (usuario) DO UPDATE SET sesiones = sesiones + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS sesiones_baja AFTER DELETE ON sesiones BEGIN
+    UPDATE sesiones_contadores SET valor = valor - 1 WHERE clave = 'sesiones';
+    UPDATE sesiones_por_usuario SET sesiones = sesiones - 1 WHERE usuario = OLD.usuario;
+    DELETE FROM sesiones_por_usuario WHERE usuario = OLD.usuario AND sesiones = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS usuarios_alta AFTER INSERT ON sesiones_por_usuario BEGIN
+    UPDATE sesiones_contadores SET valor = valor + 1 WHERE clave = 'usuarios';
+END;
+CREATE TRIGGER IF NOT EXISTS usuarios_baja AFTER DELETE ON sesiones_por_usuario BEGIN
+    UPDATE sesiones_contadores SET valor = valor - 1 WHERE clave = 'usuarios';
+END;
+"""
+
+
+class AlmacenSesiones:
+    """
+    Sesiones vivas indexadas por identificador y por usuario, seguro entre hilos.
+    """
+
+    def __init__(self, inactividad_maxima: float = INACTIVIDAD_MAXIMA,
+                 duracion_maxima: float = DURACION_MAXIMA,
+                 reloj: Callable[[], float] = time.monotonic,
+                 max_residentes: Optional[int] = None):
+        """
+        Inicializa un almacén vacío.
+
+        Args:
+            inactividad_maxima (float): Segundos sin actividad tras los que caduca una sesión
+            duracion_maxima (float): Segundos desde el inicio tras los que caduca siempre
+            reloj: Función que devuelve el instante actual en segundos (monótono)
+            max_residentes (Optional[int]): Sesiones en memoria; las de actividad
+                más antigua que sobren pasan a disco (None sin límite)
+
+        Raises:
+            ValueError: Si max_residentes es menor que 1
+        """
+        if max_residentes is not None and max_residentes < 1:
+            raise ValueError("max_residentes debe ser al menos 1")
+        self.inactividad_maxima = inactividad_maxima
+        self.duracion_maxima = duracion_maxima
+        self.max_residentes = max_residentes
+        self._reloj = reloj
+        self._lock = threading.RLock()
+        self._sesiones: Dict[str, Dict] = {}
+        # session_id -> instante, del más antiguo al más reciente
+        self._por_actividad: "OrderedDict[str, float]" = OrderedDict()
+        self._por_inicio: "OrderedDict[str, float]" = OrderedDict()
+        self._por_usuario: Dict[str, Dict[str, None]] = {}
+        # Nivel en disco (se crea al desbordar por primera vez), cuántas
+        # sesiones tiene y cuántas de cada usuario, para contar sin consultarlo
+        self._disco: Optional[sqlite3.Connection] = None
+        self._en_disco = 0
+        self._en_disco_por_usuario: Dict[str, int] = {}
+        # Cota inferior del primer instante en que caduca una sesión del
+        # disco: hasta entonces purgar no necesita consultarlo
+        self._caducidad_disco = float("inf")
+        self.metricas = {
+            "creadas": 0, "cerradas": 0, "extendidas": 0,
+            "caducadas_inactividad": 0, "caducadas_duracion": 0, "barridos": 0,
+            "movidas_a_disco": 0, "recuperadas_de_disco": 0
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            return len(self._sesiones) + self._en_disco
+
+    def crear(self, usuario: str) -> Dict:
+        """
+        Crea una sesión activa para un usuario.
+
+        Args:
+            usuario (str): Nombre del usuario
+
+        Returns:
+            Dict: Copia de la información de la sesión
+        """
+        session_id = str(uuid.uuid4())
+        sesion = {
+            "session_id": session_id,
+            "usuario": usuario,
+            "inicio_sesion": datetime.now().isoformat(),
+            "activa": True
+        }
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            ahora = self._reloj()
+            self._sesiones[session_id] = sesion
+            self._por_actividad[session_id] = ahora
+            self._por_inicio[session_id] = ahora
+            self._por_usuario.setdefault(usuario, {})[session_id] = None
+            self.metricas["creadas"] += 1
+            copia = self._copia(session_id, ahora)
+            self._desbordar()
+            return copia
+
+    def obtener(self, session_id: str) -> Optional[Dict]:
+        """
+        Obtiene una sesión viva y registra la actividad, lo que reinicia su
+        plazo de inactividad.
+
+        Args:
+            session_id (str): Identificador de la sesión
+
+        Returns:
+            Optional[Dict]: Copia de la sesión con "segundos_restantes", o None
+            si no existe, se cerró o caducó
+        """
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            ahora = self._reloj()
+            if session_id not in self._sesiones and not self._recuperar(session_id):
+                return None
+            # Puede haber caducado sin que la purga acotada llegara a ella
+            caducidad = self._caducidad(session_id, ahora)
+            if caducidad is not None:
+                self._eliminar(session_id)
+                self.metricas[caducidad] += 1
+                return None
+            self._por_actividad[session_id] = ahora
+            self._por_actividad.move_to_end(session_id)
+            copia = self._copia(session_id, ahora)
+            self._desbordar()
+            return copia
+
+    def extender(self, session_id: str) -> Optional[Dict]:
+        """
+        Extiende una sesión a pedido del cliente (igual que obtener(), pero se
+        cuenta aparte en las métricas).
+
+        Returns:
+            Optional[Dict]: Copia de la sesión o None si ya no está viva
+        """
+        with self._lock:
+            sesion = self.obtener(session_id)
+            if sesion is not None:
+                self.metricas["extendidas"] += 1
+            return sesion
+
+    def _caducidad(self, session_id: str, ahora: float) -> Optional[str]:
+        """Métrica de la caducidad que ya alcanzó la sesión, o None si sigue viva."""
+        if ahora - self._por_actividad[session_id] >= self.inactividad_maxima:
+            return "caducadas_inactividad"
+        if ahora - self._por_inicio[session_id] >= self.duracion_maxima:
+            return "caducadas_duracion"
+        return None
+
+    def _copia(self, session_id: str, ahora: float) -> Dict:
+        """Copia de la sesión con los segundos que le quedan hasta caducar."""
+        restante = min(
+            self.inactividad_maxima - (ahora - self._por_actividad[session_id]),
+            self.duracion_maxima - (ahora - self._por_inicio[session_id])
+        )
+        return dict(self._sesiones[session_id], segundos_restantes=max(0, int(restante)))
+
+    def cerrar(self, session_id: str) -> bool:
+        """
+        Cierra una sesión y la elimina.
+
+        Returns:
+            bool: False si la sesión no existía
+        """
+        with self._lock:
+            if session_id in self._sesiones:
+                self._eliminar(session_id)
+            elif not self._quitar_de_disco(session_id):
+                return False
+            self.metricas["cerradas"] += 1
+            return True
+
+    def cerrar_usuario(self, usuario: str) -> int:
+        """
+        Cierra todas las sesiones de un usuario.
+
+        Returns:
+            int: Número de sesiones cerradas
+        """
+        with self._lock:
+            ids = list(self._por_usuario.get(usuario, ()))
+            for session_id in ids:
+                self._eliminar(session_id)
+            cerradas = len(ids)
+            en_disco = self._en_disco_por_usuario.pop(usuario, 0)
+            if en_disco:
+                self._disco.execute("DELETE FROM sesiones WHERE usuario = ?", (usuario,))
+                self._en_disco -= en_disco
+                cerradas += en_disco
+            self.metricas["cerradas"] += cerradas
+            return cerradas
+
+    def contar_usuario(self, usuario: str) -> int:
+        """Sesiones vivas de un usuario."""
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            return len(self._por_usuario.get(usuario, ())) + self._en_disco_por_usuario.get(usuario, 0)
+
+    def sesiones_usuario(self, usuario: str) -> List[Dict]:
+        """Copia de las sesiones vivas de un usuario, de la más antigua a la más reciente."""
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            sesiones = [
+                (self._por_inicio[session_id], dict(self._sesiones[session_id]))
+                for session_id in self._por_usuario.get(usuario, ())
+            ]
+            if usuario in self._en_disco_por_usuario:
+                sesiones.extend(
+                    (inicio, {"session_id": session_id, "usuario": usuario,
+                              "inicio_sesion": inicio_sesion, "activa": True})
+                    for session_id, inicio_sesion, inicio in self._disco.execute(
+                        "SELECT session_id, inicio_sesion, inicio FROM sesiones WHERE usuario = ?", (usuario,)
+                    )
+                )
+                sesiones.sort(key=lambda par: par[0])
+            return [sesion for _, sesion in sesiones]
+
+    def purgar(self, maximo: Optional[int] = None) -> int:
+        """
+        Elimina las sesiones caducadas por inactividad o por duración, en
+        memoria y en disco, para que ningún total cuente una ya caducada.
+
+        Args:
+            maximo (Optional[int]): Máximo de sesiones a eliminar (None para todas)
+
+        Returns:
+            int: Número de sesiones eliminadas
+        """
+        with self._lock:
+            ahora = self._reloj()
+            caducadas = 0
+            for orden, limite, metrica in ((self._por_actividad, self.inactividad_maxima, "caducadas_inactividad"),
+                                           (self._por_inicio, self.duracion_maxima, "caducadas_duracion")):
+                while orden and (maximo is None or caducadas < maximo):
+                    session_id, instante = next(iter(orden.items()))
+                    if ahora - instante < limite:
+                        break
+                    self._eliminar(session_id)
+                    self.metricas[metrica] += 1
+                    caducadas += 1
+            if maximo is None or caducadas < maximo:
+                caducadas += self._purgar_disco(ahora, None if maximo is None else maximo - caducadas)
+            return caducadas
+
+    def barrer(self) -> int:
+        """
+        Barrido periódico: elimina las sesiones caducadas aunque nadie las
+        consulte, para que las abandonadas no se acumulen. Elimina como mucho
+        MAX_CADUCADAS_POR_BARRIDO para no retener el event loop; las
+        consultas purgan con el mismo límite, así que si caducan muchas a la
+        vez los totales pueden incluirlas hasta los barridos siguientes.
+
+        Returns:
+            int: Número de sesiones eliminadas
+        """
+        with self._lock:
+            self.metricas["barridos"] += 1
+            return self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+
+    def _eliminar(self, session_id: str) -> None:
+        sesion = self._sesiones.pop(session_id)
+        del self._por_actividad[session_id]
+        del self._por_inicio[session_id]
+        ids_usuario = self._por_usuario[sesion["usuario"]]
+        del ids_usuario[session_id]
+        if not ids_usuario:
+            del self._por_usuario[sesion["usuario"]]
+
+    # ------------------------------------------------------------------
+    # Nivel en disco
+    # ------------------------------------------------------------------
+    def _abrir_disco(self) -> sqlite3.Connection:
+        if self._disco is None:
+            # "" abre una base temporal privada en disco que SQLite borra al cerrarla
+            self._disco = sqlite3.connect("", isolation_level=None, check_same_thread=False)
+            self._disco.execute(f"PRAGMA cache_size=-{CACHE_DISCO_KIB}")
+            # Se descarta con el proceso: no necesita diario en disco ni fsync
+            self._disco.execute("PRAGMA journal_mode=MEMORY")
+            self._disco.execute("PRAGMA synchronous=OFF")
+            self._disco.executescript(ESQUEMA_SESIONES)
+        return self._disco
+
+    def _desbordar(self) -> None:
+        """Si se superó el máximo, mueve a disco las sesiones de actividad más antigua."""
+        if self.max_residentes is None or len(self._sesiones) <= self.max_residentes:
+            return
+        objetivo = int(self.max_residentes * FRACCION_TRAS_DESBORDE)
+        filas = []
+        for session_id, actividad in itertools.islice(
+                self._por_actividad.items(), len(self._sesiones) - objetivo):
+            sesion = self._sesiones[session_id]
+            filas.append((session_id, sesion["usuario"], sesion["inicio_sesion"],
+                          self._por_inicio[session_id], actividad))
+        disco = self._abrir_disco()
+        disco.execute("BEGIN")
+        disco.executemany(
+            "INSERT OR REPLACE INTO sesiones (session_id, usuario, inicio_sesion, inicio, actividad) "
+            "VALUES (?, ?, ?, ?, ?)", filas
+        )
+        disco.execute("COMMIT")
+        for session_id, usuario, *_ in filas:
+            self._eliminar(session_id)
+            self._en_disco_por_usuario[usuario] = self._en_disco_por_usuario.get(usuario, 0) + 1
+        self._en_disco += len(filas)
+        self._caducidad_disco = min(
+            self._caducidad_disco,
+            min(fila[4] for fila in filas) + self.inactividad_maxima,
+            min(fila[3] for fila in filas) + self.duracion_maxima
+        )
+        self.metricas["movidas_a_disco"] += len(filas)
+
+    def _descontar_disco(self, usuarios: Iterable[str]) -> None:
+        """Resta de los contadores del nivel en disco una sesión por cada usuario dado."""
+        for usuario in usuarios:
+            restantes = self._en_disco_por_usuario[usuario] - 1
+            if restantes:
+                self._en_disco_por_usuario[usuario] = restantes
+            else:
+                del self._en_disco_por_usuario[usuario]
+            self._en_disco -= 1
+
+    def _quitar_de_disco(self, session_id: str) -> Optional[Tuple[str, str, float, float]]:
+        """Saca una sesión del disco; devuelve (usuario, inicio_sesion, inicio, actividad) o None."""
+        if not self._en_disco:
+            return None
+        fila = self._disco.execute(
+            "SELECT usuario, inicio_sesion, inicio, actividad FROM sesiones WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if fila is not None:
+            self._disco.execute("DELETE FROM sesiones WHERE session_id = ?", (session_id,))
+            self._descontar_disco((fila[0],))
+        return fila
+
+    def _recuperar(self, session_id: str) -> bool:
+        """
+        Devuelve a memoria una sesión que estaba en disco. Queda al final del
+        orden por inicio aunque empezó antes que otras: su caducidad por
+        duración se comprueba igual en cada acceso y, si deja de usarse, la
+        purga por inactividad la elimina.
+
+        Returns:
+            bool: False si la sesión no estaba en disco
+        """
+        fila = self._quitar_de_disco(session_id)
+        if fila is None:
+            return False
+        usuario, inicio_sesion, inicio, actividad = fila
+        self._sesiones[session_id] = {
+            "session_id": session_id, "usuario": usuario, "inicio_sesion": inicio_sesion, "activa": True
+        }
+        self._por_actividad[session_id] = actividad
+        self._por_inicio[session_id] = inicio
+        self._por_usuario.setdefault(usuario, {})[session_id] = None
+        self.metricas["recuperadas_de_disco"] += 1
+        return True
+
+    def _bytes_en_disco(self) -> int:
+        if self._disco is None:
+            return 0
+        paginas = self._disco.execute("PRAGMA page_count").fetchone()[0]
+        return paginas * self._disco.execute("PRAGMA page_size").fetchone()[0]
+
+    def _purgar_disco(self, ahora: float, maximo: Optional[int]) -> int:
+        """
+        Elimina del disco hasta `maximo` sesiones caducadas (None para todas).
+        Solo consulta el disco si ya pasó la primera caducidad posible.
+        """
+        if not self._en_disco or ahora < self._caducidad_disco:
+            return 0
+        filas = self._disco.execute(
+            "SELECT session_id, usuario, actividad FROM sesiones WHERE actividad <= ? OR inicio <= ? LIMIT ?",
+            (ahora - self.inactividad_maxima, ahora - self.duracion_maxima, -1 if maximo is None else maximo)
+        ).fetchall()
+        if filas:
+            self._disco.execute("BEGIN")
+            self._disco.executemany("DELETE FROM sesiones WHERE session_id = ?", [(fila[0],) for fila in filas])
+            self._disco.execute("COMMIT")
+            self._descontar_disco(fila[1] for fila in filas)
+            for _, _, actividad in filas:
+                inactiva = ahora - actividad >= self.inactividad_maxima
+                self.metricas["caducadas_inactividad" if inactiva else "caducadas_duracion"] += 1
+        # Dos subconsultas: cada MIN por separado usa su índice
+        actividad, inicio = self._disco.execute(
+            "SELECT (SELECT MIN(actividad) FROM sesiones), (SELECT MIN(inicio) FROM sesiones)"
+        ).fetchone()
+        self._caducidad_disco = (
+            float("inf") if actividad is None
+            else min(actividad + self.inactividad_maxima, inicio + self.duracion_maxima)
+        )
+        return len(filas)
+
+    def recontar(self) -> int:
+        """
+        Cuenta las sesiones vivas recorriéndolas y comprueba que los índices
+        coinciden (para el modo de verificación de estadísticas).
+
+        Returns:
+            int: Sesiones vivas según el recorrido completo
+
+        Raises:
+            RuntimeError: Si los índices no coinciden con las sesiones
+        """
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            vivas = sum(1 for sesion in self._sesiones.values() if sesion["activa"])
+            por_usuario = sum(len(ids) for ids in self._por_usuario.values())
+            if not (vivas == len(self._por_actividad) == len(self._por_inicio) == por_usuario):
+                raise RuntimeError("Índices de sesiones inconsistentes")
+            en_disco = self._disco.execute("SELECT COUNT(*) FROM sesiones").fetchone()[0] if self._disco else 0
+            if not (en_disco == self._en_disco == sum(self._en_disco_por_usuario.values())):
+                raise RuntimeError("Contadores de sesiones en disco inconsistentes")
+            return vivas + en_disco
+
+    def exportar(self) -> Dict[str, Any]:
+        """
+        Estado del almacén para una instantánea, por columnas y en orden de
+        actividad (primero las que están en disco, que son las de actividad
+        más antigua). Los instantes del reloj monótono no sirven en otro
+        proceso, así que se guardan como edades. El lock solo se retiene
+        mientras se copian los índices.
+
+        Returns:
+            Dict[str, Any]: Sesiones vivas y métricas
+        """
+        with self._lock:
+            ahora = self._reloj()
+            sesiones = dict(self._sesiones)
+            por_actividad = list(self._por_actividad.items())
+            por_inicio = dict(self._por_inicio)
+            metricas = dict(self.metricas)
+            en_disco = self._disco.execute(
+                "SELECT session_id, usuario, inicio_sesion, inicio, actividad FROM sesiones ORDER BY actividad"
+            ).fetchall() if self._en_disco else []
+        ids = [fila[0] for fila in en_disco] + [session_id for session_id, _ in por_actividad]
+        return {
+            "ids": ids,
+            "usuarios": [fila[1] for fila in en_disco] + [
+                sesiones[session_id]["usuario"] for session_id, _ in por_actividad],
+            "inicios_sesion": [fila[2] for fila in en_disco] + [
+                sesiones[session_id]["inicio_sesion"] for session_id, _ in por_actividad],
+            "edades_actividad": [ahora - fila[4] for fila in en_disco] + [
+                ahora - actividad for _, actividad in por_actividad],
+            "edades_inicio": [ahora - fila[3] for fila in en_disco] + [
+                ahora - por_inicio[session_id] for session_id, _ in por_actividad],
+            "metricas": metricas
+        }
+
+    def restaurar(self, estado: Dict[str, Any], transcurrido: float = 0.0) -> int:
+        """
+        Carga las sesiones de una instantánea (ver exportar()). Las que
+        caducaron mientras el proceso estaba detenido se descartan.
+
+        Args:
+            estado (Dict[str, Any]): Estado exportado
+            transcurrido (float): Segundos entre la instantánea y ahora
+
+        Returns:
+            int: Sesiones restauradas
+        """
+        with self._lock:
+            ahora = self._reloj()
+            vacio = not self._sesiones
+            restauradas = 0
+            for session_id, usuario, inicio_sesion, edad_actividad, edad_inicio in zip(
+                    estado["ids"], estado["usuarios"], estado["inicios_sesion"],
+                    estado["edades_actividad"], estado["edades_inicio"]):
+                edad_actividad += transcurrido
+                edad_inicio += transcurrido
+                if (session_id in self._sesiones or edad_actividad >= self.inactividad_maxima
+                        or edad_inicio >= self.duracion_maxima):
+                    continue
+                self._sesiones[session_id] = {
+                    "session_id": session_id, "usuario": usuario, "inicio_sesion": inicio_sesion, "activa": True
+                }
+                self._por_usuario.setdefault(usuario, {})[session_id] = None
+                self._por_actividad[session_id] = ahora - edad_actividad
+                self._por_inicio[session_id] = ahora - edad_inicio
+                restauradas += 1
+            # Los dos órdenes deben ir del instante más antiguo al más reciente;
+            # las sesiones llegan en orden de actividad
+            self._por_inicio = OrderedDict(sorted(self._por_inicio.items(), key=lambda item: item[1]))
+            if not vacio:
+                self._por_actividad = OrderedDict(sorted(self._por_actividad.items(), key=lambda item: item[1]))
+            for metrica, valor in estado.get("metricas", {}).items():
+                if metrica in self.metricas:
+                    self.metricas[metrica] += valor
+            self._desbordar()
+            return restauradas
+
+    def estadisticas(self) -> Dict[str, int]:
+        """
+        Sesiones vivas (en memoria y en disco), usuarios con sesión,
+        caducidades y sesiones creadas, cerradas, extendidas y movidas a disco.
+        """
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            usuarios_solo_en_disco = sum(
+                1 for usuario in self._en_disco_por_usuario if usuario not in self._por_usuario
+            )
+            return {
+                "sesiones_activas": len(self._sesiones) + self._en_disco,
+                "sesiones_residentes": len(self._sesiones),
+                "sesiones_en_disco": self._en_disco,
+                "max_residentes": self.max_residentes,
+                "bytes_en_disco": self._bytes_en_disco(),
+                "usuarios_con_sesion": len(self._por_usuario) + usuarios_solo_en_disco,
+                "inactividad_maxima_segundos": self.inactividad_maxima,
+                "duracion_maxima_segundos": self.duracion_maxima,
+                **self.metricas,
+                "caducadas": self.metricas["caducadas_inactividad"] + self.metricas["caducadas_duracion"]
+            }
+
+
+class AlmacenSesionesCompartido:
+    """
+    Sesiones vivas en una base SQLite compartida entre workers, con la
+    misma interfaz que AlmacenSesiones. Las métricas son de este worker.
+    """
+
+    def __init__(self, ruta_db: Path, inactividad_maxima: float = INACTIVIDAD_MAXIMA,
+                 duracion_maxima: float = DURACION_MAXIMA, ttl_cache: float = TTL_CACHE_SESIONES,
+                 reloj: Callable[[], float] = time.time):
+        """
+        Abre (o crea) la base de sesiones.
+
+        Args:
+            ruta_db (Path): Ruta del archivo SQLite, la misma en todos los workers
+            inactividad_maxima (float): Segundos sin actividad tras los que caduca una sesión
+            duracion_maxima (float): Segundos desde el inicio tras los que caduca siempre
+            ttl_cache (float): Segundos que se reutiliza una sesión ya resuelta; un
+                cierre hecho en otro worker puede tardar eso en notarse
+            reloj: Hora actual en segundos, común a todos los workers
+        """
+        self.ruta_db = Path(ruta_db)
+        self.ruta_db.parent.mkdir(parents=True, exist_ok=True)
+        self.inactividad_maxima = inactividad_maxima
+        self.duracion_maxima = duracion_maxima
+        self.ttl_cache = ttl_cache
+        self._reloj = reloj
+        self._lock = threading.RLock()
+        self._conexion = sqlite3.connect(
+            str(self.ruta_db), isolation_level=None, check_same_thread=False, timeout=30.0
+        )
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(ESQUEMA_SESIONES)
+        self._conexion.executescript(ESQUEMA_CONTADORES_SESIONES)
+        self._inicializar_contadores()
+        # session_id -> sesión con "inicio", "actividad" (última escrita) y "consultada"
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Cota inferior del primer instante en que caduca una sesión de la
+        # base (de cualquier worker): hasta entonces purgar no la consulta.
+        # Desconocida al abrir, así que la primera purga siempre consulta
+        self._proxima_caducidad = float("-inf")
+        self.metricas = {
+            "creadas": 0, "cerradas": 0, "extendidas": 0,
+            "caducadas_inactividad": 0, "caducadas_duracion": 0, "barridos": 0
+        }
+
+    def _inicializar_contadores(self) -> None:
+        """
+        Calcula los contadores una sola vez, con la tabla de sesiones de una
+        base creada antes que ellos; después los mantienen los triggers.
+        """
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            if self._conexion.execute(
+                "SELECT 1 FROM sesiones_contadores WHERE clave = 'sesiones'"
+            ).fetchone() is None:
+                self._conexion.execute("DELETE FROM sesiones_por_usuario")
+                self._conexion.execute(
+                    "INSERT INTO sesiones_por_usuario (usuario, sesiones) "
+                    "SELECT usuario, COUNT(*) FROM sesiones GROUP BY usuario"
+                )
+                self._conexion.execute(
+                    "INSERT OR REPLACE INTO sesiones_contadores (clave, valor) VALUES "
+                    "('sesiones', (SELECT COUNT(*) FROM sesiones)), "
+                    "('usuarios', (SELECT COUNT(*) FROM sesiones_por_usuario))"
+                )
+            self._conexion.execute("COMMIT")
+        except BaseException:
+            self._conexion.execute("ROLLBACK")
+            raise
+
+    def _contador(self, clave: str) -> int:
+        return self._conexion.execute(
+            "SELECT valor FROM sesiones_contadores WHERE clave = ?", (clave,)
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            return self._contador("sesiones")
+
+    def _cachear(self, entrada: Dict[str, Any]) -> None:
+        self._cache[entrada["session_id"]] = entrada
+        self._cache.move_to_end(entrada["session_id"])
+        if len(self._cache) > MAX_CACHE_SESIONES:
+            self._cache.popitem(last=False)
+
+    def crear(self, usuario: str) -> Dict:
+        """Crea una sesión activa para un usuario (ver AlmacenSesiones.crear)."""
+        ahora = self._reloj()
+        entrada = {
+            "session_id": str(uuid.uuid4()),
+            "usuario": usuario,
+            "inicio_sesion": datetime.now().isoformat(),
+            "activa": True,
+            "inicio": ahora,
+            "actividad": ahora,
+            "consultada": ahora
+        }
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            self._conexion.execute(
+                "INSERT INTO sesiones (session_id, usuario, inicio_sesion, inicio, actividad) VALUES (?, ?, ?, ?, ?)",
+                (entrada["session_id"], usuario, entrada["inicio_sesion"], ahora, ahora)
+            )
+            self._cachear(entrada)
+            self.metricas["creadas"] += 1
+            return self._copia(entrada, ahora)
+
+    def obtener(self, session_id: str) -> Optional[Dict]:
+        """
+        Obtiene una sesión viva y registra la actividad (ver AlmacenSesiones.obtener).
+        Dentro del TTL de la caché no consulta ni escribe la base.
+        """
+        with self._lock:
+            ahora = self._reloj()
+            entrada = self._cache.get(session_id)
+            if entrada is None or ahora - entrada["consultada"] >= self.ttl_cache:
+                fila = self._conexion.execute(
+                    "SELECT usuario, inicio_sesion, inicio, actividad FROM sesiones WHERE session_id = ?",
+                    (session_id,)
+                ).fetchone()
+                if fila is None:
+                    self._cache.pop(session_id, None)
+                    return None
+                usuario, inicio_sesion, inicio, actividad = fila
+                entrada = {
+                    "session_id": session_id, "usuario": usuario, "inicio_sesion": inicio_sesion,
+                    "activa": True, "inicio": inicio, "actividad": actividad, "consultada": ahora
+                }
+                self._cachear(entrada)
+
+            caducidad = self._caducidad(entrada, ahora)
+            if caducidad is not None:
+                self._conexion.execute("DELETE FROM sesiones WHERE session_id = ?", (session_id,))
+                self._cache.pop(session_id, None)
+                self.metricas[caducidad] += 1
+                return None
+            if ahora - entrada["actividad"] >= self.ttl_cache:
+                actualizada = self._conexion.execute(
+                    "UPDATE sesiones SET actividad = ? WHERE session_id = ?", (ahora, session_id)
+                ).rowcount
+                if not actualizada:
+                    # Otro worker la cerró o la purgó
+                    self._cache.pop(session_id, None)
+                    return None
+                entrada["actividad"] = ahora
+            return self._copia(entrada, ahora)
+
+    def extender(self, session_id: str) -> Optional[Dict]:
+        """Extiende una sesión a pedido del cliente (ver AlmacenSesiones.extender)."""
+        with self._lock:
+            entrada = self._cache.get(session_id)
+            if entrada is not None:
+                # Se relee de la base compartida por si otro worker la cerró
+                entrada["consultada"] = float("-inf")
+            sesion = self.obtener(session_id)
+            if sesion is not None:
+                self.metricas["extendidas"] += 1
+            return sesion
+
+    def _caducidad(self, entrada: Dict[str, Any], ahora: float) -> Optional[str]:
+        if ahora - entrada["actividad"] >= self.inactividad_maxima:
+            return "caducadas_inactividad"
+        if ahora - entrada["inicio"] >= self.duracion_maxima:
+            return "caducadas_duracion"
+        return None
+
+    def _copia(self, entrada: Dict[str, Any], ahora: float) -> Dict:
+        restante = min(
+            self.inactividad_maxima - (ahora - entrada["actividad"]),
+            self.duracion_maxima - (ahora - entrada["inicio"])
+        )
+        sesion = {clave: entrada[clave] for clave in ("session_id", "usuario", "inicio_sesion", "activa")}
+        sesion["segundos_restantes"] = max(0, int(restante))
+        return sesion
+
+    def cerrar(self, session_id: str) -> bool:
+        """Cierra una sesión y la elimina (ver AlmacenSesiones.cerrar)."""
+        with self._lock:
+            self._cache.pop(session_id, None)
+            cerrada = self._conexion.execute("DELETE FROM sesiones WHERE session_id = ?", (session_id,)).rowcount
+            self.metricas["cerradas"] += cerrada
+            return bool(cerrada)
+
+    def cerrar_usuario(self, usuario: str) -> int:
+        """Cierra todas las sesiones de un usuario (ver AlmacenSesiones.cerrar_usuario)."""
+        with self._lock:
+            ids = [fila[0] for fila in self._conexion.execute(
+                "SELECT session_id FROM sesiones WHERE usuario = ?", (usuario,)
+            ).fetchall()]
+            for session_id in ids:
+                self._cache.pop(session_id, None)
+            cerradas = self._conexion.execute("DELETE FROM sesiones WHERE usuario = ?", (usuario,)).rowcount
+            self.metricas["cerradas"] += cerradas
+            return cerradas
+
+    def contar_usuario(self, usuario: str) -> int:
+        """Sesiones vivas de un usuario."""
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            fila = self._conexion.execute(
+                "SELECT sesiones FROM sesiones_por_usuario WHERE usuario = ?", (usuario,)
+            ).fetchone()
+            return fila[0] if fila is not None else 0
+
+    def sesiones_usuario(self, usuario: str) -> List[Dict]:
+        """Copia de las sesiones vivas de un usuario, de la más antigua a la más reciente."""
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            filas = self._conexion.execute(
+                "SELECT session_id, inicio_sesion FROM sesiones WHERE usuario = ? ORDER BY inicio", (usuario,)
+            ).fetchall()
+            return [
+                {"session_id": session_id, "usuario": usuario, "inicio_sesion": inicio_sesion, "activa": True}
+                for session_id, inicio_sesion in filas
+            ]
+
+    def purgar(self, maximo: Optional[int] = None) -> int:
+        """
+        Elimina las sesiones caducadas por inactividad o por duración, usando
+        los índices por actividad e inicio (ver AlmacenSesiones.purgar).
+        Antes de la primera caducidad posible no escribe en la base.
+        """
+        with self._lock:
+            ahora = self._reloj()
+            if ahora < self._proxima_caducidad:
+                return 0
+            limite = -1 if maximo is None else maximo
+            caducadas = 0
+            for columna, plazo, metrica in (("actividad", self.inactividad_maxima, "caducadas_inactividad"),
+                                            ("inicio", self.duracion_maxima, "caducadas_duracion")):
+                eliminadas = self._conexion.execute(
+                    f"DELETE FROM sesiones WHERE session_id IN "
+                    f"(SELECT session_id FROM sesiones WHERE {columna} <= ? ORDER BY {columna} LIMIT ?)",
+                    (ahora - plazo, limite)
+                ).rowcount
+                self.metricas[metrica] += eliminadas
+                caducadas += eliminadas
+                if limite >= 0:
+                    limite = max(limite - eliminadas, 0)
+            # Las sesiones que otros workers creen o toquen a partir de ahora no
+            # caducan antes del plazo más corto; las actuales, según su mínimo
+            self._proxima_caducidad = ahora + min(self.inactividad_maxima, self.duracion_maxima)
+            # Dos subconsultas: cada MIN por separado usa su índice
+            actividad, inicio = self._conexion.execute(
+                "SELECT (SELECT MIN(actividad) FROM sesiones), (SELECT MIN(inicio) FROM sesiones)"
+            ).fetchone()
+            if actividad is not None:
+                self._proxima_caducidad = min(
+                    self._proxima_caducidad,
+                    actividad + self.inactividad_maxima,
+                    inicio + self.duracion_maxima
+                )
+            return caducadas
+
+    def barrer(self) -> int:
+        """Barrido periódico acotado (ver AlmacenSesiones.barrer); no hay nivel en disco que purgar."""
+        with self._lock:
+            self.metricas["barridos"] += 1
+            return self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+
+    def recontar(self) -> int:
+        """Sesiones vivas según un recorrido completo de la tabla."""
+        with self._lock:
+            self.purgar(MAX_CADUCADAS_POR_BARRIDO)
+            return sum(1 for _ in self._conexion.execute("SELECT session_id FROM sesiones"))
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Sesiones vivas (de todos los workers) y métricas de este worker."""
+        with self._lock:
+            vivas = len(self)
+            usuarios = self._contador("usuarios")
+            return {
+                "sesiones_activas": vivas,
+                "usuarios_con_sesion": usuarios,
+                "inactividad_maxima_segundos": self.inactividad_maxima,
+                "duracion_maxima_segundos": self.duracion_maxima,
+                **self.metricas,
+                "caducadas": self.metricas["caducadas_inactividad"] + self.metricas["caducadas_duracion"]
+            }
+
+    def cerrar_conexion(self) -> None:
+        """Cierra la conexión con la base de sesiones."""
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,481 @@
+"""
+Instantáneas del Estado en Memoria - Sistema Avanzado
+====================================================
+
+Este módulo guarda en un archivo binario el estado que los gestores solo
+tienen en memoria (usuarios, contadores, sesiones, fecha del sistema) para
+recuperarlo al reiniciar o desplegar:
+- Una sección por gestor, cada una JSON comprimido con zlib y con CRC32
+- Escritura atómica: se escribe un archivo temporal y se renombra
+- Lectura perezosa: al abrir solo se lee la tabla de secciones del archivo
+  mapeado en memoria; cada sección se decodifica cuando su gestor la pide
+
+Formato (little-endian):
+    cabecera  MAGIA, versión (u16), creada (f64, epoch), secciones (u32)
+    tabla     por sección: longitud del nombre (u16), nombre UTF-8,
+              desplazamiento (u64), longitud (u64), crc32 (u32)
+    cuerpo    datos de las secciones
+
+Las secciones de gestores que este proceso no llegó a crear se copian tal
+cual de la instantánea anterior, así que guardar nunca pierde su estado.
+
+Con varios workers cada uno guarda su propia instantánea, porque el estado
+en memoria es de cada worker: al crear el almacén reserva una ranura (un
+cerrojo de archivo que mantiene mientras vive) y escribe la ruta configurada
+en la ranura 0 o `<nombre>.<n><extensión>` en la n. Así un worker reiniciado
+retoma su propio estado y ninguno pisa el de los demás. Si ahora hay menos
+workers, las instantáneas de las ranuras que sobran se fusionan al restaurar
+con la de la ranura n % workers, y se borran en cuanto su estado queda
+guardado en ésta.
+"""
+
+import asyncio
+import itertools
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: una sola ranura, sin cerrojo
+    fcntl = None
+
+
+MAGIA = b"SNAP"
+VERSION_FORMATO = 1
+
+# zlib rápido: la instantánea se reescribe a menudo y el tamaño importa menos
+NIVEL_COMPRESION = 1
+
+_CABECERA = struct.Struct("<4sHdI")
+_LONGITUD_NOMBRE = struct.Struct("<H")
+_ENTRADA = struct.Struct("<QQI")
+
+
+def a_columnas(registros: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Convierte registros con las mismas claves en columnas. Con muchos
+    registros el JSON resultante es mucho más corto y rápido de codificar
+    y decodificar que una lista de diccionarios.
+
+    Args:
+        registros (Dict[str, Dict[str, Any]]): Registros por clave
+
+    Returns:
+        Dict[str, Any]: Claves y una lista de valores por campo
+    """
+    campos = list(dict.fromkeys(campo for registro in registros.values() for campo in registro))
+    return {
+        "claves": list(registros),
+        "columnas": {campo: [registro.get(campo) for registro in registros.values()] for campo in campos}
+    }
+
+
+def de_columnas(datos: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Inversa de a_columnas()."""
+    campos = list(datos["columnas"])
+    filas = zip(*(datos["columnas"][campo] for campo in campos))
+    return {clave: dict(zip(campos, fila)) for clave, fila in zip(datos["claves"], filas)}
+
+
+class AlmacenInstantaneas:
+    """
+    Archivo de instantáneas con una sección por gestor, seguro entre hilos.
+    """
+
+    def __init__(self, ruta: Path):
+        """
+        Inicializa el almacén. El archivo no se abre hasta la primera lectura.
+
+        Args:
+            ruta (Path): Archivo de la instantánea
+        """
+        self.ruta = Path(ruta)
+        self._lock = threading.RLock()
+        self._proveedores: Dict[str, Callable[[], Any]] = {}
+        self._mapa: Optional[mmap.mmap] = None
+        # nombre -> (desplazamiento, longitud, crc32); None hasta abrir el archivo
+        self._tabla: Optional[Dict[str, Tuple[int, int, int]]] = None
+        self.creada: Optional[float] = None
+        self.metricas = {"guardadas": 0, "secciones_restauradas": 0, "errores": 0, "ultima_duracion_ms": 0.0}
+        # Instantáneas de ranuras sin worker que se fusionan con esta (ver get_instantaneas)
+        self.huerfanas: List["AlmacenInstantaneas"] = []
+
+    def _abrir(self) -> Dict[str, Tuple[int, int, int]]:
+        """Mapea el archivo en memoria y lee solo su tabla de secciones."""
+        if self._tabla is not None:
+            return self._tabla
+        self._tabla = {}
+        try:
+            with open(self.ruta, "rb") as archivo:
+                if os.fstat(archivo.fileno()).st_size < _CABECERA.size:
+                    return self._tabla
+                self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return self._tabla
+        except OSError as e:
+            self.metricas["errores"] += 1
+            print(f"⚠️ No se pudo abrir la instantánea {self.ruta}: {e}")
+            return self._tabla
+
+        try:
+            magia, version, creada, total = _CABECERA.unpack_from(self._mapa, 0)
+            if magia != MAGIA or version != VERSION_FORMATO:
+                raise ValueError("formato desconocido")
+            posicion = _CABECERA.size
+            tabla = {}
+            for _ in range(total):
+                (longitud_nombre,) = _LONGITUD_NOMBRE.unpack_from(self._mapa, posicion)
+                posicion += _LONGITUD_NOMBRE.size
+                nombre = bytes(self._mapa[posicion:posicion + longitud_nombre]).decode("utf-8")
+                posicion += longitud_nombre
+                desplazamiento, longitud, crc = _ENTRADA.unpack_from(self._mapa, posicion)
+                posicion += _ENTRADA.size
+                if desplazamiento + longitud > len(self._mapa):
+                    raise ValueError(f"sección '{nombre}' fuera del archivo")
+                tabla[nombre] = (desplazamiento, longitud, crc)
+        except (struct.error, ValueError, UnicodeDecodeError) as e:
+            self.metricas["errores"] += 1
+            print(f"⚠️ Instantánea {self.ruta} inválida, se ignora: {e}")
+            self._cerrar_mapa()
+            return self._tabla
+        self._tabla = tabla
+        self.creada = creada
+        return self._tabla
+
+    def _cerrar_mapa(self) -> None:
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+    def _datos(self, nombre: str) -> Optional[bytes]:
+        """Bytes de una sección si existe y su CRC es correcto."""
+        entrada = self._abrir().get(nombre)
+        if entrada is None:
+            return None
+        desplazamiento, longitud, crc = entrada
+        datos = self._mapa[desplazamiento:desplazamiento + longitud]
+        if zlib.crc32(datos) != crc:
+            self.metricas["errores"] += 1
+            print(f"⚠️ Sección '{nombre}' de la instantánea corrupta, se ignora")
+            return None
+        return datos
+
+    def seccion(self, nombre: str) -> Optional[Any]:
+        """
+        Decodifica una sección de la última instantánea.
+
+        Args:
+            nombre (str): Nombre de la sección
+
+        Returns:
+            Optional[Any]: Estado guardado, o None si no hay instantánea, la
+            sección no existe o está corrupta
+        """
+        with self._lock:
+            datos = self._datos(nombre)
+            if datos is None:
+                return None
+            try:
+                estado = json.loads(zlib.decompress(datos).decode("utf-8"))
+            except (zlib.error, ValueError) as e:
+                self.metricas["errores"] += 1
+                print(f"⚠️ Sección '{nombre}' de la instantánea ilegible, se ignora: {e}")
+                return None
+            self.metricas["secciones_restauradas"] += 1
+            return estado
+
+    def secciones(self) -> List[str]:
+        """Nombres de las secciones de la última instantánea y de las huérfanas (solo lee las tablas)."""
+        with self._lock:
+            nombres = set(self._abrir())
+            for huerfana in self.huerfanas:
+                nombres.update(huerfana.secciones())
+            return sorted(nombres)
+
+    def restaurables(self, nombre: str) -> List[Tuple[Any, float]]:
+        """
+        Estados de una sección a restaurar: el de cada huérfana que la tenga
+        y, al final, el de esta instantánea, que prevalece si el gestor los
+        carga uno tras otro.
+
+        Args:
+            nombre (str): Nombre de la sección
+
+        Returns:
+            List[Tuple[Any, float]]: Pares (estado, segundos desde que se guardó)
+        """
+        with self._lock:
+            estados = []
+            for almacen in (*self.huerfanas, self):
+                estado = almacen.seccion(nombre)
+                if estado is not None:
+                    estados.append((estado, almacen.edad() or 0.0))
+            return estados
+
+    def edad(self) -> Optional[float]:
+        """Segundos desde que se escribió la última instantánea (None si no hay)."""
+        with self._lock:
+            self._abrir()
+            return None if self.creada is None else max(0.0, time.time() - self.creada)
+
+    def registrar(self, nombre: str, exportar: Callable[[], Any]) -> None:
+        """
+        Registra un gestor cuyo estado se incluirá en cada instantánea.
+
+        Args:
+            nombre (str): Nombre de la sección
+            exportar: Devuelve el estado del gestor como datos serializables en JSON
+        """
+        with self._lock:
+            self._proveedores[nombre] = exportar
+
+    def capturar(self) -> Dict[str, Any]:
+        """
+        Exporta el estado de los gestores registrados (solo copia; la
+        codificación y la escritura se hacen en escribir()).
+
+        Returns:
+            Dict[str, Any]: Estado de cada sección
+        """
+        with self._lock:
+            proveedores = list(self._proveedores.items())
+        return {nombre: exportar() for nombre, exportar in proveedores}
+
+    def escribir(self, capturadas: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Escribe una instantánea nueva de forma atómica: archivo temporal,
+        fsync y renombrado, así que un corte deja la anterior o la nueva
+        completa, nunca una a medias.
+
+        Args:
+            capturadas (Dict[str, Any]): Estado por sección (ver capturar())
+
+        Returns:
+            Dict[str, Any]: Secciones, bytes escritos y duración
+        """
+        inicio = time.perf_counter()
+        codificadas = {
+            nombre: zlib.compress(
+                json.dumps(estado, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), NIVEL_COMPRESION
+            )
+            for nombre, estado in capturadas.items()
+        }
+        with self._lock:
+            # Las secciones de gestores que no existen en este proceso se conservan
+            for nombre in self._abrir():
+                if nombre not in codificadas:
+                    datos = self._datos(nombre)
+                    if datos is not None:
+                        codificadas[nombre] = datos
+
+            nombres = [nombre.encode("utf-8") for nombre in codificadas]
+            desplazamiento = _CABECERA.size + sum(
+                _LONGITUD_NOMBRE.size + len(nombre) + _ENTRADA.size for nombre in nombres
+            )
+            partes = [_CABECERA.pack(MAGIA, VERSION_FORMATO, time.time(), len(codificadas))]
+            for nombre, datos in zip(nombres, codificadas.values()):
+                partes.append(_LONGITUD_NOMBRE.pack(len(nombre)) + nombre)
+                partes.append(_ENTRADA.pack(desplazamiento, len(datos), zlib.crc32(datos)))
+                desplazamiento += len(datos)
+            partes.extend(codificadas.values())
+
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            temporal = self.ruta.with_name(f"{self.ruta.name}.{os.getpid()}.tmp")
+            try:
+                with open(temporal, "wb") as archivo:
+                    for parte in partes:
+                        archivo.write(parte)
+                    archivo.flush()
+                    os.fsync(archivo.fileno())
+                os.replace(temporal, self.ruta)
+            except BaseException:
+                temporal.unlink(missing_ok=True)
+                raise
+            # El renombrado es durable cuando se sincroniza el directorio
+            directorio = os.open(self.ruta.parent, os.O_RDONLY)
+            try:
+                os.fsync(directorio)
+            finally:
+                os.close(directorio)
+
+            # La próxima lectura mapea el archivo nuevo
+            self._cerrar_mapa()
+            self._tabla = None
+            self._descartar_huerfanas(codificadas)
+            self.metricas["guardadas"] += 1
+            self.metricas["ultima_duracion_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+            return {
+                "secciones": len(codificadas),
+                "bytes": desplazamiento,
+                "duracion_ms": self.metricas["ultima_duracion_ms"]
+            }
+
+    def _descartar_huerfanas(self, guardadas: Dict[str, Any]) -> None:
+        """Borra las huérfanas cuyas secciones ya están todas en la instantánea recién escrita."""
+        for huerfana in list(self.huerfanas):
+            if set(huerfana.secciones()) <= set(guardadas):
+                huerfana.cerrar()
+                huerfana.ruta.unlink(missing_ok=True)
+                self.huerfanas.remove(huerfana)
+
+    def guardar(self) -> Dict[str, Any]:
+        """
+        Captura y escribe una instantánea en el hilo que llama.
+
+        Raises:
+            Exception: El error del gestor al exportar o de la escritura,
+                contado en metricas["errores"]
+        """
+        try:
+            return self.escribir(self.capturar())
+        except Exception:
+            with self._lock:
+                self.metricas["errores"] += 1
+            raise
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Ruta, secciones y edad de la última instantánea y métricas de uso."""
+        with self._lock:
+            return {
+                "ruta": str(self.ruta),
+                "secciones": self.secciones(),
+                "edad_segundos": None if self.creada is None else round(max(0.0, time.time() - self.creada), 3),
+                "huerfanas_pendientes": len(self.huerfanas),
+                **self.metricas
+            }
+
+    def cerrar(self) -> None:
+        """Libera el mapeo del archivo."""
+        with self._lock:
+            self._cerrar_mapa()
+            self._tabla = None
+
+
+def ruta_ranura(ruta: Path, ranura: int) -> Path:
+    """Instantánea de una ranura: la ruta configurada en la 0, `<nombre>.<n><extensión>` en las demás."""
+    return ruta if ranura == 0 else ruta.with_name(f"{ruta.stem}.{ranura}{ruta.suffix}")
+
+
+def _cerrojo_ranura(ruta: Path, ranura: int) -> Optional[int]:
+    """
+    Intenta tomar el cerrojo de una ranura sin esperar. El sistema lo
+    suelta al terminar el proceso, así que un worker que muere libera su
+    ranura para el que lo reemplaza.
+
+    Returns:
+        Optional[int]: Descriptor que mantiene el cerrojo, o None si otro
+        proceso tiene la ranura
+    """
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    descriptor = os.open(ruta.with_name(f"{ruta.name}.{ranura}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(descriptor)
+        return None
+    return descriptor
+
+
+def reservar_ranura(ruta: Path, workers: int) -> Tuple[int, List[int]]:
+    """
+    Reserva la primera ranura libre y las ranuras huérfanas que le tocan:
+    las que tienen instantánea, están a partir de `workers`, corresponden a
+    esta ranura (n % workers) y no tienen proceso.
+
+    Args:
+        ruta (Path): Ruta configurada de la instantánea
+        workers (int): Workers con los que se despliega
+
+    Returns:
+        Tuple[int, List[int]]: Ranura propia y ranuras huérfanas adoptadas
+    """
+    if fcntl is None:
+        return 0, []
+    for ranura in itertools.count():
+        descriptor = _cerrojo_ranura(ruta, ranura)
+        if descriptor is not None:
+            _cerrojos.append(descriptor)
+            break
+    workers = max(1, workers)
+    adoptadas = []
+    for candidata in ruta.parent.glob(f"{ruta.stem}.*{ruta.suffix}"):
+        numero = candidata.name[len(ruta.stem) + 1:len(candidata.name) - len(ruta.suffix)]
+        if not numero.isdigit() or int(numero) < workers or int(numero) % workers != ranura % workers:
+            continue
+        descriptor = _cerrojo_ranura(ruta, int(numero))
+        if descriptor is not None:
+            _cerrojos.append(descriptor)
+            adoptadas.append(int(numero))
+    return ranura, sorted(adoptadas)
+
+
+# Instancia global, creada en el primer uso (None si SNAPSHOT_PATH está vacío),
+# y cerrojos de ranura que este proceso mantiene hasta terminar
+_instantaneas: Optional[AlmacenInstantaneas] = None
+_instantaneas_lock = threading.Lock()
+_cerrojos: List[int] = []
+
+
+def get_instantaneas() -> Optional[AlmacenInstantaneas]:
+    """
+    Obtiene el almacén de instantáneas global, creándolo si no existe. Cada
+    proceso usa la instantánea de la ranura que reserva (ver reservar_ranura).
+
+    Returns:
+        Optional[AlmacenInstantaneas]: Almacén compartido por el proceso, o
+        None si las instantáneas están desactivadas
+    """
+    global _instantaneas
+    if _instantaneas is None and settings.snapshot_path:
+        with _instantaneas_lock:
+            if _instantaneas is None:
+                ruta = Path(settings.snapshot_path)
+                ranura, adoptadas = reservar_ranura(ruta, settings.server_workers)
+                almacen = AlmacenInstantaneas(ruta_ranura(ruta, ranura))
+                almacen.huerfanas = [AlmacenInstantaneas(ruta_ranura(ruta, n)) for n in adoptadas]
+                _instantaneas = almacen
+    return _instantaneas
+
+
+async def guardar_instantaneas(intervalo: float) -> None:
+    """
+    Guarda una instantánea cada `intervalo` segundos hasta ser cancelada.
+    Captura, codificación y escritura corren en el pool de E/S; los gestores
+    solo retienen sus locks mientras copian su estado.
+
+    Args:
+        intervalo (float): Segundos entre instantáneas
+    """
+    from ..utils.async_io import io_executor
+
+    while True:
+        await asyncio.sleep(intervalo)
+        almacen = _instantaneas
+        if almacen is None or not almacen._proveedores:
+            continue
+        try:
+            await io_executor.run(almacen.guardar)
+        except Exception as e:
+            # Ya contado en almacen.metricas["errores"]; la siguiente vuelta lo reintenta
+            print(f"⚠️ Error al guardar la instantánea: {e}")
+
+
+def guardar_al_cerrar() -> None:
+    """Guarda una última instantánea al apagar, si algún gestor se registró."""
+    almacen = _instantaneas
+    if almacen is None or not almacen._proveedores:
+        return
+    try:
+        almacen.guardar()
+    except Exception as e:
+        print(f"⚠️ Error al guardar la instantánea: {e}")
+    almacen.cerrar()
@@ -8,14 +8,99 @@ and string operators as specified in the project requirements.
 Features:
 - User registration with validation
 - Generation of personalized welcome messages
-- Active session management
+- Active session management with idle and absolute expiry (see session_store)
 - String concatenation for dynamic messages
 """
 
 from datetime import datetime
-from typing import Dict, Optional
-import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+import asyncio
+import functools
 import re
+import threading
+import time
+
+from ..core.config import settings
+from .session_store import AlmacenSesiones, AlmacenSesionesCompartido, DURACION_MAXIMA, INACTIVIDAD_MAXIMA
+from .snapshot_store import a_columnas, de_columnas, get_instantaneas
+from ..utils.locks import AtomicCounters, StripedLock
+
+
+# Username rules, checked on every login with a pattern compiled once
+LONGITUD_MINIMA_NOMBRE = 2
+LONGITUD_MAXIMA_NOMBRE = 20
+_PATRON_NOMBRE = re.compile(r"[a-zA-Z0-9_-]+")
+
+# Fixed messages of the user manager and the /users routes, concatenated
+# once at import time instead of on every request
+MENSAJES_USUARIO = {
+    "nombre_vacio": "El " + "nombre " + "no puede estar " + "vacío",
+    "nombre_corto": "El " + "nombre " + "debe tener al menos " + str(LONGITUD_MINIMA_NOMBRE) + " caracteres",
+    "nombre_largo": "El " + "nombre " + "no puede tener más de " + str(LONGITUD_MAXIMA_NOMBRE) + " caracteres",
+    "nombre_caracteres": "El " + "nombre " + "solo puede contener " + "letras, números, guiones y guiones bajos",
+    "login_exitoso": "Login exitoso con concatenación de cadenas implementada",
+    "usuario_cambiado": "Usuario cambiado exitosamente",
+    "sin_usuario": "No hay usuario logueado",
+    "usuario_obtenido": "Información de usuario obtenida",
+    "sesion_extendida": "Sesión extendida",
+    "sesion_caducada": "La sesión no existe o ha caducado",
+    "estadisticas_usuarios": "Estadísticas de usuarios obtenidas",
+}
+
+# Welcome message templates: the per-user part is cached by (name, type)
+_BIENVENIDA_NUEVO = (
+    " Bienvenido al " + "Sistema Avanzado" + " de " + "Gestión de Archivos" + " con " + "Conceptos de Programación"
+    + "\\n" + "Como usuario " + "nuevo, " + "tendrás acceso a todas las " + "funcionalidades " + "del sistema."
+)
+_BIENVENIDA_REGISTRADO = "\\n" + "Has accedido al " + "Sistema Avanzado" + " de " + "Gestión de Archivos"
+_SESIONES_ANTERIORES = "\\n" + "Sesiones anteriores: "
+_SESION_INICIADA = "\\n" + "Sesión iniciada: "
+
+
+def validar_nombre(nombre: str) -> Tuple[bool, str]:
+    """
+    Validate a username (surrounding whitespace is ignored).
+    
+    Args:
+        nombre (str): Name to validate
+        
+    Returns:
+        Tuple[bool, str]: (is_valid, error_message)
+    """
+    nombre = nombre.strip()
+    
+    if not nombre:
+        return False, MENSAJES_USUARIO["nombre_vacio"]
+    if len(nombre) < LONGITUD_MINIMA_NOMBRE:
+        return False, MENSAJES_USUARIO["nombre_corto"]
+    if len(nombre) > LONGITUD_MAXIMA_NOMBRE:
+        return False, MENSAJES_USUARIO["nombre_largo"]
+    if _PATRON_NOMBRE.fullmatch(nombre) is None:
+        return False, MENSAJES_USUARIO["nombre_caracteres"]
+    return True, ""
+
+
+@functools.lru_cache(maxsize=4096)
+def _saludo_registrado(nombre: str, tipo: str) -> str:
+    """Greeting and header of a registered user's welcome message."""
+    return "¡Bienvenido de nuevo " + nombre + "!" + " (Usuario " + tipo + ")" + _BIENVENIDA_REGISTRADO + _SESIONES_ANTERIORES
+
+
+# Last formatted login time as (second, text); logins within the same
+# second share it instead of calling strftime again
+_marca_sesion = (0, "")
+
+
+def _fecha_sesion() -> str:
+    """Current time as dd/mm/YYYY HH:MM:SS, formatted at most once per second."""
+    global _marca_sesion
+    segundo = int(time.time())
+    marca = _marca_sesion
+    if marca[0] != segundo:
+        marca = (segundo, datetime.fromtimestamp(segundo).strftime("%d/%m/%Y %H:%M:%S"))
+        _marca_sesion = marca
+    return marca[1]
 
 
 class UserManager:
@@ -24,18 +109,40 @@ class UserManager:
     Implements string concatenation and string operators.
     """
     
-    def __init__(self):
+    def __init__(self, inactividad_sesion: float = INACTIVIDAD_MAXIMA,
+                 duracion_sesion: float = DURACION_MAXIMA, verificar_estadisticas: bool = False,
+                 sesiones: Optional[Union[AlmacenSesiones, AlmacenSesionesCompartido]] = None,
+                 max_sesiones_residentes: Optional[int] = None):
         """
         Initialize the user manager.
         
+        Args:
+            inactividad_sesion (float): Seconds without activity before a session expires
+            duracion_sesion (float): Seconds after login before a session always expires
+            verificar_estadisticas (bool): Compare the running counters against a
+                full recount on every statistics read (consistency check mode)
+            sesiones: Session store to use instead of an in-process one, e.g. an
+                AlmacenSesionesCompartido so any worker can serve any session
+            max_sesiones_residentes (Optional[int]): Sessions the in-process store
+                keeps in memory; the least recently active ones beyond this
+                move to disk (None for no limit)
+        
         Attributes:
             usuarios_registrados (Dict): Dictionary of registered users
-            sesiones_activas (Dict): Dictionary of active sessions
-            usuario_actual (Optional[str]): Currently logged in user
+            sesiones_activas: Live sessions, indexed by ID and by user
+            contadores (AtomicCounters): Running totals behind the user statistics
         """
         self.usuarios_registrados: Dict[str, Dict] = {}
-        self.sesiones_activas: Dict[str, Dict] = {}
-        self.usuario_actual: Optional[str] = None
+        self.sesiones_activas = sesiones if sesiones is not None else AlmacenSesiones(
+            inactividad_sesion, duracion_sesion, max_residentes=max_sesiones_residentes
+        )
+        self.verificar_estadisticas = verificar_estadisticas
+        
+        # Updated on each login so statistics never scan users or sessions
+        self.contadores = AtomicCounters(("usuarios_con_sesiones", "sesiones_totales"))
+        
+        # Per-user locks: registering or logging in one user never waits on another
+        self._locks_usuarios = StripedLock()
         
         # Create some example users
         self._inicializar_usuarios_ejemplo()
@@ -77,28 +184,7 @@ class UserManager:
         Returns:
             tuple[bool, str]: (is_valid, error_message)
         """
-        # Clean input
-        nombre = nombre.strip()
-        
-        # Validations with string operators
-        if not nombre:
-            mensaje_error = "El " + "nombre " + "no puede estar " + "vacío"
-            return False, mensaje_error
-        
-        if len(nombre) < 2:
-            mensaje_error = "El " + "nombre " + "debe tener al menos " + "2 caracteres"
-            return False, mensaje_error
-        
-        if len(nombre) > 20:
-            mensaje_error = "El " + "nombre " + "no puede tener más de " + "20 caracteres"
-            return False, mensaje_error
-        
-        # Check valid characters
-        if not re.match("^[a-zA-Z0-9_-]+$", nombre):
-            mensaje_error = "El " + "nombre " + "solo puede contener " + "letras, números, guiones y guiones bajos"
-            return False, mensaje_error
-        
-        return True, ""
+        return validar_nombre(nombre)
     
     def registrar_usuario(self, nombre: str, tipo: str = "usuario") -> Dict:
         """
@@ -120,11 +206,6 @@ class UserManager:
         if not es_valido:
             raise ValueError(mensaje_error)
         
-        # Verificar si ya existe
-        if nombre in self.usuarios_registrados:
-            mensaje_error = "El usuario " + nombre + " ya está " + "registrado"
-            raise ValueError(mensaje_error)
-        
         # Crear descripción con concatenación
         descripcion_base = "Usuario " + tipo + " registrado en "
         descripcion_fecha = "el sistema " + "avanzado de gestión"
@@ -140,10 +221,15 @@ class UserManager:
             "sesiones_totales": 0
         }
         
-        self.usuarios_registrados[nombre] = usuario_info
+        # Verificar si ya existe y registrar sin que otro hilo se adelante
+        with self._locks_usuarios(nombre):
+            if nombre in self.usuarios_registrados:
+                mensaje_error = "El usuario " + nombre + " ya está " + "registrado"
+                raise ValueError(mensaje_error)
+            self.usuarios_registrados[nombre] = usuario_info
         
         # Generar mensaje de confirmación con concatenación
-        mensaje_confirmacion = "¡Usuario " + nombre + " registrado " + "exitosamente!"
+        mensaje_confirmacion = "¡Usuario " + nombre + " registrado exitosamente!"
         
         return {
             "mensaje": mensaje_confirmacion,
@@ -166,31 +252,14 @@ class UserManager:
         
         if not usuario_info:
             # Mensaje para usuario no registrado
-            saludo = "¡Hola " + nombre + "!"
-            presentacion = " Bienvenido al " + "Sistema Avanzado" + " de "
-            funcionalidad = "Gestión de Archivos" + " con " + "Conceptos de Programación"
-            mensaje_base = saludo + presentacion + funcionalidad
-            
-            info_adicional = "\\n" + "Como usuario " + "nuevo, " + "tendrás acceso a todas las "
-            caracteristicas = "funcionalidades " + "del sistema."
-            mensaje_completo = mensaje_base + info_adicional + caracteristicas
+            mensaje_completo = "¡Hola " + nombre + "!" + _BIENVENIDA_NUEVO
         else:
-            # Mensaje personalizado para usuario registrado
-            saludo = "¡Bienvenido de nuevo " + nombre + "!"
-            tipo_usuario = " (Usuario " + usuario_info["tipo"] + ")"
-            presentacion = "\\n" + "Has accedido al " + "Sistema Avanzado"
-            funcionalidad = " de " + "Gestión de Archivos"
-            
-            # Información de sesión
-            sesiones = str(usuario_info["sesiones_totales"])
-            info_sesion = "\\n" + "Sesiones anteriores: " + sesiones
-            
-            mensaje_completo = saludo + tipo_usuario + presentacion + funcionalidad + info_sesion
+            # Mensaje personalizado para usuario registrado: el saludo se
+            # reutiliza entre logins y solo se añaden las sesiones anteriores
+            mensaje_completo = _saludo_registrado(nombre, usuario_info["tipo"]) + str(usuario_info["sesiones_totales"])
         
         # Agregar timestamp con concatenación
-        fecha_actual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        timestamp = "\\n" + "Sesión iniciada: " + fecha_actual
-        mensaje_final = mensaje_completo + timestamp
+        mensaje_final = mensaje_completo + _SESION_INICIADA + _fecha_sesion()
         
         return mensaje_final
     
@@ -212,26 +281,22 @@ class UserManager:
         if not es_valido:
             raise ValueError(mensaje_error)
         
-        # Registrar automáticamente si no existe (como se pide en los requisitos)
-        if nombre not in self.usuarios_registrados:
-            self.registrar_usuario(nombre, "invitado")
-        
-        # Actualizar información del usuario
-        usuario_info = self.usuarios_registrados[nombre]
-        usuario_info["ultima_conexion"] = datetime.now().isoformat()
-        usuario_info["sesiones_totales"] += 1
+        with self._locks_usuarios(nombre):
+            # Registrar automáticamente si no existe (como se pide en los requisitos)
+            if nombre not in self.usuarios_registrados:
+                self.registrar_usuario(nombre, "invitado")
+            
+            # Actualizar información del usuario
+            usuario_info = self.usuarios_registrados[nombre]
+            if usuario_info["ultima_conexion"] is None:
+                self.contadores.increment("usuarios_con_sesiones")
+            usuario_info["ultima_conexion"] = datetime.now().isoformat()
+            usuario_info["sesiones_totales"] += 1
+            self.contadores.increment("sesiones_totales")
+            usuario_info = dict(usuario_info)
         
         # Crear sesión
-        session_id = str(uuid.uuid4())
-        session_info = {
-            "session_id": session_id,
-            "usuario": nombre,
-            "inicio_sesion": datetime.now().isoformat(),
-            "activa": True
-        }
-        
-        self.sesiones_activas[session_id] = session_info
-        self.usuario_actual = nombre
+        session_id = self.sesiones_activas.crear(nombre)["session_id"]
         
         # Generar mensaje de bienvenida
         mensaje_bienvenida = self.generar_mensaje_bienvenida(nombre)
@@ -243,31 +308,35 @@ class UserManager:
             "timestamp": datetime.now().isoformat()
         }
     
-    def cambiar_usuario(self, nombre_nuevo: str) -> Dict:
+    def cambiar_usuario(self, nombre_nuevo: str, session_id: Optional[str] = None) -> Dict:
         """
         Cambia el usuario actual del sistema.
         Implementa la funcionalidad "Cambiar de usuario" requerida.
         
+        Con session_id se cierra esa sesión y el cambio afecta únicamente al
+        cliente que la envía; sin él no hay usuario anterior y solo se inicia
+        la nueva sesión (las sesiones de los demás clientes no se tocan).
+        
         Args:
             nombre_nuevo (str): Nombre del nuevo usuario
+            session_id (Optional[str]): Sesión del cliente que cambia de usuario
             
         Returns:
-            Dict: Información del cambio de usuario
+            Dict: Información del cambio de usuario (la nueva sesión trae su session_id)
         """
-        usuario_anterior = self.usuario_actual
-        
-        # Cerrar sesión anterior si existe
-        if usuario_anterior:
-            self._cerrar_sesiones_usuario(usuario_anterior)
+        sesion = self.sesiones_activas.obtener(session_id) if session_id else None
+        usuario_anterior = sesion["usuario"] if sesion else None
         
-        # Iniciar nueva sesión
+        # Iniciar la nueva sesión antes de cerrar la anterior por si el nombre no es válido
         nueva_sesion = self.iniciar_sesion(nombre_nuevo)
+        if sesion:
+            self.sesiones_activas.cerrar(session_id)
         
         # Generar mensaje de cambio con concatenación
         if usuario_anterior:
             mensaje_cambio = "Usuario cambiado de " + usuario_anterior + " a " + nombre_nuevo
         else:
-            mensaje_cambio = "Usuario " + nombre_nuevo + " ha iniciado " + "sesión"
+            mensaje_cambio = "Usuario " + nombre_nuevo + " ha iniciado sesión"
         
         return {
             "mensaje_cambio": mensaje_cambio,
@@ -284,45 +353,77 @@ class UserManager:
         Args:
             nombre (str): Nombre del usuario
         """
-        sesiones_a_cerrar = []
-        for session_id, session_info in self.sesiones_activas.items():
-            if session_info["usuario"] == nombre and session_info["activa"]:
-                sesiones_a_cerrar.append(session_id)
+        self.sesiones_activas.cerrar_usuario(nombre)
+    
+    def tocar_sesion(self, session_id: str) -> Optional[Dict]:
+        """
+        Registra actividad en una sesión (cualquier petición que la identifique).
+        
+        Args:
+            session_id (str): Identificador devuelto por iniciar_sesion
+            
+        Returns:
+            Optional[Dict]: Sesión con sus segundos restantes o None si caducó
+        """
+        return self.sesiones_activas.obtener(session_id)
+    
+    def extender_sesion(self, session_id: str) -> Optional[Dict]:
+        """
+        Extiende una sesión a pedido del cliente (reinicia su plazo de inactividad).
         
-        for session_id in sesiones_a_cerrar:
-            self.sesiones_activas[session_id]["activa"] = False
-            self.sesiones_activas[session_id]["fin_sesion"] = datetime.now().isoformat()
+        Args:
+            session_id (str): Identificador devuelto por iniciar_sesion
+            
+        Returns:
+            Optional[Dict]: Sesión con sus segundos restantes o None si caducó
+        """
+        return self.sesiones_activas.extender(session_id)
     
-    def obtener_usuario_actual(self) -> Optional[Dict]:
+    def obtener_usuario_actual(self, session_id: Optional[str] = None) -> Optional[Dict]:
         """
         Obtiene información del usuario actual.
         
+        Args:
+            session_id (Optional[str]): Sesión del cliente; el usuario se resuelve
+                a partir de ella
+        
         Returns:
-            Optional[Dict]: Información del usuario actual o None
+            Optional[Dict]: Información del usuario actual o None (sin sesión,
+            o si la sesión no existe o caducó)
         """
-        if not self.usuario_actual:
+        if not session_id:
+            return None
+        sesion = self.sesiones_activas.obtener(session_id)
+        if sesion is None:
             return None
+        nombre = sesion["usuario"]
         
         return {
-            "nombre": self.usuario_actual,
-            "info": self.usuarios_registrados.get(self.usuario_actual),
-            "sesiones_activas": len([s for s in self.sesiones_activas.values() 
-                                   if s["usuario"] == self.usuario_actual and s["activa"]])
+            "nombre": nombre,
+            "info": self.usuarios_registrados.get(nombre),
+            "sesiones_activas": self.sesiones_activas.contar_usuario(nombre)
         }
     
     def obtener_estadisticas_usuarios(self) -> Dict:
         """
         Obtiene estadísticas generales de usuarios.
-        Útil para el reporte final.
+        Útil para el reporte final. Lee contadores mantenidos en cada login
+        y en el almacén de sesiones, sin recorrer usuarios ni sesiones.
         
         Returns:
             Dict: Estadísticas de usuarios del sistema
+            
+        Raises:
+            RuntimeError: En modo de verificación, si algún contador no
+                coincide con el recuento completo
         """
+        if self.verificar_estadisticas:
+            self.verificar_contadores()
+        
         total_usuarios = len(self.usuarios_registrados)
-        usuarios_activos = len([u for u in self.usuarios_registrados.values() 
-                               if u["ultima_conexion"]])
-        sesiones_totales = sum(u["sesiones_totales"] for u in self.usuarios_registrados.values())
-        sesiones_activas = len([s for s in self.sesiones_activas.values() if s["activa"]])
+        usuarios_activos = self.contadores["usuarios_con_sesiones"]
+        sesiones_totales = self.contadores["sesiones_totales"]
+        sesiones_activas = len(self.sesiones_activas)
         
         # Concatenación de cadenas para descripciones
         descripcion_sistema = "Sistema " + "avanzado " + "de " + "gestión " + "de " + "usuarios"
@@ -333,10 +434,147 @@ class UserManager:
             "usuarios_con_sesiones": usuarios_activos,
             "total_sesiones_historicas": sesiones_totales,
             "sesiones_actualmente_activas": sesiones_activas,
-            "usuario_actual": self.usuario_actual,
+            "sesiones": self.sesiones_activas.estadisticas(),
             "timestamp": datetime.now().isoformat()
         }
 
+    
+    def recontar_estadisticas(self) -> Dict[str, int]:
+        """
+        Recalcula los contadores recorriendo todos los usuarios y sesiones.
+        
+        Returns:
+            Dict[str, int]: Valores del recuento completo, con las mismas claves
+            que `contadores` más "sesiones_activas"
+        """
+        return {
+            "usuarios_con_sesiones": sum(1 for u in self.usuarios_registrados.values() if u["ultima_conexion"]),
+            "sesiones_totales": sum(u["sesiones_totales"] for u in self.usuarios_registrados.values()),
+            "sesiones_activas": self.sesiones_activas.recontar()
+        }
+    
+    def verificar_contadores(self) -> None:
+        """
+        Compara los contadores con un recuento completo. Detiene los logins
+        mientras recuenta para comparar un estado consistente; las sesiones
+        las comprueba el propio almacén contra sus índices.
+        
+        Raises:
+            RuntimeError: Si algún contador no coincide
+        """
+        with self._locks_usuarios.all():
+            recuento = self.recontar_estadisticas()
+            actuales = self.contadores.snapshot()
+        diferencias = [
+            clave + ": " + str(actuales[clave]) + " != " + str(recuento[clave])
+            for clave in actuales if actuales[clave] != recuento[clave]
+        ]
+        if diferencias:
+            raise RuntimeError("Contadores de usuarios inconsistentes: " + ", ".join(diferencias))
+    
+    def exportar_estado(self) -> Dict[str, Any]:
+        """
+        Copy the in-memory state for a snapshot (see snapshot_store).
+        Takes no user locks: each dict copy is atomic, and the counters are
+        recounted from the users on restore, so they cannot disagree.
+        
+        Returns:
+            Dict[str, Any]: Registered users (as columns) and, with the
+            in-process session store, the live sessions
+        """
+        usuarios = {nombre: dict(info) for nombre, info in dict(self.usuarios_registrados).items()}
+        estado = {"usuarios": a_columnas(usuarios)}
+        # The shared store already persists its sessions in SQLite
+        if isinstance(self.sesiones_activas, AlmacenSesiones):
+            estado["sesiones"] = self.sesiones_activas.exportar()
+        return estado
+    
+    def restaurar_estado(self, estado: Dict[str, Any], transcurrido: float = 0.0) -> None:
+        """
+        Load a snapshot taken by exportar_estado(). Counters are recounted
+        from the restored users so they always match them.
+        
+        Args:
+            estado (Dict[str, Any]): Exported state
+            transcurrido (float): Seconds since the snapshot was taken
+        """
+        with self._locks_usuarios.all():
+            self.usuarios_registrados.update(de_columnas(estado["usuarios"]))
+            recuento = self.recontar_estadisticas()
+            actuales = self.contadores.snapshot()
+            for clave in actuales:
+                self.contadores.increment(clave, recuento[clave] - actuales[clave])
+        if "sesiones" in estado and isinstance(self.sesiones_activas, AlmacenSesiones):
+            self.sesiones_activas.restaurar(estado["sesiones"], transcurrido)
+
+
+# Global user manager instance, created on first use so that importing the
+# module stays free of side effects
+_user_manager: Optional[UserManager] = None
+_user_manager_lock = threading.Lock()
+
+
+def get_user_manager() -> UserManager:
+    """
+    Get the global user manager, creating it on first use.
+    
+    Returns:
+        UserManager: User manager shared by the process
+    """
+    global _user_manager
+    if _user_manager is None:
+        with _user_manager_lock:
+            if _user_manager is None:
+                sesiones = None
+                if settings.session_store == "sqlite":
+                    sesiones = AlmacenSesionesCompartido(
+                        Path(settings.session_db_path),
+                        inactividad_maxima=settings.session_idle_timeout,
+                        duracion_maxima=settings.session_max_age,
+                        ttl_cache=settings.session_cache_ttl
+                    )
+                user_manager = UserManager(
+                    sesiones=sesiones,
+                    inactividad_sesion=settings.session_idle_timeout,
+                    duracion_sesion=settings.session_max_age,
+                    verificar_estadisticas=settings.user_stats_check,
+                    max_sesiones_residentes=settings.session_max_resident or None
+                )
+                # Pick up where the last snapshot left off and take part in the next ones
+                instantaneas = get_instantaneas()
+                if instantaneas is not None:
+                    for estado, edad in instantaneas.restaurables("usuarios"):
+                        user_manager.restaurar_estado(estado, edad)
+                    instantaneas.registrar("usuarios", user_manager.exportar_estado)
+                _user_manager = user_manager
+    return _user_manager
+
+
+async def barrer_sesiones(intervalo: float) -> None:
+    """
+    Expire idle sessions every `intervalo` seconds. The sweep runs on the
+    I/O pool, since with SESSION_STORE=sqlite it deletes rows from the
+    shared database. Runs until cancelled; does nothing while no user
+    manager exists yet.
+    
+    Args:
+        intervalo (float): Seconds between sweeps
+    """
+    from ..utils.async_io import io_executor
+
+    while True:
+        await asyncio.sleep(intervalo)
+        if _user_manager is None:
+            continue
+        try:
+            await io_executor.run(_user_manager.sesiones_activas.barrer)
+        except Exception as e:
+            # The next sweep retries; expired sessions are also dropped on access
+            print(f"⚠️ Error sweeping sessions: {e}")
+
 
-# Instancia global del gestor de usuarios
-user_manager = UserManager()
\ No newline at end of file
+def __getattr__(name: str):
+    """Keep `from user_manager import user_manager` working by creating the instance on access."""
+    if name == "user_manager":
+        return get_user_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
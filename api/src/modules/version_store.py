@@ -0,0 +1,222 @@
+"""
+Historial de Versiones de Archivos - Sistema Avanzado
+====================================================
+
+Este módulo guarda cada revisión del contenido de un archivo:
+- Una versión completa (snapshot) cada cierto número de revisiones
+- Entre snapshots, solo la diferencia por líneas contra la versión anterior
+- Cualquier versión se reconstruye aplicando como máximo
+  `intervalo_snapshot - 1` diferencias a partir de su snapshot
+
+Así el espacio crece con el tamaño de las ediciones y no con el número de
+versiones por el tamaño del archivo. Las revisiones se registran dentro de
+la transacción del almacén de archivos que comparte la conexión SQLite.
+"""
+
+import difflib
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from .counters import Contadores
+
+
+ESQUEMA_VERSIONES = """
+CREATE TABLE IF NOT EXISTS versiones (
+    nombre TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    base INTEGER NOT NULL,
+    completa INTEGER NOT NULL,
+    datos BLOB NOT NULL,
+    hash TEXT NOT NULL,
+    tamaño INTEGER NOT NULL,
+    autor TEXT,
+    fecha TEXT,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (nombre, version)
+);
+"""
+
+# Revisiones entre snapshots completos (longitud máxima de una cadena de diferencias)
+INTERVALO_SNAPSHOT = 16
+
+# Operaciones de una diferencia: copiar líneas de la versión anterior o insertar nuevas
+COPIAR, INSERTAR = 0, 1
+
+
+class HistorialVersiones:
+    """
+    Revisiones de archivos guardadas como snapshots y diferencias por líneas.
+    """
+
+    def __init__(self, conexion: sqlite3.Connection, contadores: Contadores,
+                 separador_linea: str = "\n", intervalo_snapshot: int = INTERVALO_SNAPSHOT):
+        """
+        Inicializa el historial.
+
+        Args:
+            conexion (sqlite3.Connection): Conexión compartida con el almacén de archivos
+            contadores (Contadores): Contadores agregados compartidos
+            separador_linea (str): Separador con el que se dividen las líneas
+            intervalo_snapshot (int): Cada cuántas revisiones se guarda una versión completa
+        """
+        self._conexion = conexion
+        self.contadores = contadores
+        self.separador_linea = separador_linea
+        self.intervalo_snapshot = intervalo_snapshot
+        self._conexion.executescript(ESQUEMA_VERSIONES)
+
+    def _lineas(self, contenido: str) -> List[str]:
+        return contenido.split(self.separador_linea)
+
+    def _diferencia(self, anteriores: Sequence[str], nuevas: Sequence[str]) -> List[Any]:
+        """Operaciones que transforman las líneas anteriores en las nuevas."""
+        operaciones: List[Any] = []
+        coincidencias = difflib.SequenceMatcher(None, anteriores, nuevas, autojunk=False)
+        for etiqueta, i1, i2, j1, j2 in coincidencias.get_opcodes():
+            if etiqueta == "equal":
+                operaciones.append([COPIAR, i1, i2])
+            elif j2 > j1:
+                operaciones.append([INSERTAR, list(nuevas[j1:j2])])
+        return operaciones
+
+    @staticmethod
+    def _aplicar(anteriores: List[str], operaciones: List[Any]) -> List[str]:
+        nuevas: List[str] = []
+        for operacion in operaciones:
+            if operacion[0] == COPIAR:
+                nuevas.extend(anteriores[operacion[1]:operacion[2]])
+            else:
+                nuevas.extend(operacion[1])
+        return nuevas
+
+    def registrar(self, nombre: str, contenido: str, hash_contenido: str,
+                  anterior: Optional[str] = None, autor: Optional[str] = None,
+                  fecha: Optional[Sequence[int]] = None) -> int:
+        """
+        Registra una nueva revisión. Debe llamarse dentro de una transacción abierta.
+
+        Args:
+            nombre (str): Nombre del archivo
+            contenido (str): Contenido de la nueva revisión
+            hash_contenido (str): Hash del contenido
+            anterior (Optional[str]): Contenido de la última revisión (None si es la primera)
+            autor (Optional[str]): Usuario que hizo el cambio
+            fecha (Optional[Sequence[int]]): Fecha del sistema (día, mes, año)
+
+        Returns:
+            int: Número de la versión registrada
+        """
+        ultima = self._conexion.execute(
+            "SELECT version, base FROM versiones WHERE nombre = ? ORDER BY version DESC LIMIT 1", (nombre,)
+        ).fetchone()
+        version = ultima[0] + 1 if ultima else 1
+
+        datos = None
+        base = version
+        if ultima is not None and anterior is not None and version - ultima[1] < self.intervalo_snapshot:
+            diferencia = json.dumps(
+                self._diferencia(self._lineas(anterior), self._lineas(contenido)), ensure_ascii=False
+            )
+            # Una diferencia más grande que el propio contenido no compensa
+            if len(diferencia) < len(contenido):
+                datos, base = diferencia, ultima[1]
+        completa = datos is None
+        comprimidos = zlib.compress((contenido if completa else datos).encode("utf-8"), 6)
+
+        self._conexion.execute(
+            "INSERT INTO versiones (nombre, version, base, completa, datos, hash, tamaño, autor, fecha, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (nombre, version, base, int(completa), comprimidos, hash_contenido,
+             len(contenido.encode("utf-8")), autor, json.dumps(list(fecha)) if fecha else None,
+             datetime.now().isoformat())
+        )
+        self.contadores.sumar({
+            "historial:versiones": 1,
+            "historial:snapshots": int(completa),
+            "historial:bytes_guardados": len(comprimidos)
+        })
+        return version
+
+    def listar(self, nombre: str) -> List[Dict[str, Any]]:
+        """
+        Lista las versiones de un archivo, de la más antigua a la más reciente.
+
+        Args:
+            nombre (str): Nombre del archivo
+
+        Returns:
+            List[Dict[str, Any]]: Número, autor, fecha, tamaño, hash y forma de almacenamiento
+        """
+        filas = self._conexion.execute(
+            "SELECT version, completa, LENGTH(datos), hash, tamaño, autor, fecha, timestamp "
+            "FROM versiones WHERE nombre = ? ORDER BY version", (nombre,)
+        ).fetchall()
+        return [
+            {
+                "version": version,
+                "almacenamiento": "completa" if completa else "diferencia",
+                "bytes_guardados": guardados,
+                "hash_contenido": hash_contenido,
+                "tamaño_bytes": tamaño,
+                "autor": autor,
+                "fecha_modificacion": tuple(json.loads(fecha)) if fecha else None,
+                "timestamp": timestamp
+            }
+            for version, completa, guardados, hash_contenido, tamaño, autor, fecha, timestamp in filas
+        ]
+
+    def reconstruir(self, nombre: str, version: int) -> str:
+        """
+        Reconstruye el contenido de una versión a partir de su snapshot.
+
+        Args:
+            nombre (str): Nombre del archivo
+            version (int): Número de versión
+
+        Returns:
+            str: Contenido de esa versión
+
+        Raises:
+            KeyError: Si la versión no existe
+        """
+        fila = self._conexion.execute(
+            "SELECT base FROM versiones WHERE nombre = ? AND version = ?", (nombre, version)
+        ).fetchone()
+        if fila is None:
+            raise KeyError(version)
+        filas = self._conexion.execute(
+            "SELECT completa, datos FROM versiones WHERE nombre = ? AND version BETWEEN ? AND ? ORDER BY version",
+            (nombre, fila[0], version)
+        ).fetchall()
+
+        lineas: List[str] = []
+        for completa, datos in filas:
+            texto = zlib.decompress(datos).decode("utf-8")
+            lineas = self._lineas(texto) if completa else self._aplicar(lineas, json.loads(texto))
+        return self.separador_linea.join(lineas)
+
+    def diferencias(self, nombre: str, desde: int, hasta: int) -> List[str]:
+        """
+        Diferencia unificada entre dos versiones.
+
+        Args:
+            nombre (str): Nombre del archivo
+            desde (int): Versión de origen
+            hasta (int): Versión de destino
+
+        Returns:
+            List[str]: Líneas del diff unificado
+
+        Raises:
+            KeyError: Si alguna de las versiones no existe
+        """
+        return list(difflib.unified_diff(
+            self._lineas(self.reconstruir(nombre, desde)),
+            self._lineas(self.reconstruir(nombre, hasta)),
+            fromfile=f"{nombre}@v{desde}",
+            tofile=f"{nombre}@v{hasta}",
+            lineterm=""
+        ))
@@ -11,31 +11,54 @@ Endpoints REST para todas las operaciones del sistema:
 Todas las rutas utilizan los conceptos avanzados implementados en los módulos.
 """
 
-from fastapi import APIRouter, HTTPException, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Literal, Optional, Tuple
 from datetime import datetime
+from pathlib import Path
 import json
+import mimetypes
 
-from ..modules.user_manager import user_manager
-from ..modules.file_manager import file_manager
-from ..modules.report_generator import report_generator
+from ..modules.user_manager import (
+    LONGITUD_MAXIMA_NOMBRE, LONGITUD_MINIMA_NOMBRE, MENSAJES_USUARIO, get_user_manager
+)
+from ..modules.file_manager import get_file_manager, TAMAÑO_BLOQUE_STREAM
+from ..modules.report_generator import SECCIONES_REGENERABLES, get_report_generator
+from ..utils.async_io import io_executor
+
+
+# Tipo MIME de cada formato de reporte descargable
+TIPOS_REPORTE = {".md": "text/markdown", ".pdf": "application/pdf"}
+
+
+async def registrar_actividad_sesion(x_session_id: Optional[str] = Header(None)) -> None:
+    """
+    Toca la sesión indicada en X-Session-Id en cada petición, lo que reinicia
+    su plazo de inactividad. Una sesión caducada no bloquea la petición; el
+    cliente lo detecta con /users/session/extend. Con SESSION_STORE=sqlite
+    es una consulta a la base, por eso va al pool de E/S.
+    """
+    if x_session_id:
+        user_manager = await io_executor.run(get_user_manager)
+        await io_executor.run(user_manager.tocar_sesion, x_session_id)
 
 
 # Router para las rutas del sistema avanzado
-advanced_router = APIRouter(prefix="/advanced", tags=["Sistema Avanzado"])
+advanced_router = APIRouter(
+    prefix="/advanced", tags=["Sistema Avanzado"], dependencies=[Depends(registrar_actividad_sesion)]
+)
 
 
 # Modelos Pydantic para requests/responses
 class UserLoginRequest(BaseModel):
     """Modelo para solicitud de login de usuario."""
-    nombre: str = Field(..., min_length=2, max_length=20, description="Nombre del usuario")
+    nombre: str = Field(..., min_length=LONGITUD_MINIMA_NOMBRE, max_length=LONGITUD_MAXIMA_NOMBRE, description="Nombre del usuario")
     
     
 class UserChangeRequest(BaseModel):
     """Modelo para cambio de usuario."""
-    nombre_nuevo: str = Field(..., min_length=2, max_length=20, description="Nuevo nombre de usuario")
+    nombre_nuevo: str = Field(..., min_length=LONGITUD_MINIMA_NOMBRE, max_length=LONGITUD_MAXIMA_NOMBRE, description="Nuevo nombre de usuario")
 
 
 class DateConfigRequest(BaseModel):
@@ -57,6 +80,22 @@ class FileWriteRequest(BaseModel):
     autor: str = Field(..., min_length=1, description="Usuario que modifica")
 
 
+class FileBulkOperation(BaseModel):
+    """Modelo para una operación dentro de un lote."""
+    operacion: Literal["leer", "escribir", "crear"] = Field(..., description="Operación a realizar")
+    nombre_archivo: str = Field(..., min_length=1, description="Nombre del archivo")
+    contenido: Optional[str] = Field(None, description="Contenido (escribir y crear)")
+    autor: Optional[str] = Field(None, description="Usuario que escribe o crea")
+    tipo: str = Field("texto", description="Tipo de archivo (crear)")
+    descripcion: Optional[str] = Field(None, description="Descripción del archivo (crear)")
+
+
+class FileBulkRequest(BaseModel):
+    """Modelo para operaciones de archivos por lotes."""
+    operaciones: List[FileBulkOperation] = Field(..., min_length=1, max_length=1000, description="Operaciones en orden")
+    transaccional: bool = Field(False, description="Aplicar todas las escrituras o ninguna")
+
+
 class FileCreateRequest(BaseModel):
     """Modelo para creación de archivo."""
     nombre_archivo: str = Field(..., min_length=1, description="Nombre del nuevo archivo")
@@ -84,12 +123,13 @@ async def login_usuario(request: UserLoginRequest) -> Dict[str, Any]:
     """
     try:
         # Usar el user_manager para login (con concatenación de cadenas)
-        sesion_info = user_manager.iniciar_sesion(request.nombre)
+        user_manager = await io_executor.run(get_user_manager)
+        sesion_info = await io_executor.run(user_manager.iniciar_sesion, request.nombre)
         
         return {
             "success": True,
             "data": sesion_info,
-            "mensaje": "Login exitoso con concatenación de cadenas implementada"
+            "mensaje": MENSAJES_USUARIO["login_exitoso"]
         }
         
     except ValueError as e:
@@ -99,23 +139,26 @@ async def login_usuario(request: UserLoginRequest) -> Dict[str, Any]:
 
 
 @advanced_router.post("/users/change")
-async def cambiar_usuario(request: UserChangeRequest) -> Dict[str, Any]:
+async def cambiar_usuario(request: UserChangeRequest, x_session_id: Optional[str] = Header(None)) -> Dict[str, Any]:
     """
     Endpoint para cambio de usuario (opción 4 del menú).
+    Con X-Session-Id el cambio solo afecta a la sesión de ese cliente.
     
     Args:
         request: Datos del nuevo usuario
+        x_session_id: Cabecera X-Session-Id con la sesión actual del cliente
         
     Returns:
         Dict con información del cambio de usuario
     """
     try:
-        cambio_info = user_manager.cambiar_usuario(request.nombre_nuevo)
+        user_manager = await io_executor.run(get_user_manager)
+        cambio_info = await io_executor.run(user_manager.cambiar_usuario, request.nombre_nuevo, x_session_id)
         
         return {
             "success": True,
             "data": cambio_info,
-            "mensaje": "Usuario cambiado exitosamente"
+            "mensaje": MENSAJES_USUARIO["usuario_cambiado"]
         }
         
     except ValueError as e:
@@ -125,33 +168,65 @@ async def cambiar_usuario(request: UserChangeRequest) -> Dict[str, Any]:
 
 
 @advanced_router.get("/users/current")
-async def obtener_usuario_actual() -> Dict[str, Any]:
+async def obtener_usuario_actual(x_session_id: Optional[str] = Header(None)) -> Dict[str, Any]:
     """
-    Obtiene información del usuario actual.
+    Obtiene información del usuario actual: el de la sesión indicada en
+    X-Session-Id (sin ella no hay usuario actual).
+    
+    Args:
+        x_session_id: Cabecera X-Session-Id con la sesión del cliente
     
     Returns:
         Dict con información del usuario actual
     """
     try:
-        usuario_info = user_manager.obtener_usuario_actual()
+        user_manager = await io_executor.run(get_user_manager)
+        usuario_info = await io_executor.run(user_manager.obtener_usuario_actual, x_session_id)
         
         if not usuario_info:
             return {
                 "success": False,
                 "data": None,
-                "mensaje": "No hay usuario logueado"
+                "mensaje": MENSAJES_USUARIO["sin_usuario"]
             }
         
         return {
             "success": True,
             "data": usuario_info,
-            "mensaje": "Información de usuario obtenida"
+            "mensaje": MENSAJES_USUARIO["usuario_obtenido"]
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno: {e}")
 
 
+@advanced_router.post("/users/session/extend")
+async def extender_sesion(x_session_id: str = Header(...)) -> Dict[str, Any]:
+    """
+    Extiende la sesión del cliente (p. ej. cuando el usuario elige seguir
+    conectado en el aviso de inactividad).
+    
+    Args:
+        x_session_id: Cabecera X-Session-Id con el session_id del login
+        
+    Returns:
+        Dict con la sesión y los segundos que le quedan
+        
+    Raises:
+        HTTPException: 401 si la sesión no existe o ya caducó
+    """
+    user_manager = await io_executor.run(get_user_manager)
+    sesion = await io_executor.run(user_manager.extender_sesion, x_session_id)
+    if sesion is None:
+        raise HTTPException(status_code=401, detail=MENSAJES_USUARIO["sesion_caducada"])
+    
+    return {
+        "success": True,
+        "data": sesion,
+        "mensaje": MENSAJES_USUARIO["sesion_extendida"]
+    }
+
+
 @advanced_router.get("/users/stats")
 async def obtener_estadisticas_usuarios() -> Dict[str, Any]:
     """
@@ -161,12 +236,13 @@ async def obtener_estadisticas_usuarios() -> Dict[str, Any]:
         Dict con estadísticas completas de usuarios
     """
     try:
-        estadisticas = user_manager.obtener_estadisticas_usuarios()
+        user_manager = await io_executor.run(get_user_manager)
+        estadisticas = await io_executor.run(user_manager.obtener_estadisticas_usuarios)
         
         return {
             "success": True,
             "data": estadisticas,
-            "mensaje": "Estadísticas de usuarios obtenidas"
+            "mensaje": MENSAJES_USUARIO["estadisticas_usuarios"]
         }
         
     except Exception as e:
@@ -190,7 +266,7 @@ async def configurar_fecha(request: DateConfigRequest) -> Dict[str, Any]:
     """
     try:
         # Usar file_manager para configurar fecha (almacena en tupla)
-        fecha_info = file_manager.configurar_fecha(request.dia, request.mes, request.año)
+        fecha_info = await io_executor.run(lambda: get_file_manager().configurar_fecha(request.dia, request.mes, request.año))
         
         return {
             "success": True,
@@ -213,7 +289,7 @@ async def obtener_fecha_actual() -> Dict[str, Any]:
         Dict con la fecha actual en formato tupla
     """
     try:
-        fecha_tupla = file_manager.fecha_actual
+        fecha_tupla = (await io_executor.run(get_file_manager)).fecha_actual
         
         return {
             "success": True,
@@ -238,16 +314,31 @@ async def obtener_fecha_actual() -> Dict[str, Any]:
 # ================================
 
 @advanced_router.get("/files/list")
-async def listar_archivos() -> Dict[str, Any]:
+async def listar_archivos(
+    orden: Literal["origen", "nombre", "fecha_modificacion", "autor"] = Query(
+        "origen", description="Criterio de orden"
+    ),
+    descendente: bool = Query(False, description="Orden descendente"),
+    limite: Optional[int] = Query(None, ge=1, le=500, description="Archivos por página (sin límite si se omite)"),
+    cursor: Optional[str] = Query(None, description="siguiente_cursor de la página anterior"),
+    autor: Optional[str] = Query(None, description="Filtrar por autor"),
+    tipo: Optional[str] = Query(None, description="Filtrar por tipo")
+) -> Dict[str, Any]:
     """
-    Lista todos los archivos disponibles (mínimo 4 predefinidos).
+    Lista los archivos disponibles (mínimo 4 predefinidos).
     Implementa el diccionario de archivos requerido.
     
+    Admite orden por nombre, fecha de modificación o autor, filtros por
+    autor y tipo, y paginación por cursor: cada página continúa tras el
+    último archivo de la anterior usando índices del almacén.
+    
     Returns:
-        Dict con lista completa de archivos disponibles
+        Dict con los archivos de la página y el cursor de la siguiente
     """
     try:
-        lista_archivos = file_manager.obtener_lista_archivos()
+        lista_archivos = await io_executor.run(
+            lambda: get_file_manager().obtener_lista_archivos(orden, descendente, limite, cursor, autor, tipo)
+        )
         
         return {
             "success": True,
@@ -255,6 +346,8 @@ async def listar_archivos() -> Dict[str, Any]:
             "mensaje": f"Lista de archivos obtenida - Total: {lista_archivos['total_archivos']} (mínimo 4 predefinidos cumplido)"
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno: {e}")
 
@@ -272,7 +365,7 @@ async def leer_archivo(request: FileReadRequest) -> Dict[str, Any]:
         Dict con contenido y metadata del archivo
     """
     try:
-        archivo_info = file_manager.leer_archivo(request.nombre_archivo)
+        archivo_info = await io_executor.run(lambda: get_file_manager().leer_archivo(request.nombre_archivo))
         
         return {
             "success": True,
@@ -286,6 +379,229 @@ async def leer_archivo(request: FileReadRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Error interno: {e}")
 
 
+@advanced_router.get("/files/search")
+async def buscar_archivos(
+    q: str = Query(..., min_length=1, description="Términos a buscar; 'término*' busca por prefijo"),
+    limite: int = Query(10, ge=1, le=100, description="Máximo de resultados")
+) -> Dict[str, Any]:
+    """
+    Busca archivos por contenido usando el índice de texto completo.
+    Devuelve los archivos que contienen todos los términos, ordenados por
+    relevancia (BM25), con un fragmento alrededor de la coincidencia.
+    
+    Args:
+        q: Consulta, p. ej. "evaluacion cred*"
+        limite: Máximo de resultados
+        
+    Returns:
+        Dict con resultados, total de coincidencias y tiempo de búsqueda
+    """
+    try:
+        resultado = await io_executor.run(lambda: get_file_manager().buscar_archivos(q, limite))
+        
+        return {
+            "success": True,
+            "data": resultado,
+            "mensaje": f"Búsqueda completada - {resultado['total_coincidencias']} archivo(s) coinciden"
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {e}")
+
+
+@advanced_router.get("/files/versions/{nombre_archivo}")
+async def listar_versiones(nombre_archivo: str) -> Dict[str, Any]:
+    """
+    Lista el historial de versiones de un archivo.
+    
+    Args:
+        nombre_archivo: Nombre del archivo
+        
+    Returns:
+        Dict con las versiones (autor, fecha, tamaño y forma de almacenamiento)
+    """
+    try:
+        historial = await io_executor.run(lambda: get_file_manager().listar_versiones(nombre_archivo))
+        
+        return {
+            "success": True,
+            "data": historial,
+            "mensaje": f"Historial de '{nombre_archivo}' - {historial['total_versiones']} versión(es)"
+        }
+        
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {e}")
+
+
+@advanced_router.get("/files/versions/{nombre_archivo}/{version}")
+async def leer_version(nombre_archivo: str, version: int) -> Dict[str, Any]:
+    """
+    Lee el contenido de una versión de un archivo.
+    
+    Args:
+        nombre_archivo: Nombre del archivo
+        version: Número de versión
+        
+    Returns:
+        Dict con el contenido de esa versión
+    """
+    try:
+        contenido_version = await io_executor.run(lambda: get_file_manager().leer_version(nombre_archivo, version))
+        
+        return {
+            "success": True,
+            "data": contenido_version,
+            "mensaje": f"Versión {version} de '{nombre_archivo}' leída exitosamente"
+        }
+        
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {e}")
+
+
+@advanced_router.get("/files/diff/{nombre_archivo}")
+async def comparar_versiones(
+    nombre_archivo: str,
+    desde: int = Query(..., ge=1, description="Versión de origen"),
+    hasta: int = Query(..., ge=1, description="Versión de destino")
+) -> Dict[str, Any]:
+    """
+    Compara dos versiones de un archivo.
+    
+    Args:
+        nombre_archivo: Nombre del archivo
+        desde: Versión de origen
+        hasta: Versión de destino
+        
+    Returns:
+        Dict con el diff unificado entre ambas versiones
+    """
+    try:
+        comparacion = await io_executor.run(lambda: get_file_manager().comparar_versiones(nombre_archivo, desde, hasta))
+        
+        return {
+            "success": True,
+            "data": comparacion,
+            "mensaje": f"Diferencias de '{nombre_archivo}' entre v{desde} y v{hasta}"
+        }
+        
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {e}")
+
+
+def _parsear_rango_bytes(rango: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """
+    Interpreta una cabecera Range de un solo intervalo: bytes=a-b, bytes=a- o bytes=-n.
+    
+    Returns:
+        Tuple: (inicio, fin, sufijo); sufijo son los últimos n bytes si se pidió bytes=-n
+        
+    Raises:
+        ValueError: Si la cabecera no es un rango de bytes válido (incluye int() inválidos)
+    """
+    unidad, _, intervalo = rango.partition("=")
+    if unidad.strip().lower() != "bytes" or "," in intervalo:
+        raise ValueError(f"Rango no soportado: {rango}")
+    inicio, _, fin = intervalo.strip().partition("-")
+    if not inicio:
+        return None, None, int(fin)
+    return int(inicio), (int(fin) if fin else None), None
+
+
+def _etag_coincide(if_none_match: str, etag: str) -> bool:
+    """Indica si alguna etiqueta de If-None-Match (débil o fuerte) coincide con el ETag."""
+    etiquetas = [etiqueta.strip().removeprefix("W/") for etiqueta in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+
+def _bloques(datos: memoryview) -> Iterator[bytes]:
+    """Recorre un fragmento en bloques para enviarlo con transferencia chunked."""
+    for inicio in range(0, len(datos), TAMAÑO_BLOQUE_STREAM):
+        yield bytes(datos[inicio:inicio + TAMAÑO_BLOQUE_STREAM])
+
+
+@advanced_router.get("/files/stream/{nombre_archivo}")
+async def leer_archivo_stream(
+    nombre_archivo: str,
+    desde_linea: Optional[int] = Query(None, ge=1, description="Primera línea a leer (desde 1)"),
+    hasta_linea: Optional[int] = Query(None, ge=1, description="Última línea a leer (incluida)"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")
+) -> Response:
+    """
+    Lee un archivo como flujo de bytes, completo o por rangos.
+    
+    Admite la cabecera Range (bytes=a-b) con respuesta 206, rangos de líneas
+    con desde_linea/hasta_linea, y ETag sobre el hash del contenido: si el
+    cliente envía If-None-Match con la versión actual se responde 304 sin
+    leer el contenido.
+    
+    Args:
+        nombre_archivo: Nombre del archivo
+        desde_linea: Primera línea del rango
+        hasta_linea: Última línea del rango
+        range_header: Cabecera Range
+        if_none_match: Cabecera If-None-Match
+        
+    Returns:
+        StreamingResponse con el fragmento solicitado
+    """
+    file_manager = await io_executor.run(get_file_manager)
+    try:
+        etag = f'"{await io_executor.run(file_manager.obtener_hash, nombre_archivo)}"'
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    if if_none_match and _etag_coincide(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    inicio = fin = sufijo = None
+    por_bytes = range_header is not None and desde_linea is None and hasta_linea is None
+    try:
+        if por_bytes:
+            inicio, fin, sufijo = _parsear_rango_bytes(range_header)
+        fragmento = await io_executor.run(
+            file_manager.leer_rango, nombre_archivo, inicio_byte=inicio, fin_byte=fin,
+            ultimos_bytes=sufijo, desde_linea=desde_linea, hasta_linea=hasta_linea
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        headers = None
+        if por_bytes:
+            # Sin volver a leer el archivo (ni contarlo como leído)
+            total = await io_executor.run(file_manager.obtener_tamaño, nombre_archivo)
+            headers = {"Content-Range": f"bytes */{total}"}
+        raise HTTPException(status_code=416, detail=str(e), headers=headers)
+    
+    tipo_mime = mimetypes.guess_type(nombre_archivo)[0] or "text/plain"
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+    estado = 200
+    if por_bytes:
+        estado = 206
+        headers["Content-Range"] = (
+            f"bytes {fragmento['inicio_byte']}-{fragmento['fin_byte']}/{fragmento['total_bytes']}"
+        )
+    elif "total_lineas" in fragmento:
+        headers["X-Rango-Lineas"] = (
+            f"{fragmento['desde_linea']}-{fragmento['hasta_linea']}/{fragmento['total_lineas']}"
+        )
+    
+    return StreamingResponse(
+        _bloques(fragmento["datos"]),
+        status_code=estado,
+        media_type=tipo_mime,
+        headers=headers
+    )
+
+
 @advanced_router.post("/files/write")
 async def escribir_archivo(request: FileWriteRequest) -> Dict[str, Any]:
     """
@@ -299,11 +615,11 @@ async def escribir_archivo(request: FileWriteRequest) -> Dict[str, Any]:
         Dict con confirmación de modificación
     """
     try:
-        resultado = file_manager.escribir_archivo(
+        resultado = await io_executor.run(lambda: get_file_manager().escribir_archivo(
             request.nombre_archivo,
             request.contenido,
             request.autor
-        )
+        ))
         
         return {
             "success": True,
@@ -330,13 +646,13 @@ async def crear_archivo(request: FileCreateRequest) -> Dict[str, Any]:
         Dict con confirmación de creación
     """
     try:
-        resultado = file_manager.crear_archivo(
+        resultado = await io_executor.run(lambda: get_file_manager().crear_archivo(
             request.nombre_archivo,
             request.contenido,
             request.autor,
             request.tipo,
             request.descripcion or f"Archivo {request.tipo} creado por {request.autor}"
-        )
+        ))
         
         return {
             "success": True,
@@ -350,6 +666,37 @@ async def crear_archivo(request: FileCreateRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Error interno: {e}")
 
 
+@advanced_router.post("/files/bulk")
+async def operaciones_lote(request: FileBulkRequest) -> Dict[str, Any]:
+    """
+    Ejecuta varias operaciones de leer, escribir y crear en una sola llamada.
+    Con transaccional=true se aplican todas o ninguna.
+    
+    Args:
+        request: Lista de operaciones y modo transaccional
+        
+    Returns:
+        Dict con el resultado de cada operación (código equivalente por operación)
+    """
+    try:
+        operaciones = [operacion.model_dump() for operacion in request.operaciones]
+        lote = await io_executor.run(
+            lambda: get_file_manager().ejecutar_lote(operaciones, transaccional=request.transaccional)
+        )
+        
+        return {
+            "success": lote["fallidas"] == 0,
+            "data": lote,
+            "mensaje": (
+                f"Lote ejecutado - {lote['exitosas']}/{lote['total_operaciones']} operaciones exitosas"
+                + ("" if lote["confirmado"] else " (transacción revertida)")
+            )
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {e}")
+
+
 @advanced_router.get("/files/stats")
 async def obtener_estadisticas_archivos() -> Dict[str, Any]:
     """
@@ -359,7 +706,7 @@ async def obtener_estadisticas_archivos() -> Dict[str, Any]:
         Dict con estadísticas completas del sistema de archivos
     """
     try:
-        estadisticas = file_manager.obtener_estadisticas()
+        estadisticas = await io_executor.run(lambda: get_file_manager().obtener_estadisticas())
         
         return {
             "success": True,
@@ -376,7 +723,7 @@ async def obtener_estadisticas_archivos() -> Dict[str, Any]:
 # ================================
 
 @advanced_router.post("/system/loading")
-async def simular_carga() -> Dict[str, Any]:
+async def simular_carga(x_session_id: Optional[str] = Header(None)) -> Dict[str, Any]:
     """
     Endpoint para simular carga del sistema (máximo 5 segundos).
     El frontend manejará el tiempo, este endpoint confirma preparación.
@@ -385,9 +732,12 @@ async def simular_carga() -> Dict[str, Any]:
         Dict con confirmación de sistema preparado
     """
     try:
+        user_manager = await io_executor.run(get_user_manager)
+        file_manager = await io_executor.run(get_file_manager)
+        
         # Verificar estado del sistema
-        usuario_actual = user_manager.obtener_usuario_actual()
-        stats_archivos = file_manager.obtener_estadisticas()
+        usuario_actual = await io_executor.run(user_manager.obtener_usuario_actual, x_session_id)
+        stats_archivos = await io_executor.run(file_manager.obtener_estadisticas)
         
         sistema_listo = True
         mensajes = []
@@ -425,19 +775,46 @@ async def simular_carga() -> Dict[str, Any]:
 # ================================
 
 @advanced_router.post("/reports/generate")
-async def generar_reporte() -> Dict[str, Any]:
+async def generar_reporte(
+    x_session_id: Optional[str] = Header(None),
+    secciones: Optional[List[str]] = Query(None, description="Secciones a regenerar aunque no hayan cambiado"),
+    pdf: bool = Query(False, description="Convertir también el reporte a PDF en segundo plano")
+) -> Dict[str, Any]:
     """
     Genera el reporte completo del sistema en Markdown.
     Incluye código, resultados, evidencias y observaciones.
     
+    Si las estadísticas no cambiaron desde el último reporte se devuelve el
+    ya escrito; con `secciones` se vuelven a renderizar esas secciones y se
+    escribe el reporte de todos modos. Con `pdf` se encola su conversión a
+    PDF y la respuesta incluye el trabajo, a consultar en /reports/jobs.
+    
+    Args:
+        x_session_id: Cabecera X-Session-Id con la sesión del cliente
+        secciones: Secciones a regenerar (ver SECCIONES_REGENERABLES)
+        pdf: Si se encola la conversión a PDF
+    
     Returns:
         Dict con información del reporte generado
+    
+    Raises:
+        HTTPException: 400 si alguna sección no existe o es fija
     """
+    invalidas = set(secciones or ()).difference(SECCIONES_REGENERABLES)
+    if invalidas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Secciones desconocidas o fijas: {', '.join(sorted(invalidas))}. Válidas: {', '.join(SECCIONES_REGENERABLES)}"
+        )
+    
     try:
+        user_manager = await io_executor.run(get_user_manager)
+        file_manager = await io_executor.run(get_file_manager)
+        
         # Recopilar datos del sistema
-        usuario_actual = user_manager.obtener_usuario_actual()
-        stats_usuarios = user_manager.obtener_estadisticas_usuarios()
-        stats_archivos = file_manager.obtener_estadisticas()
+        usuario_actual = await io_executor.run(user_manager.obtener_usuario_actual, x_session_id)
+        stats_usuarios = await io_executor.run(user_manager.obtener_estadisticas_usuarios)
+        stats_archivos = await io_executor.run(file_manager.obtener_estadisticas)
         
         datos_sistema = {
             "usuario_actual": usuario_actual,
@@ -447,40 +824,130 @@ async def generar_reporte() -> Dict[str, Any]:
             "timestamp_reporte": datetime.now().isoformat()
         }
         
-        # Generar reporte completo
-        resultado_reporte = report_generator.generar_reporte_completo(datos_sistema)
+        # Generar y guardar el reporte completo (escritura en disco fuera del event loop)
+        resultado_reporte = await io_executor.run(
+            lambda: get_report_generator().generar_reporte_completo(datos_sistema, secciones)
+        )
+        
+        if pdf and resultado_reporte.get("exito"):
+            resultado_reporte["trabajo_pdf"] = await io_executor.run(
+                get_report_generator().solicitar_pdf, resultado_reporte["reporte_markdown"]["nombre_archivo"]
+            )
         
         return {
             "success": True,
             "data": resultado_reporte,
-            "mensaje": "Reporte completo generado con código y evidencias"
+            "mensaje": (
+                "Reporte sin cambios desde la última generación" if resultado_reporte.get("reutilizado")
+                else "Reporte completo generado con código y evidencias"
+            )
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al generar reporte: {e}")
 
 
+@advanced_router.get("/reports/jobs/{trabajo_id}")
+async def estado_trabajo_pdf(trabajo_id: str) -> Dict[str, Any]:
+    """
+    Consulta una conversión de reporte a PDF.
+    
+    Args:
+        trabajo_id: Identificador devuelto en trabajo_pdf (el nombre del PDF)
+        
+    Returns:
+        Dict con el estado (en_cola, procesando, completado o error) y, si
+        terminó, la URL de descarga
+        
+    Raises:
+        HTTPException: 404 si el trabajo no existe
+    """
+    trabajo = await io_executor.run(lambda: get_report_generator().estado_pdf(trabajo_id))
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo '{trabajo_id}' no encontrado")
+    
+    return {
+        "success": True,
+        "data": trabajo,
+        "mensaje": f"Conversión a PDF: {trabajo['estado']}"
+    }
+
+
+def _bloques_archivo(ruta: Path, inicio: int, longitud: int) -> Iterator[bytes]:
+    """Lee longitud bytes de un archivo desde inicio, en bloques para streaming."""
+    with open(ruta, "rb") as archivo:
+        archivo.seek(inicio)
+        while longitud > 0:
+            bloque = archivo.read(min(TAMAÑO_BLOQUE_STREAM, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+
+
 @advanced_router.get("/reports/download/{filename}")
-async def descargar_reporte(filename: str) -> FileResponse:
+async def descargar_reporte(
+    filename: str,
+    range_header: Optional[str] = Header(None, alias="Range")
+) -> Response:
     """
-    Descarga un reporte generado.
+    Descarga un reporte generado, en Markdown o PDF.
+    
+    Admite la cabecera Range (bytes=a-b, bytes=a- o bytes=-n) con respuesta
+    206, para reanudar descargas o leer el PDF por partes.
     
     Args:
         filename: Nombre del archivo de reporte
+        range_header: Cabecera Range
         
     Returns:
-        FileResponse con el archivo de reporte
+        FileResponse con el archivo completo o StreamingResponse con el rango
+        
+    Raises:
+        HTTPException: 404 si no existe, 409 si su PDF aún se está generando
+            y 416 si el rango no es válido
     """
     try:
-        ruta_archivo = report_generator.directorio_reportes / filename
+        generador = await io_executor.run(get_report_generator)
+        ruta_archivo = generador.directorio_reportes / filename
         
-        if not ruta_archivo.exists():
+        if not await io_executor.run(ruta_archivo.is_file):
+            if generador.pdf_en_curso(filename):
+                raise HTTPException(status_code=409, detail="El PDF del reporte aún se está generando")
             raise HTTPException(status_code=404, detail="Archivo de reporte no encontrado")
         
-        return FileResponse(
-            path=str(ruta_archivo),
-            filename=filename,
-            media_type='text/markdown'
+        tipo_mime = TIPOS_REPORTE.get(ruta_archivo.suffix, "application/octet-stream")
+        if range_header is None:
+            return FileResponse(
+                path=str(ruta_archivo),
+                filename=filename,
+                media_type=tipo_mime,
+                headers={"Accept-Ranges": "bytes"}
+            )
+        
+        total = (await io_executor.run(ruta_archivo.stat)).st_size
+        try:
+            inicio, fin, sufijo = _parsear_rango_bytes(range_header)
+            if sufijo is not None:
+                if sufijo == 0:
+                    raise ValueError("Rango vacío")
+                inicio, fin = max(total - sufijo, 0), total - 1
+            fin = total - 1 if fin is None else min(fin, total - 1)
+            if inicio >= total or fin < inicio:
+                raise ValueError(f"Rango fuera del archivo ({total} bytes)")
+        except ValueError as e:
+            raise HTTPException(status_code=416, detail=str(e), headers={"Content-Range": f"bytes */{total}"})
+        
+        return StreamingResponse(
+            _bloques_archivo(ruta_archivo, inicio, fin - inicio + 1),
+            status_code=206,
+            media_type=tipo_mime,
+            headers={
+                "Accept-Ranges": "bytes",
+                "Content-Range": f"bytes {inicio}-{fin}/{total}",
+                "Content-Length": str(fin - inicio + 1),
+                "Content-Disposition": f'attachment; filename="{filename}"'
+            }
         )
         
     except HTTPException:
@@ -494,7 +961,7 @@ async def descargar_reporte(filename: str) -> FileResponse:
 # ================================
 
 @advanced_router.get("/system/status")
-async def obtener_estado_sistema() -> Dict[str, Any]:
+async def obtener_estado_sistema(x_session_id: Optional[str] = Header(None)) -> Dict[str, Any]:
     """
     Obtiene el estado completo del sistema avanzado.
     Útil para debugging y monitoreo.
@@ -503,10 +970,13 @@ async def obtener_estado_sistema() -> Dict[str, Any]:
         Dict con estado completo del sistema
     """
     try:
+        user_manager = await io_executor.run(get_user_manager)
+        file_manager = await io_executor.run(get_file_manager)
+        
         # Obtener información de todos los componentes
-        usuario_actual = user_manager.obtener_usuario_actual()
-        stats_usuarios = user_manager.obtener_estadisticas_usuarios()
-        stats_archivos = file_manager.obtener_estadisticas()
+        usuario_actual = await io_executor.run(user_manager.obtener_usuario_actual, x_session_id)
+        stats_usuarios = await io_executor.run(user_manager.obtener_estadisticas_usuarios)
+        stats_archivos = await io_executor.run(file_manager.obtener_estadisticas)
         
         estado_sistema = {
             "timestamp": datetime.now().isoformat(),
@@ -518,7 +988,7 @@ async def obtener_estado_sistema() -> Dict[str, Any]:
             "fecha_sistema_tupla": file_manager.fecha_actual,
             "configuraciones": {
                 "directorio_trabajo": str(file_manager.directorio_base),
-                "archivos_predefinidos": len(file_manager.archivos_predefinidos),
+                "archivos_predefinidos": stats_archivos["resumen"]["archivos_predefinidos"],
                 "usuarios_registrados": len(user_manager.usuarios_registrados)
             }
         }
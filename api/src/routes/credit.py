@@ -1,7 +1,15 @@
+import asyncio
+from typing import Dict
+
 from fastapi import APIRouter, HTTPException
-from src.models.schemas import CreditApplicationRequest, CreditEvaluationResponse
-from src.models.application import Application
+from src.models.schemas import (
+    CreditApplicationRequest,
+    CreditBatchRequest,
+    CreditBatchResponse,
+    CreditEvaluationResponse,
+)
 from src.utils.evaluator import CreditEvaluator
+from src.utils.execution import cpu_executor
 
 router = APIRouter(prefix="/api/v1", tags=["credit"])
 
@@ -11,6 +19,9 @@ async def evaluate_credit_application(request: CreditApplicationRequest):
     """
     Evaluate a credit application and return the decision.
     
+    The evaluation runs inline or in a worker pool according to the
+    configured execution policy (EXECUTION_POLICY).
+    
     Args:
         request: Credit application data
         
@@ -22,21 +33,18 @@ async def evaluate_credit_application(request: CreditApplicationRequest):
     """
     try:
         # Convert Pydantic model to dataclass
-        application = Application(
-            name=request.name,
-            age=request.age,
-            monthly_income=request.monthly_income,
-            monthly_debt=request.monthly_debt,
-            employment_type=request.employment_type.upper(),
-            months_of_experience=request.months_of_experience,
-            credit_score=request.credit_score,
-            amount=request.amount,
-            term=request.term,
-            active_defaults=request.active_defaults
-        )
+        application = request.to_application()
+        
+        # Checks and payment once: they give the cost and evaluate() reuses them
+        assessment = CreditEvaluator.assess(application)
         
         # Evaluate application
-        result = CreditEvaluator.evaluate(application)
+        result = await cpu_executor.run(
+            CreditEvaluator.evaluate,
+            application,
+            assessment,
+            cost=assessment.cost
+        )
         
         # Return response
         return CreditEvaluationResponse(
@@ -50,6 +58,58 @@ async def evaluate_credit_application(request: CreditApplicationRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/evaluate/batch", response_model=CreditBatchResponse)
+async def evaluate_credit_applications(request: CreditBatchRequest):
+    """
+    Evaluate several credit applications in one call.
+    
+    Applications are split into one chunk per pool worker; each chunk runs
+    under the execution policy with its summed estimated cost.
+    
+    Args:
+        request: Applications to evaluate
+        
+    Returns:
+        Evaluation results in request order with a count per decision
+        
+    Raises:
+        HTTPException: If a processing error occurs
+    """
+    try:
+        applications = [item.to_application() for item in request.applications]
+        assessments = [CreditEvaluator.assess(application) for application in applications]
+        size = -(-len(applications) // cpu_executor.max_workers)
+        starts = range(0, len(applications), size)
+        
+        outcomes = await asyncio.gather(*(
+            cpu_executor.run(
+                CreditEvaluator.evaluate_many,
+                applications[i:i + size],
+                assessments[i:i + size],
+                cost=sum(assessment.cost for assessment in assessments[i:i + size])
+            )
+            for i in starts
+        ))
+        
+        results = [
+            CreditEvaluationResponse(
+                reference=result.reference,
+                decision=result.decision,
+                reasons=result.reasons,
+                details=result.details
+            )
+            for outcome in outcomes for result in outcome
+        ]
+        decisions: Dict[str, int] = {}
+        for result in results:
+            decisions[result.decision] = decisions.get(result.decision, 0) + 1
+        
+        return CreditBatchResponse(results=results, total=len(results), decisions=decisions)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.get("/policy")
 async def get_policy_info():
     """
@@ -61,6 +121,7 @@ async def get_policy_info():
     from src.core.config import policy
     
     return {
+        "version": policy.version(),
         "age_limits": {
             "min": policy.MIN_AGE,
             "max": policy.MAX_AGE
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
-from src.models.schemas import HealthCheckResponse
+from fastapi.responses import JSONResponse
+from src.core.config import policy
+from src.models.schemas import HealthCheckResponse, ReadinessResponse
+from src.utils.warmup import warmup_state
 
 router = APIRouter(prefix="/api/v1", tags=["health"])
 
@@ -10,4 +13,20 @@ async def health_check():
     return HealthCheckResponse(
         status="healthy",
         message="BBVA Credit Pre-evaluator API is running"
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/ready", response_model=ReadinessResponse, responses={503: {"model": ReadinessResponse}})
+async def readiness_check():
+    """Readiness endpoint; returns 503 until the startup warmup has completed."""
+    body = ReadinessResponse(
+        status=warmup_state.status,
+        ready=warmup_state.ready,
+        warmup_duration_ms=warmup_state.duration_ms,
+        warmup_evaluations=warmup_state.evaluations,
+        policy_version=policy.version(),
+        error=warmup_state.error
+    )
+    if not warmup_state.ready:
+        return JSONResponse(status_code=503, content=body.model_dump())
+    return body
@@ -0,0 +1,94 @@
+"""
+Async layer for blocking disk work called from async routes.
+
+The advanced routes are `async def` but the file store, version history and
+report writer block on SQLite and the filesystem. Running them here keeps
+that work off the event loop, in a thread pool separate from the CPU pool,
+so a slow disk delays only other disk calls and never the credit
+evaluations served by the same worker.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.core.config import settings
+
+
+class IOExecutor:
+    """Runs blocking I/O callables on a bounded thread pool."""
+
+    def __init__(self, max_workers: int = 8, max_pending: int = 64):
+        """
+        Initialize the executor. The pool is created on first use.
+
+        Args:
+            max_workers: Threads doing disk work at the same time
+            max_pending: Calls allowed in flight per event loop (running plus
+                queued); callers beyond that wait before submitting
+
+        Raises:
+            ValueError: If a limit is below 1 or max_pending is below max_workers
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.counts: Dict[str, int] = {"submitted": 0, "completed": 0, "failed": 0}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run func(*args, **kwargs) on the I/O pool and await its result.
+
+        Args:
+            func: Blocking callable
+            args: Positional arguments for func
+            kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns; exceptions are re-raised in the caller
+        """
+        loop = asyncio.get_running_loop()
+        async with self._loop_slots(loop):
+            self.counts["submitted"] += 1
+            try:
+                result = await loop.run_in_executor(self._get_pool(), functools.partial(func, *args, **kwargs))
+            except BaseException:
+                self.counts["failed"] += 1
+                raise
+            self.counts["completed"] += 1
+            return result
+
+    def _loop_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """Semaphore bounding the calls in flight from this event loop."""
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="io")
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Shut down the pool if it was created."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+# Global executor configured from settings
+io_executor = IOExecutor(max_workers=settings.io_workers, max_pending=settings.io_max_pending)
@@ -1,29 +1,76 @@
+from array import array
 from typing import Optional, Tuple
 import math
+import mmap
 from src.core.config import policy
 
 
+class AnnuityFactorTable:
+    """
+    Precomputed payment factors for every policy rate tier and term up to MAX_TERM.
+
+    The factors live in an anonymous shared mapping rather than in Python float
+    objects, so workers forked after build() read the master's pages directly
+    instead of copy-on-write duplicating them.
+    """
+
+    def __init__(self):
+        self._rates = {rate: index for index, rate in enumerate(policy.RATE_TIERS)}
+        self._buffer: Optional[mmap.mmap] = None
+        self._factors: Optional[memoryview] = None
+
+    @property
+    def built(self) -> bool:
+        return self._factors is not None
+
+    def build(self) -> None:
+        """Compute the table; factors are identical to computing them per call."""
+        size = len(self._rates) * (policy.MAX_TERM + 1)
+        buffer = mmap.mmap(-1, size * array("d").itemsize)
+        factors = memoryview(buffer).cast("d")
+        for rate, index in self._rates.items():
+            for term in range(1, policy.MAX_TERM + 1):
+                factors[index * (policy.MAX_TERM + 1) + term] = CreditCalculator.annuity_factor(rate, term)
+        self._buffer, self._factors = buffer, factors
+
+    def get(self, annual_rate: float, term_months: int) -> Optional[float]:
+        """Return the precomputed factor, or None if the table doesn't cover it."""
+        index = self._rates.get(annual_rate)
+        if self._factors is None or index is None or not 1 <= term_months <= policy.MAX_TERM:
+            return None
+        return self._factors[index * (policy.MAX_TERM + 1) + term_months]
+
+
 class CreditCalculator:
     """Class to perform credit-related calculations."""
 
+    SEARCH_ITERATIONS = 40  # binary search iterations per term in find_counteroffer
+
     @staticmethod
     def calculate_rate_by_score(score: int) -> Optional[float]:
         """Calculate annual interest rate based on credit score."""
         if score < 600:
             return None
         if score >= 720:
-            return 0.18
+            return policy.RATE_TIERS[0]
         if score >= 660:
-            return 0.24
-        return 0.32
+            return policy.RATE_TIERS[1]
+        return policy.RATE_TIERS[2]
+
+    @staticmethod
+    def annuity_factor(annual_rate: float, term_months: int) -> float:
+        """Monthly payment per unit of principal for a positive annual rate."""
+        i = annual_rate / 12.0
+        return (i * (1 + i) ** term_months) / ((1 + i) ** term_months - 1)
 
     @staticmethod
     def calculate_monthly_payment(amount: float, annual_rate: float, term_months: int) -> float:
         """Calculate monthly payment using standard loan formula."""
-        i = annual_rate / 12.0
-        if i <= 0:
+        if annual_rate / 12.0 <= 0:
             return round(amount / term_months, 2)
-        factor = (i * (1 + i) ** term_months) / ((1 + i) ** term_months - 1)
+        factor = factor_table.get(annual_rate, term_months)
+        if factor is None:
+            factor = CreditCalculator.annuity_factor(annual_rate, term_months)
         return round(amount * factor, 2)
 
     @staticmethod
@@ -42,7 +89,7 @@ class CreditCalculator:
             viable = False
             
             # Binary search for maximum viable amount for this term
-            for _ in range(40):  # Binary search iterations for precision
+            for _ in range(CreditCalculator.SEARCH_ITERATIONS):  # Binary search iterations for precision
                 mid = (lo + hi) / 2
                 payment = CreditCalculator.calculate_monthly_payment(mid, annual_rate, term)
                 total_dti = (debt + payment) / income if income > 0 else 1.0
@@ -61,4 +108,8 @@ class CreditCalculator:
 
         if max_possible_amount >= policy.MIN_AMOUNT:
             return best_term, round(max_possible_amount, 2), best_payment
-        return None
\ No newline at end of file
+        return None
+
+
+# Global factor table, built during startup warmup
+factor_table = AnnuityFactorTable()
@@ -1,5 +1,6 @@
 import uuid
-from src.models.application import Application, Result
+from typing import List, Optional
+from src.models.application import Application, Assessment, Result
 from src.utils.validators import ApplicationValidator
 from src.utils.calculators import CreditCalculator
 from src.core.config import policy
@@ -9,17 +10,22 @@ class CreditEvaluator:
     """Main class to evaluate credit applications."""
 
     @staticmethod
-    def evaluate(application: Application) -> Result:
+    def assess(application: Application) -> Assessment:
         """
-        Evaluate a credit application and return decision with details.
-        
+        Run the checks and loan calculations every evaluation starts with.
+
+        Routes call this first to get the estimated cost for the execution
+        policy, then hand the assessment to evaluate() so the work is not
+        repeated. Applications that reach the counteroffer search cost one
+        binary search per candidate term; everything else costs a single
+        calculation.
+
         Args:
             application: Credit application data
-            
+
         Returns:
-            Result object with decision, reasons, and details
+            Assessment with rejection reasons, rate, payment, DTIs and cost
         """
-        reference = str(uuid.uuid4())[:8].upper()
         reasons = []
 
         # Basic validation
@@ -32,15 +38,47 @@ class CreditEvaluator:
         if rate is None:
             reasons.append("Credit score below minimum threshold (600)")
 
-        # If basic validation fails, reject immediately
         if reasons:
-            return Result(reference, "REJECTED", reasons, {})
+            return Assessment(reasons, rate, None, None, None, cost=1)
 
         # Calculate loan details
         payment = CreditCalculator.calculate_monthly_payment(application.amount, rate, application.term)
         current_dti = application.monthly_debt / application.monthly_income if application.monthly_income > 0 else 1.0
         total_dti = (application.monthly_debt + payment) / application.monthly_income if application.monthly_income > 0 else 1.0
 
+        cost = 1
+        if current_dti <= policy.CURRENT_DTI_MAX and (
+                payment > policy.MAX_AFFECTATION * application.monthly_income or total_dti > policy.TOTAL_DTI_MAX):
+            terms = len(range(application.term, policy.MAX_TERM + 1, 6))
+            cost += terms * CreditCalculator.SEARCH_ITERATIONS
+        return Assessment(reasons, rate, payment, current_dti, total_dti, cost=cost)
+
+    @staticmethod
+    def evaluate(application: Application, assessment: Optional[Assessment] = None) -> Result:
+        """
+        Evaluate a credit application and return decision with details.
+        
+        Args:
+            application: Credit application data
+            assessment: Result of assess() for this application, if already computed
+            
+        Returns:
+            Result object with decision, reasons, and details
+        """
+        reference = str(uuid.uuid4())[:8].upper()
+        if assessment is None:
+            assessment = CreditEvaluator.assess(application)
+        reasons = list(assessment.reasons)
+
+        # If basic validation fails, reject immediately
+        if reasons:
+            return Result(reference, "REJECTED", reasons, {})
+
+        rate = assessment.annual_rate
+        payment = assessment.monthly_payment
+        current_dti = assessment.current_dti
+        total_dti = assessment.total_dti
+
         # Check current DTI limit
         if current_dti > policy.CURRENT_DTI_MAX:
             reasons.append("Current DTI exceeds 40%")
@@ -84,4 +122,15 @@ class CreditEvaluator:
             "monthly_payment": payment,
             "current_dti": round(current_dti, 4),
             "total_dti": round(total_dti, 4)
-        })
\ No newline at end of file
+        })
+
+    @staticmethod
+    def evaluate_many(applications: List[Application],
+                      assessments: Optional[List[Assessment]] = None) -> List[Result]:
+        """Evaluate several applications in order, reusing their assessments if given."""
+        if assessments is None:
+            return [CreditEvaluator.evaluate(application) for application in applications]
+        return [
+            CreditEvaluator.evaluate(application, assessment)
+            for application, assessment in zip(applications, assessments)
+        ]
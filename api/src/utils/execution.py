@@ -0,0 +1,118 @@
+"""
+Execution policies for CPU-bound work called from async routes.
+
+- inline: run on the event loop thread (no overhead, blocks the loop)
+- thread: offload to a bounded thread pool
+- process: offload to a bounded process pool
+- adaptive: run cheap work inline and offload work whose estimated cost
+  reaches a threshold (e.g. applications that need the counteroffer search)
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.core.config import settings
+
+INLINE, THREAD, PROCESS, ADAPTIVE = "inline", "thread", "process", "adaptive"
+POLICIES = (INLINE, THREAD, PROCESS, ADAPTIVE)
+
+
+class CPUExecutor:
+    """Runs CPU-bound callables according to the configured execution policy."""
+
+    def __init__(self, policy: str = ADAPTIVE, max_workers: int = 4,
+                 adaptive_pool: str = THREAD, adaptive_threshold: int = 100):
+        """
+        Initialize the executor. Pools are created on first use.
+
+        Args:
+            policy: One of inline, thread, process, adaptive
+            max_workers: Size of each pool; also bounds offloaded calls waiting per event loop
+            adaptive_pool: Pool used by the adaptive policy (thread or process)
+            adaptive_threshold: Estimated cost from which the adaptive policy offloads
+
+        Raises:
+            ValueError: If the policy or adaptive pool is unknown
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown execution policy '{policy}', expected one of {', '.join(POLICIES)}")
+        if adaptive_pool not in (THREAD, PROCESS):
+            raise ValueError(f"Adaptive pool must be '{THREAD}' or '{PROCESS}', got '{adaptive_pool}'")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.policy = policy
+        self.max_workers = max_workers
+        self.adaptive_pool = adaptive_pool
+        self.adaptive_threshold = adaptive_threshold
+        self.counts: Dict[str, int] = {INLINE: 0, THREAD: 0, PROCESS: 0}
+        self._pools: Dict[str, Executor] = {}
+        self._pools_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def target(self, cost: int = 0) -> str:
+        """Where a call with the given estimated cost runs: inline, thread or process."""
+        if self.policy == ADAPTIVE:
+            return self.adaptive_pool if cost >= self.adaptive_threshold else INLINE
+        return self.policy
+
+    async def run(self, func: Callable[..., Any], *args: Any, cost: int = 0) -> Any:
+        """
+        Run func(*args) under the execution policy.
+
+        Args:
+            func: Callable to run; must be picklable for the process pool
+            args: Positional arguments for func
+            cost: Estimated cost, used by the adaptive policy
+
+        Returns:
+            Whatever func returns
+        """
+        kind = self.target(cost)
+        self.counts[kind] += 1
+        if kind == INLINE:
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        async with self._loop_slots(loop):
+            return await loop.run_in_executor(self._pool(kind), func, *args)
+
+    def _loop_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """Semaphore bounding the calls queued on the pools from this event loop."""
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers * 2)
+            self._slots_loop = loop
+        return self._slots
+
+    def _pool(self, kind: str) -> Executor:
+        """Get or create the pool of the given kind."""
+        pool = self._pools.get(kind)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(kind)
+                if pool is None:
+                    if kind == PROCESS:
+                        pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu")
+                    self._pools[kind] = pool
+        return pool
+
+    def shutdown(self) -> None:
+        """Shut down any pools that were created."""
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+
+# Global executor configured from settings
+cpu_executor = CPUExecutor(
+    policy=settings.execution_policy,
+    max_workers=settings.execution_workers,
+    adaptive_pool=settings.execution_adaptive_pool,
+    adaptive_threshold=settings.execution_adaptive_threshold,
+)
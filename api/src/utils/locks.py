@@ -0,0 +1,86 @@
+"""
+Fine-grained locking for in-memory state touched from thread pools.
+
+The managers used to rely on everything running on the event loop thread.
+Now that their work is offloaded to the I/O pool, per-key state (a user, a
+counter) is guarded by lock striping: a fixed array of locks indexed
+by the key's hash. Operations on different keys rarely contend and memory
+stays bounded no matter how many keys exist.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterable, Iterator
+
+
+class StripedLock:
+    """A fixed set of re-entrant locks shared among keys by hash."""
+
+    def __init__(self, stripes: int = 64):
+        """
+        Initialize the stripes.
+
+        Args:
+            stripes: Number of locks; keys whose hashes collide share one
+
+        Raises:
+            ValueError: If stripes is below 1
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __call__(self, key: Hashable) -> threading.RLock:
+        """Lock guarding key, for use as `with striped(key): ...`."""
+        return self._locks[hash(key) % len(self._locks)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @contextmanager
+    def all(self) -> Iterator[None]:
+        """
+        Hold every stripe, e.g. to read a consistent snapshot. Stripes are
+        taken in a fixed order, so this cannot deadlock with callers that
+        hold a single stripe.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+class AtomicCounters:
+    """Named integer counters that can be incremented from any thread."""
+
+    def __init__(self, names: Iterable[str], stripes: int = 16):
+        """
+        Initialize every counter to zero.
+
+        Args:
+            names: Counter names
+            stripes: Locks shared among the counters
+        """
+        self._values: Dict[str, int] = {name: 0 for name in names}
+        self._locks = StripedLock(stripes)
+
+    def increment(self, name: str, amount: int = 1) -> int:
+        """
+        Add amount to a counter.
+
+        Returns:
+            The new value
+        """
+        with self._locks(name):
+            self._values[name] += amount
+            return self._values[name]
+
+    def __getitem__(self, name: str) -> int:
+        return self._values[name]
+
+    def snapshot(self) -> Dict[str, int]:
+        """Copy of all counters."""
+        return dict(self._values)
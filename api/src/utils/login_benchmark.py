@@ -0,0 +1,100 @@
+"""
+Login throughput micro-benchmark for the advanced user routes.
+
+Times the per-login hot path (username validation, welcome message, the
+whole `UserManager.iniciar_sesion`) and, with --http, a login storm against
+POST /advanced/users/login through the ASGI app in process. Every stage
+reports logins per second and the median / p99 latency of a call.
+
+Usage:
+    python -m src.utils.login_benchmark --logins 50000 --users 1000 --http 5000
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.core.config import settings
+from src.modules.user_manager import UserManager
+
+
+def _names(users: int) -> List[str]:
+    """Valid usernames (letters, digits and underscores, at most 20 characters)."""
+    return [f"user_{i}" for i in range(users)]
+
+
+def _measure(call: Callable[[str], object], names: List[str], calls: int) -> Dict[str, float]:
+    """
+    Run call over names round-robin and time every call.
+
+    Returns:
+        Throughput and latency figures in microseconds
+    """
+    latencies = []
+    start = time.perf_counter()
+    for i in range(calls):
+        t0 = time.perf_counter()
+        call(names[i % len(names)])
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "calls": calls,
+        "per_second": calls / elapsed if elapsed else float("inf"),
+        "median_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6,
+    }
+
+
+def run(logins: int = 50_000, users: int = 1_000, http: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark each stage of a login.
+
+    Args:
+        logins: Calls per in-process stage
+        users: Distinct usernames the calls cycle through
+        http: Requests sent to /advanced/users/login (0 skips the HTTP stage)
+
+    Returns:
+        Figures per stage, keyed by stage name
+    """
+    names = _names(users)
+    manager = UserManager()
+    results = {
+        "validate": _measure(manager.validar_nombre_usuario, names, logins),
+        "welcome": _measure(manager.generar_mensaje_bienvenida, names, logins),
+        "login": _measure(manager.iniciar_sesion, names, logins),
+    }
+
+    if http:
+        from fastapi.testclient import TestClient
+
+        from main import app
+
+        # Never restore or overwrite the real snapshot from a benchmark
+        settings.snapshot_path = ""
+        with TestClient(app) as client:
+            def login(name: str) -> None:
+                response = client.post("/advanced/users/login", json={"nombre": name})
+                response.raise_for_status()
+
+            results["http"] = _measure(login, names, http)
+    return results
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark login throughput")
+    parser.add_argument("--logins", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--http", type=int, default=0, help="Requests to /advanced/users/login (0: skip)")
+    args = parser.parse_args(argv)
+
+    for stage, figures in run(args.logins, args.users, args.http).items():
+        print(f"{stage:<10} {figures['calls']:>8} calls  {figures['per_second']:>12,.0f}/s  "
+              f"median {figures['median_us']:8.2f} us  p99 {figures['p99_us']:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
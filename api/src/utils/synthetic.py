@@ -0,0 +1,318 @@
+"""
+Synthetic credit application generator for benchmarks and soak tests.
+
+Produces seeded, vectorized batches of `Application` rows whose income, debt
+and score distributions land on the APPROVED, COUNTEROFFER and REJECTED
+branches of `CreditEvaluator.evaluate` in a requested proportion.
+
+Usage:
+    python -m src.utils.synthetic --rows 1000000 --format csv --output apps.csv
+"""
+
+import argparse
+import sys
+from typing import Dict, Iterator, Optional, TextIO
+
+import numpy as np
+
+from src.models.application import Application
+from src.core.config import policy
+
+
+APPROVED, COUNTEROFFER, REJECTED = 0, 1, 2
+DECISIONS = ("APPROVED", "COUNTEROFFER", "REJECTED")
+EMPLOYMENT_TYPES = ("EMPLOYEE", "SELF_EMPLOYED")
+DEFAULT_MIX = {"APPROVED": 0.55, "COUNTEROFFER": 0.25, "REJECTED": 0.20}
+
+COLUMNS = (
+    "name", "age", "monthly_income", "monthly_debt", "employment_type",
+    "months_of_experience", "credit_score", "amount", "term", "active_defaults",
+)
+
+
+def _rate_by_score(score: np.ndarray) -> np.ndarray:
+    """Vectorized counterpart of CreditCalculator.calculate_rate_by_score (NaN below 600)."""
+    return np.select(
+        [score >= 720, score >= 660, score >= 600],
+        [0.18, 0.24, 0.32],
+        default=np.nan,
+    )
+
+
+def _annuity_factor(annual_rate: np.ndarray, term: np.ndarray) -> np.ndarray:
+    """Monthly payment per unit of principal for the given annual rate and term."""
+    i = annual_rate / 12.0
+    growth = (1.0 + i) ** term
+    return (i * growth) / (growth - 1.0)
+
+
+def classify(batch: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Vectorized mirror of CreditEvaluator.evaluate returning decision codes.
+
+    Args:
+        batch: Column arrays as produced by SyntheticApplicationGenerator.generate
+
+    Returns:
+        Array of APPROVED / COUNTEROFFER / REJECTED codes
+    """
+    income = batch["monthly_income"]
+    debt = batch["monthly_debt"]
+    term = batch["term"]
+    amount = batch["amount"]
+    experience = batch["months_of_experience"]
+    self_employed = batch["employment_type"] == 1
+
+    invalid = (
+        (batch["age"] < policy.MIN_AGE) | (batch["age"] > policy.MAX_AGE)
+        | (income < policy.MIN_INCOME)
+        | (experience < np.where(self_employed, 12, 6))
+        | batch["active_defaults"]
+        | (amount < policy.MIN_AMOUNT) | (amount > policy.MAX_AMOUNT)
+        | (term < policy.MIN_TERM) | (term > policy.MAX_TERM)
+        | (batch["credit_score"] < 600)
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(invalid, 0.18, _rate_by_score(batch["credit_score"]))
+        payment = np.round(amount * _annuity_factor(rate, term), 2)
+        safe_income = np.where(income > 0, income, 1.0)
+        current_dti = np.where(income > 0, debt / safe_income, 1.0)
+        total_dti = np.where(income > 0, (debt + payment) / safe_income, 1.0)
+        unaffordable = (payment > policy.MAX_AFFECTATION * income) | (total_dti > policy.TOTAL_DTI_MAX)
+
+        # The counteroffer search maximizes the affordable amount over terms
+        # initial_term, initial_term + 6, ... so the longest searched term wins.
+        longest_term = term + 6 * ((policy.MAX_TERM - term) // 6)
+        max_payment = np.minimum(policy.MAX_AFFECTATION * income, policy.TOTAL_DTI_MAX * income - debt)
+        best_amount = np.minimum(
+            np.minimum(amount, policy.MAX_AMOUNT),
+            max_payment / _annuity_factor(rate, longest_term),
+        )
+
+    decision = np.full(income.shape, APPROVED, dtype=np.uint8)
+    decision[unaffordable & (best_amount >= policy.MIN_AMOUNT)] = COUNTEROFFER
+    decision[unaffordable & (best_amount < policy.MIN_AMOUNT)] = REJECTED
+    decision[current_dti > policy.CURRENT_DTI_MAX] = REJECTED
+    decision[invalid] = REJECTED
+    return decision
+
+
+class SyntheticApplicationGenerator:
+    """Seeded NumPy generator of credit applications with a target decision mix."""
+
+    def __init__(self, seed: int = 0, mix: Optional[Dict[str, float]] = None):
+        """
+        Initialize the generator.
+
+        Args:
+            seed: Seed for the underlying NumPy random generator
+            mix: Target share per decision, e.g. {"APPROVED": 0.6, "REJECTED": 0.4}
+
+        Raises:
+            ValueError: If the mix has unknown decisions or no positive weight
+        """
+        mix = dict(DEFAULT_MIX if mix is None else mix)
+        unknown = set(mix) - set(DECISIONS)
+        if unknown:
+            raise ValueError(f"Unknown decisions in mix: {', '.join(sorted(unknown))}")
+        weights = np.array([float(mix.get(d, 0.0)) for d in DECISIONS])
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("Decision mix must have non-negative weights with a positive total")
+
+        self.seed = seed
+        self.mix = dict(zip(DECISIONS, weights / weights.sum()))
+        self._rng = np.random.default_rng(seed)
+        self._generated = 0
+
+    def _class_counts(self, n: int) -> np.ndarray:
+        """Split n rows across decisions following the mix exactly (largest remainder)."""
+        shares = np.array([self.mix[d] for d in DECISIONS]) * n
+        counts = np.floor(shares).astype(np.int64)
+        remainder = n - counts.sum()
+        counts[np.argsort(shares - counts)[::-1][:remainder]] += 1
+        return counts
+
+    def _base(self, n: int) -> Dict[str, np.ndarray]:
+        """Draw applicants that pass every basic validation rule."""
+        rng = self._rng
+        income = np.clip(rng.lognormal(np.log(22_000), 0.55, n), policy.MIN_INCOME * 1.02, 250_000)
+        return {
+            "age": rng.integers(policy.MIN_AGE, policy.MAX_AGE + 1, n),
+            "monthly_income": np.round(income, 2),
+            "employment_type": (rng.random(n) < 0.3).astype(np.uint8),
+            "months_of_experience": rng.integers(12, 360, n),
+            "credit_score": rng.integers(600, 851, n),
+            "term": rng.choice(np.arange(policy.MIN_TERM, policy.MAX_TERM + 1, 6), n),
+            "active_defaults": np.zeros(n, dtype=bool),
+        }
+
+    def _priced(self, n: int, low: float, high: float) -> Dict[str, np.ndarray]:
+        """
+        Draw valid applicants whose requested payment is a multiple in [low, high)
+        of the largest payment the affordability and total DTI rules allow.
+        """
+        rng = self._rng
+        batch = self._base(n)
+        income = batch["monthly_income"]
+        # Current DTI up to 35% keeps the 12-month counteroffer above MIN_AMOUNT
+        debt = np.round(income * rng.uniform(0.0, 0.35, n), 2)
+        max_payment = np.minimum(policy.MAX_AFFECTATION * income, policy.TOTAL_DTI_MAX * income - debt)
+        factor = _annuity_factor(_rate_by_score(batch["credit_score"]), batch["term"])
+        amount = max_payment * rng.uniform(low, high, n) / factor
+        rounded = np.floor(amount / 100.0) * 100.0 if high <= 1.0 else np.ceil(amount / 100.0) * 100.0
+        batch["monthly_debt"] = debt
+        batch["amount"] = np.clip(rounded, policy.MIN_AMOUNT, policy.MAX_AMOUNT)
+        return batch
+
+    def _rejected(self, n: int) -> Dict[str, np.ndarray]:
+        """Draw approvable applicants and break one policy rule in each."""
+        rng = self._rng
+        batch = self._priced(n, 0.3, 0.95)
+        rule = rng.integers(0, 7, n)
+        income = batch["monthly_income"]
+
+        low_score = rule == 0
+        batch["credit_score"] = np.where(low_score, rng.integers(300, 600, n), batch["credit_score"])
+        batch["active_defaults"] = rule == 1
+        high_dti = rule == 2
+        batch["monthly_debt"] = np.where(high_dti, np.round(income * rng.uniform(0.42, 0.9, n), 2), batch["monthly_debt"])
+        low_income = rule == 3
+        batch["monthly_income"] = np.where(low_income, np.round(rng.uniform(2_000, policy.MIN_INCOME * 0.98, n), 2), income)
+        old = rule == 4
+        batch["age"] = np.where(old, rng.integers(policy.MAX_AGE + 1, 90, n), batch["age"])
+        green = rule == 5
+        batch["months_of_experience"] = np.where(green, rng.integers(0, 6, n), batch["months_of_experience"])
+        big = rule == 6
+        batch["amount"] = np.where(big, np.round(rng.uniform(policy.MAX_AMOUNT * 1.01, policy.MAX_AMOUNT * 3, n), -2), batch["amount"])
+        return batch
+
+    def _draw(self, decision: int, n: int) -> Dict[str, np.ndarray]:
+        """Draw n rows for one decision, resampling the few that miss the branch."""
+        drawers = {
+            APPROVED: lambda k: self._priced(k, 0.3, 0.95),
+            COUNTEROFFER: lambda k: self._priced(k, 1.1, 3.0),
+            REJECTED: self._rejected,
+        }
+        parts, have = [], 0
+        while have < n:
+            want = n - have
+            batch = drawers[decision](int(want * 1.1) + 16)
+            keep = np.flatnonzero(classify(batch) == decision)[:want]
+            parts.append({k: v[keep] for k, v in batch.items()})
+            have += keep.size
+        return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+    def generate(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Generate n applications as column arrays in random order.
+
+        The "decision" column holds the branch each row is built to reach;
+        "employment_type" is 0 for EMPLOYEE and 1 for SELF_EMPLOYED. Names are
+        not materialized; use `names` or the row/CSV/NDJSON outputs.
+
+        Args:
+            n: Number of rows
+
+        Returns:
+            Dictionary of equally sized column arrays
+        """
+        counts = self._class_counts(n)
+        parts = []
+        for decision, count in zip((APPROVED, COUNTEROFFER, REJECTED), counts):
+            if count:
+                part = self._draw(decision, int(count))
+                part["decision"] = np.full(int(count), decision, dtype=np.uint8)
+                parts.append(part)
+        if not parts:
+            return {k: np.empty(0) for k in COLUMNS[1:] + ("decision", "index")}
+
+        order = self._rng.permutation(n)
+        batch = {k: np.concatenate([p[k] for p in parts])[order] for k in parts[0]}
+        batch["index"] = np.arange(self._generated, self._generated + n)
+        self._generated += n
+        return batch
+
+    @staticmethod
+    def names(batch: Dict[str, np.ndarray]) -> list:
+        """Applicant names for a generated batch."""
+        return [f"Applicant {i:08d}" for i in batch["index"].tolist()]
+
+    def iter_applications(self, n: int, chunk_size: int = 100_000) -> Iterator[Application]:
+        """Yield n `Application` objects, generated chunk by chunk."""
+        for batch in self._chunks(n, chunk_size):
+            for row in zip(self.names(batch), *(batch[k].tolist() for k in COLUMNS[1:])):
+                values = list(row)
+                values[4] = EMPLOYMENT_TYPES[values[4]]
+                yield Application(*values)
+
+    def write_csv(self, out: TextIO, n: int, chunk_size: int = 100_000) -> None:
+        """Write n applications as CSV with a header row."""
+        out.write(",".join(COLUMNS) + ",expected_decision\n")
+        for batch in self._chunks(n, chunk_size):
+            out.write("".join(
+                f"{name},{age},{income:.2f},{debt:.2f},{EMPLOYMENT_TYPES[emp]},{exp},{score},"
+                f"{amount:.2f},{term},{'true' if defaults else 'false'},{DECISIONS[decision]}\n"
+                for name, age, income, debt, emp, exp, score, amount, term, defaults, decision
+                in self._rows(batch)
+            ))
+
+    def write_ndjson(self, out: TextIO, n: int, chunk_size: int = 100_000) -> None:
+        """Write n applications as newline-delimited JSON request bodies."""
+        for batch in self._chunks(n, chunk_size):
+            out.write("".join(
+                f'{{"name":"{name}","age":{age},"monthly_income":{income:.2f},"monthly_debt":{debt:.2f},'
+                f'"employment_type":"{EMPLOYMENT_TYPES[emp]}","months_of_experience":{exp},'
+                f'"credit_score":{score},"amount":{amount:.2f},"term":{term},'
+                f'"active_defaults":{"true" if defaults else "false"},"expected_decision":"{DECISIONS[decision]}"}}\n'
+                for name, age, income, debt, emp, exp, score, amount, term, defaults, decision
+                in self._rows(batch)
+            ))
+
+    def _chunks(self, n: int, chunk_size: int) -> Iterator[Dict[str, np.ndarray]]:
+        """Generate n rows in batches of at most chunk_size."""
+        remaining = n
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            yield self.generate(size)
+            remaining -= size
+
+    def _rows(self, batch: Dict[str, np.ndarray]) -> Iterator[tuple]:
+        """Row tuples of plain Python values in COLUMNS order plus the decision."""
+        return zip(self.names(batch), *(batch[k].tolist() for k in COLUMNS[1:] + ("decision",)))
+
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    """Parse 'approved=0.6,counteroffer=0.3,rejected=0.1' into a mix dictionary."""
+    mix = {}
+    for item in text.split(","):
+        key, _, value = item.partition("=")
+        mix[key.strip().upper()] = float(value)
+    return mix
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Generate synthetic credit applications")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", type=_parse_mix, default=None,
+                        help="e.g. approved=0.6,counteroffer=0.25,rejected=0.15")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--output", default="-", help="Output path, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticApplicationGenerator(seed=args.seed, mix=args.mix)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        if args.format == "csv":
+            generator.write_csv(out, args.rows)
+        else:
+            generator.write_ndjson(out, args.rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
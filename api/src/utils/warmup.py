@@ -0,0 +1,124 @@
+"""
+Startup warmup and readiness state.
+
+The warmup builds derived lookup tables and pushes a representative set of
+applications through request validation, evaluation and response
+serialization, so the first real requests after a deploy don't pay for it.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.core.config import policy
+from src.models.schemas import CreditApplicationRequest, CreditEvaluationResponse
+from src.utils.calculators import factor_table
+from src.utils.evaluator import CreditEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+# Applications covering every decision branch, with the decision each must reach
+REPRESENTATIVE_APPLICATIONS: List[Dict[str, Any]] = [
+    {"expected": "APPROVED", "age": 35, "monthly_income": 25000, "monthly_debt": 5000,
+     "employment_type": "EMPLOYEE", "months_of_experience": 24, "credit_score": 720,
+     "amount": 150000, "term": 36, "active_defaults": False},
+    {"expected": "APPROVED", "age": 42, "monthly_income": 18000, "monthly_debt": 2000,
+     "employment_type": "SELF_EMPLOYED", "months_of_experience": 60, "credit_score": 670,
+     "amount": 60000, "term": 24, "active_defaults": False},
+    {"expected": "COUNTEROFFER", "age": 29, "monthly_income": 15000, "monthly_debt": 3000,
+     "employment_type": "EMPLOYEE", "months_of_experience": 18, "credit_score": 640,
+     "amount": 250000, "term": 12, "active_defaults": False},
+    {"expected": "COUNTEROFFER", "age": 51, "monthly_income": 30000, "monthly_debt": 9000,
+     "employment_type": "SELF_EMPLOYED", "months_of_experience": 120, "credit_score": 780,
+     "amount": 300000, "term": 24, "active_defaults": False},
+    {"expected": "REJECTED", "age": 33, "monthly_income": 20000, "monthly_debt": 10000,
+     "employment_type": "EMPLOYEE", "months_of_experience": 36, "credit_score": 700,
+     "amount": 50000, "term": 24, "active_defaults": False},
+    {"expected": "REJECTED", "age": 25, "monthly_income": 12000, "monthly_debt": 1000,
+     "employment_type": "EMPLOYEE", "months_of_experience": 12, "credit_score": 550,
+     "amount": 40000, "term": 24, "active_defaults": True},
+]
+
+
+class WarmupState:
+    """Tracks whether the startup warmup has completed."""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[datetime] = None
+        self.duration_ms: Optional[float] = None
+        self.evaluations = 0
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def status(self) -> str:
+        if self.ready:
+            return "ready"
+        if self.error:
+            return "failed"
+        return "warming_up"
+
+
+# Global readiness state
+warmup_state = WarmupState()
+
+
+def _evaluate(payload: Dict[str, Any]) -> str:
+    """Run one payload through the same steps as POST /api/v1/evaluate."""
+    request = CreditApplicationRequest(name="Warmup", **payload)
+    application = request.to_application()
+    result = CreditEvaluator.evaluate(application, CreditEvaluator.assess(application))
+    CreditEvaluationResponse(
+        reference=result.reference,
+        decision=result.decision,
+        reasons=result.reasons,
+        details=result.details
+    ).model_dump_json()
+    return result.decision
+
+
+def run_warmup(rounds: int = 3) -> WarmupState:
+    """
+    Build derived tables and run the representative evaluations.
+
+    Safe to call more than once; only the first call does the work.
+
+    Args:
+        rounds: Times to run the representative set
+
+    Returns:
+        The global warmup state
+    """
+    with warmup_state._lock:
+        if warmup_state.ready:
+            return warmup_state
+
+        warmup_state.started_at = datetime.now()
+        warmup_state.error = None
+        start = time.perf_counter()
+        try:
+            factor_table.build()
+            evaluations = 0
+            for _ in range(rounds):
+                for application in REPRESENTATIVE_APPLICATIONS:
+                    payload = {k: v for k, v in application.items() if k != "expected"}
+                    decision = _evaluate(payload)
+                    if decision != application["expected"]:
+                        raise RuntimeError(
+                            f"Warmup application expected {application['expected']}, got {decision}"
+                        )
+                    evaluations += 1
+        except Exception as e:
+            warmup_state.error = str(e)
+            logger.exception("Warmup failed")
+            return warmup_state
+
+        warmup_state.evaluations = evaluations
+        warmup_state.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        warmup_state.ready = True
+        logger.info("Warmup finished in %.3f ms (policy %s)", warmup_state.duration_ms, policy.version())
+        return warmup_state
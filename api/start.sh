@@ -8,6 +8,8 @@ set -e
 HOST=${HOST:-"0.0.0.0"}
 PORT=${PORT:-8000}
 WORKERS=${WORKERS:-4}
+# Read by the app too: each worker keeps its own state snapshot (see SNAPSHOT_PATH)
+export WORKERS
 LOG_LEVEL=${LOG_LEVEL:-"info"}
 
 echo "🚀 Starting BBVA Credit Calculator API..."
@@ -20,8 +22,10 @@ echo "📊 Log Level: $LOG_LEVEL"
 mkdir -p /app/file_manager
 mkdir -p /app/resumen_manager
 
-# Start the application with Gunicorn
+# Start the application with Gunicorn; gunicorn.conf.py builds the read-only
+# evaluation state in the master and freezes the GC before forking workers
 exec gunicorn main:app \
+    --config gunicorn.conf.py \
     --workers $WORKERS \
     --worker-class uvicorn.workers.UvicornWorker \
     --bind $HOST:$PORT \
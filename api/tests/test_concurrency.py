@@ -0,0 +1,102 @@
+"""Stress tests: concurrent creates and writes through FileManager keep every total consistent."""
+
+import threading
+
+import pytest
+
+from src.modules.file_manager import FileManager
+from src.modules.file_store import FileStore
+from src.modules.search_index import IndiceBusqueda
+
+THREADS = 8
+FILES_PER_THREAD = 6
+WRITES_PER_FILE = 3
+RECOUNTED_PREFIXES = ("archivos:", "solo_lectura:", "tipo:", "tamaño_bytes:", "lineas:", "caracteres:", "blobs:")
+
+
+def _content(thread: int, index: int, write: int) -> str:
+    return f"hilo{thread} archivo{index} escritura{write}\nrevision {write} " + "palabra " * (thread + write)
+
+
+def _recount(store: FileStore) -> dict:
+    """Counters rebuilt from the rows, the same way FileStore rebuilds them."""
+    totals = dict(store.blobs.contribucion_total())
+    for _, metadata in store.listar_metadata():
+        for key, value in FileStore._contribucion(metadata["origen"], metadata).items():
+            totals[key] = totals.get(key, 0) + value
+    return {key: value for key, value in totals.items() if value}
+
+
+def _recounted_keys(counters: dict) -> dict:
+    return {key: value for key, value in counters.items() if value and key.startswith(RECOUNTED_PREFIXES)}
+
+
+@pytest.mark.parametrize("durability", ["group", "sync"])
+def test_concurrent_creates_and_writes_keep_totals_consistent(tmp_path, durability):
+    manager = FileManager(str(tmp_path), durabilidad=durability, ventana_grupo_ms=1)
+    # Build the index first so the writers also exercise its incremental updates
+    manager._construir_indice()
+    manager.crear_archivo("compartido.txt", "inicial", "setup")
+    base = manager.estadisticas.snapshot()
+
+    start = threading.Barrier(THREADS)
+    failures = []
+    shared_writes = set()
+
+    def worker(thread: int) -> None:
+        try:
+            start.wait()
+            try:
+                manager.crear_archivo("carrera.txt", f"ganador {thread}", f"hilo{thread}")
+            except ValueError:
+                pass
+            for index in range(FILES_PER_THREAD):
+                manager.crear_archivo(f"t{thread}_{index}.txt", _content(thread, index, 0), f"hilo{thread}")
+            for write in range(1, WRITES_PER_FILE + 1):
+                for index in range(FILES_PER_THREAD):
+                    manager.escribir_archivo(f"t{thread}_{index}.txt", _content(thread, index, write), f"hilo{thread}")
+                shared = f"compartido por hilo{thread} en escritura{write}"
+                shared_writes.add(shared)
+                manager.escribir_archivo("compartido.txt", shared, f"hilo{thread}")
+        except BaseException as error:  # pragma: no cover - surfaced by the assertion below
+            failures.append(error)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+    manager.almacen.sincronizar()
+
+    # In-process operation counters: one per successful call, one error per lost race
+    stats = manager.estadisticas.snapshot()
+    assert stats["archivos_creados"] - base["archivos_creados"] == THREADS * FILES_PER_THREAD + 1
+    assert stats["archivos_escritos"] - base["archivos_escritos"] == THREADS * WRITES_PER_FILE * (FILES_PER_THREAD + 1)
+    assert stats["errores_manejo"] - base["errores_manejo"] == THREADS - 1
+
+    # Final contents: each private file holds its last write, the shared one some complete write
+    for thread in range(THREADS):
+        for index in range(FILES_PER_THREAD):
+            archivo = manager.almacen.obtener(f"t{thread}_{index}.txt")
+            assert archivo["contenido"] == _content(thread, index, WRITES_PER_FILE)
+            assert archivo["tamaño_bytes"] == len(archivo["contenido"].encode("utf-8"))
+    assert manager.almacen.obtener("compartido.txt")["contenido"] in shared_writes
+    assert manager.almacen.obtener("carrera.txt")["contenido"].startswith("ganador ")
+
+    # Persistent counters match a recount of the rows, both cached and re-read from SQLite
+    store = manager.almacen
+    expected = _recount(store)
+    assert _recounted_keys(store.contadores.leer()) == expected
+    store.contadores.invalidar()
+    assert _recounted_keys(store.contadores.leer()) == expected
+    assert store.contadores.valor("archivos:usuario") == THREADS * FILES_PER_THREAD + 2
+
+    # The incrementally maintained index matches one built from scratch
+    rebuilt = IndiceBusqueda(separador_linea=manager.indice.separador_linea)
+    for nombre, metadata in store.listar_metadata():
+        rebuilt.indexar(nombre, store.blobs.leer(metadata["hash_contenido"], conservar=False))
+    assert manager.indice.estadisticas() == rebuilt.estadisticas()
+    assert manager.indice._terminos_archivo == rebuilt._terminos_archivo
+
+    store.cerrar()
@@ -0,0 +1,58 @@
+"""Aggregate counters only ever expose committed totals."""
+
+import threading
+
+import pytest
+
+from src.modules.file_store import FileStore
+
+
+def _registro(contenido):
+    return {"contenido": contenido, "tipo": "texto", "autor": "ana", "tamaño_bytes": len(contenido.encode("utf-8"))}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FileStore(tmp_path / "archivos.db", durabilidad="group", ventana_grupo_ms=200)
+    yield store
+    store.cerrar()
+
+
+def test_open_transaction_totals_stay_hidden_until_commit(store):
+    seen = []
+
+    def read_from_other_thread():
+        seen.append(store.contadores.valor("archivos:usuario"))
+
+    with store.transaccion():
+        store.insertar("a.txt", "usuario", _registro("uno"))
+        assert store.contadores.valor("archivos:usuario") == 0
+        reader = threading.Thread(target=read_from_other_thread)
+        reader.start()
+        reader.join()
+    assert seen == [0]
+    assert store.contadores.valor("archivos:usuario") == 1
+    assert store.totales("tamaño_bytes") == {"usuario": 3}
+
+
+def test_rolled_back_transaction_leaves_totals_unchanged(store):
+    store.insertar("a.txt", "usuario", _registro("uno"))
+    with pytest.raises(RuntimeError):
+        with store.transaccion():
+            store.insertar("b.txt", "usuario", _registro("dos"))
+            raise RuntimeError("revertir")
+    assert store.contadores.valor("archivos:usuario") == 1
+
+
+def test_pending_group_commit_is_not_visible(store):
+    # Leave a group open the way its leader does while waiting for the window:
+    # BEGIN IMMEDIATE taken, the write done, the store lock released
+    with store._lock:
+        store._escribir("a.txt", "usuario", store._preparar("usuario", _registro("uno")), reemplazar=False)
+        grupo = store._grupo
+    assert grupo is not None
+    assert store.contadores.valor("archivos:usuario") == 0
+
+    with store._lock:
+        store._confirmar_grupo(grupo)
+    assert store.contadores.valor("archivos:usuario") == 1
@@ -0,0 +1,60 @@
+"""Credit evaluation routes validate and price each application once."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.utils import evaluator as evaluator_module
+
+
+APPLICATION = {
+    "name": "Ana", "age": 35, "monthly_income": 30000, "monthly_debt": 2000,
+    "employment_type": "EMPLOYEE", "months_of_experience": 24, "credit_score": 720,
+    "amount": 250000, "term": 24, "active_defaults": False,
+}
+
+
+@pytest.fixture
+def validations(monkeypatch):
+    calls = []
+    original_validate = evaluator_module.ApplicationValidator.validate
+    monkeypatch.setattr(
+        evaluator_module.ApplicationValidator, "validate",
+        staticmethod(lambda application: calls.append(application.name) or original_validate(application))
+    )
+    return calls
+
+
+def _requests_only(names):
+    return [name for name in names if name != "Warmup"]  # the startup warmup runs in the background
+
+
+@pytest.fixture
+def client():
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_single_evaluation_validates_once(client, validations):
+    response = client.post("/api/v1/evaluate", json=APPLICATION)
+    assert response.status_code == 200
+    assert response.json()["decision"] == "COUNTEROFFER"
+    assert _requests_only(validations) == ["Ana"]
+
+
+def test_batch_evaluation_validates_each_application_once(client, validations):
+    applications = [dict(APPLICATION, name=f"app{i}", amount=10000 * (i + 1)) for i in range(6)]
+    response = client.post("/api/v1/evaluate/batch", json={"applications": applications})
+    assert response.status_code == 200
+    assert response.json()["total"] == 6
+    assert sorted(_requests_only(validations)) == sorted(a["name"] for a in applications)
+
+
+def test_assessment_cost_flags_the_counteroffer_search():
+    application = evaluator_module.Application(**dict(APPLICATION, employment_type="EMPLOYEE"))
+    expensive = evaluator_module.CreditEvaluator.assess(application)
+    cheap = evaluator_module.CreditEvaluator.assess(evaluator_module.Application(**dict(APPLICATION, amount=10000)))
+    assert cheap.cost == 1
+    assert expensive.cost > 1
+    assert evaluator_module.CreditEvaluator.evaluate(application, expensive).decision == "COUNTEROFFER"
@@ -0,0 +1,93 @@
+"""Keyset pagination of /advanced/files/list."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.modules import file_manager as file_manager_module
+from src.modules.file_manager import FileManager
+
+
+ORDERS = ("origen", "nombre", "fecha_modificacion", "autor")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = FileManager(str(tmp_path))
+    operaciones = []
+    for i in range(23):
+        operaciones.append({
+            "operacion": "crear", "nombre_archivo": f"f{i:02d}.txt", "contenido": str(i),
+            "autor": ("ana", "luis", "eva")[i % 3], "tipo": ("nota", "texto")[i % 2],
+        })
+    for i, dia in enumerate((3, 1, 2)):
+        manager.fecha_actual = (dia, 6, 2025)
+        manager.ejecutar_lote(operaciones[i::3], transaccional=True)
+    yield manager
+    manager.almacen.cerrar()
+
+
+def _all_pages(manager, orden, descendente, limite, **filtros):
+    names, cursor = [], None
+    while True:
+        page = manager.obtener_lista_archivos(orden, descendente, limite, cursor, **filtros)
+        assert page["archivos_en_pagina"] <= limite
+        names += [archivo["nombre"] for archivo in page["archivos"]]
+        cursor = page["siguiente_cursor"]
+        if cursor is None:
+            return names
+
+
+@pytest.mark.parametrize("orden", ORDERS)
+@pytest.mark.parametrize("descendente", (False, True))
+def test_pages_cover_every_file_once_in_order(manager, orden, descendente):
+    unpaged = [archivo["nombre"] for archivo in manager.obtener_lista_archivos(orden, descendente)["archivos"]]
+    assert len(unpaged) == manager.almacen.contar()
+
+    for limite in (1, 4, 7, len(unpaged)):
+        assert _all_pages(manager, orden, descendente, limite) == unpaged
+
+    filtered = [
+        archivo["nombre"]
+        for archivo in manager.obtener_lista_archivos(orden, descendente, autor="eva", tipo="nota")["archivos"]
+    ]
+    assert filtered and _all_pages(manager, orden, descendente, 2, autor="eva", tipo="nota") == filtered
+
+
+def test_unpaged_order_matches_the_sort_key(manager):
+    by_date = manager.obtener_lista_archivos("fecha_modificacion")["archivos"]
+    keys = [(a["fecha_modificacion"][2], a["fecha_modificacion"][1], a["fecha_modificacion"][0], a["nombre"]) for a in by_date]
+    assert keys == sorted(keys)
+    by_author = manager.obtener_lista_archivos("autor", descendente=True)["archivos"]
+    keys = [(a["autor"], a["nombre"]) for a in by_author]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.parametrize("cambio", (
+    {"orden": "autor"}, {"descendente": True}, {"autor": "eva"}, {"tipo": "nota"},
+))
+def test_cursor_of_another_query_is_rejected(manager, cambio):
+    consulta = {"orden": "nombre", "descendente": False, "autor": None, "tipo": None}
+    cursor = manager.obtener_lista_archivos(limite=3, **consulta)["siguiente_cursor"]
+    with pytest.raises(ValueError, match="otra consulta"):
+        manager.obtener_lista_archivos(limite=3, cursor=cursor, **dict(consulta, **cambio))
+
+
+def test_route_answers_400_for_a_mismatched_or_malformed_cursor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "snapshot_path", "")
+    monkeypatch.setattr(file_manager_module, "_file_manager", None)
+    from main import app
+
+    with TestClient(app) as client:
+        first = client.get("/advanced/files/list", params={"orden": "nombre", "limite": 2}).json()["data"]
+        cursor = first["siguiente_cursor"]
+        following = client.get("/advanced/files/list", params={"orden": "nombre", "limite": 2, "cursor": cursor})
+        assert following.status_code == 200
+        assert following.json()["data"]["archivos"][0]["nombre"] > first["archivos"][-1]["nombre"]
+
+        mismatched = client.get("/advanced/files/list", params={"orden": "autor", "limite": 2, "cursor": cursor})
+        assert mismatched.status_code == 400
+        malformed = client.get("/advanced/files/list", params={"orden": "nombre", "cursor": "xx"})
+        assert malformed.status_code == 400
+    file_manager_module._file_manager.almacen.cerrar()
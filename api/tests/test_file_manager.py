@@ -0,0 +1,83 @@
+"""Batch operations: a rolled-back transactional batch leaves no trace in counters or error messages."""
+
+import threading
+
+from src.modules.file_manager import FileManager
+
+
+def _create(nombre, contenido="hola"):
+    return {"operacion": "crear", "nombre_archivo": nombre, "contenido": contenido, "autor": "ana"}
+
+
+def test_rolled_back_batch_does_not_count_its_writes(tmp_path):
+    manager = FileManager(str(tmp_path))
+    before = manager.estadisticas.snapshot()
+
+    lote = manager.ejecutar_lote([
+        _create("nuevo.txt"),
+        {"operacion": "escribir", "nombre_archivo": "nuevo.txt", "contenido": "adios", "autor": "ana"},
+        {"operacion": "leer", "nombre_archivo": "no_existe.txt"},
+    ], transaccional=True)
+
+    assert not lote["confirmado"]
+    assert [r["codigo"] for r in lote["resultados"]] == [409, 409, 404]
+    # The listing in the error comes from committed state, not from the rolled-back batch
+    assert "nuevo.txt" not in lote["resultados"][2]["error"]
+    assert "documento_crediticio.txt" in lote["resultados"][2]["error"]
+    assert manager.almacen.obtener("nuevo.txt") is None
+
+    after = manager.estadisticas.snapshot()
+    assert after["archivos_creados"] == before["archivos_creados"]
+    assert after["archivos_escritos"] == before["archivos_escritos"]
+    assert after["errores_manejo"] == before["errores_manejo"] + 1
+    manager.almacen.cerrar()
+
+
+def test_committed_batch_counts_its_writes(tmp_path):
+    manager = FileManager(str(tmp_path))
+    before = manager.estadisticas.snapshot()
+
+    lote = manager.ejecutar_lote([
+        _create("a.txt"),
+        _create("b.txt"),
+        {"operacion": "escribir", "nombre_archivo": "a.txt", "contenido": "otro", "autor": "ana"},
+    ], transaccional=True)
+
+    assert lote["confirmado"] and lote["exitosas"] == 3
+    after = manager.estadisticas.snapshot()
+    assert after["archivos_creados"] == before["archivos_creados"] + 2
+    assert after["archivos_escritos"] == before["archivos_escritos"] + 1
+    manager.almacen.cerrar()
+
+
+def test_commit_callbacks_of_other_threads_do_not_wait_for_a_transaction(tmp_path):
+    manager = FileManager(str(tmp_path))
+    called = []
+    try:
+        with manager.almacen.transaccion():
+            other = threading.Thread(target=manager.almacen.al_confirmar, args=(lambda: called.append("otro"),))
+            other.start()
+            other.join()
+            manager.almacen.al_confirmar(lambda: called.append("propio"))
+            assert called == ["otro"]
+            raise RuntimeError("revertir")
+    except RuntimeError:
+        pass
+    assert called == ["otro"]
+    manager.almacen.cerrar()
+
+
+def test_seed_files_stored_with_literal_separators_are_normalised(tmp_path):
+    manager = FileManager(str(tmp_path))
+    nombre = "documento_crediticio.txt"
+    archivo = manager.almacen.obtener(nombre)
+    esperado = archivo["contenido"]
+    assert "\n" in esperado
+    archivo["contenido"] = esperado.replace("\n", "\\n")  # what older databases hold
+    manager.almacen.guardar(nombre, archivo.pop("origen"), archivo, autor=archivo["autor"])
+    manager.almacen.cerrar()
+
+    manager = FileManager(str(tmp_path))
+    assert manager.almacen.obtener(nombre)["contenido"] == esperado
+    assert manager.leer_rango(nombre, desde_linea=2, hasta_linea=2)["total_lineas"] == esperado.count("\n") + 1
+    manager.almacen.cerrar()
@@ -0,0 +1,87 @@
+"""Byte-range reads through /advanced/files/stream."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.modules import file_manager as file_manager_module
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "snapshot_path", "")
+    monkeypatch.setattr(file_manager_module, "_file_manager", None)
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+    file_manager_module._file_manager.almacen.cerrar()
+
+
+def test_unsatisfiable_range_reports_the_real_size_without_reading_the_file(client):
+    manager = file_manager_module.get_file_manager()
+    nombre = "documento_crediticio.txt"  # declares tamaño_bytes=256, which is not its real size
+    real_size = len(manager.almacen.obtener(nombre)["contenido"].encode("utf-8"))
+    assert real_size != manager.almacen.obtener_metadata(nombre)["tamaño_bytes"]
+    before = manager.estadisticas.snapshot()
+
+    response = client.get(f"/advanced/files/stream/{nombre}", headers={"Range": f"bytes={real_size + 10}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{real_size}"
+    assert manager.estadisticas["archivos_leidos"] == before["archivos_leidos"]
+
+    malformed = client.get(f"/advanced/files/stream/{nombre}", headers={"Range": "lines=1-2"})
+    assert malformed.status_code == 416
+    assert malformed.headers["Content-Range"] == f"bytes */{real_size}"
+
+
+def test_satisfiable_range_is_served_partially(client):
+    response = client.get("/advanced/files/stream/documento_crediticio.txt", headers={"Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.content == b"Este"
+
+
+def test_line_range_on_created_and_rewritten_content(client):
+    created = client.post("/advanced/files/create", json={
+        "nombre_archivo": "notas.txt", "contenido": "uno\ndos\ntres\ncuatro", "autor": "ana",
+    })
+    assert created.status_code == 200
+
+    response = client.get("/advanced/files/stream/notas.txt", params={"desde_linea": 2, "hasta_linea": 3})
+    assert response.status_code == 200
+    assert response.text == "dos\ntres"
+    assert response.headers["X-Rango-Lineas"] == "2-3/4"
+
+    written = client.post("/advanced/files/write", json={
+        "nombre_archivo": "notas.txt", "contenido": "alfa\nbeta\ngamma\ndelta\nepsilon", "autor": "ana",
+    })
+    assert written.status_code == 200
+    response = client.get("/advanced/files/stream/notas.txt", params={"desde_linea": 4})
+    assert response.status_code == 200
+    assert response.text == "delta\nepsilon"
+    assert response.headers["X-Rango-Lineas"] == "4-5/5"
+
+
+def test_seed_files_are_indexed_by_line(client):
+    response = client.get("/advanced/files/stream/documento_crediticio.txt", params={"desde_linea": 2, "hasta_linea": 2})
+    assert response.status_code == 200
+    assert "\\n" not in response.text
+    assert response.headers["X-Rango-Lineas"].startswith("2-2/")
+
+
+def test_ranged_reads_reuse_the_encoded_content(client, monkeypatch):
+    manager = file_manager_module.get_file_manager()
+    client.post("/advanced/files/create", json={
+        "nombre_archivo": "grande.log", "contenido": "\n".join(f"linea {i}" for i in range(5000)), "autor": "ana",
+    })
+    blob_reads = []
+    original_read = manager.almacen.blobs.leer
+    monkeypatch.setattr(manager.almacen.blobs, "leer", lambda *args, **kwargs: blob_reads.append(args) or original_read(*args, **kwargs))
+
+    for start in (0, 100, 2000):
+        response = client.get("/advanced/files/stream/grande.log", headers={"Range": f"bytes={start}-{start + 9}"})
+        assert response.status_code == 206
+    response = client.get("/advanced/files/stream/grande.log", params={"desde_linea": 4999})
+    assert response.text == "linea 4998\nlinea 4999"
+    assert len(blob_reads) <= 1
@@ -0,0 +1,96 @@
+"""Group commit: queued writes share one COMMIT, and each call returns only once it is durable."""
+
+import threading
+import time
+
+import pytest
+
+from src.modules.file_store import FileStore
+
+WRITERS = 6
+
+
+def _registro(contenido):
+    return {"contenido": contenido, "tipo": "texto", "autor": "ana", "tamaño_bytes": len(contenido.encode("utf-8"))}
+
+
+def _queued_writers(store, count, monkeypatch):
+    """Start writers while the store lock is held, so all of them are queued when it is released."""
+    # Single process, nothing to invalidate: without this the writers would wait
+    # for the lock in sincronizar, before they count as pending
+    monkeypatch.setattr(store, "sincronizar", lambda: [])
+    errors = []
+
+    def write(i):
+        try:
+            store.insertar(f"archivo{i}.txt", "usuario", _registro(f"contenido {i}"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(count)]
+    with store._lock:
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while store._pendientes < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert store._pendientes == count
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_queued_writes_are_committed_together(tmp_path, monkeypatch):
+    store = FileStore(tmp_path / "archivos.db", durabilidad="group", ventana_grupo_ms=5000)
+    started = time.monotonic()
+    _queued_writers(store, WRITERS, monkeypatch)
+    # The last queued writer closes the group, so the leader does not sit out the window
+    assert time.monotonic() - started < 2
+
+    stats = store.estadisticas_escritura()
+    assert stats["escrituras"] == WRITERS
+    assert stats["confirmaciones"] == 1
+    assert stats["escrituras_por_confirmacion"] == WRITERS
+    assert store.contadores.valor("archivos:usuario") == WRITERS
+    store.cerrar()
+
+
+def test_full_group_stops_waiting_for_the_window(tmp_path):
+    store = FileStore(tmp_path / "archivos.db", durabilidad="group", ventana_grupo_ms=5000, max_escrituras_grupo=2)
+    with store._lock:
+        store._escribir("a.txt", "usuario", store._preparar("usuario", _registro("uno")), reemplazar=False)
+        grupo = store._grupo
+        assert not grupo["lleno"].is_set()
+        store._escribir("b.txt", "usuario", store._preparar("usuario", _registro("dos")), reemplazar=False)
+        assert store._grupo is grupo and grupo["lleno"].is_set()
+        store._confirmar_grupo(grupo)
+    assert store.estadisticas_escritura()["confirmaciones"] == 1
+    assert store.contadores.valor("archivos:usuario") == 2
+    store.cerrar()
+
+
+def test_lone_write_does_not_wait_for_the_window(tmp_path):
+    store = FileStore(tmp_path / "archivos.db", durabilidad="group", ventana_grupo_ms=5000)
+    started = time.monotonic()
+    store.insertar("solo.txt", "usuario", _registro("uno"))
+    assert time.monotonic() - started < 2
+    assert store.estadisticas_escritura()["confirmaciones"] == 1
+    store.cerrar()
+
+
+@pytest.mark.parametrize("durability", ["group", "sync", "deferred"])
+def test_returned_writes_are_visible_to_another_connection(tmp_path, monkeypatch, durability):
+    store = FileStore(tmp_path / "archivos.db", durabilidad=durability, ventana_grupo_ms=1)
+    _queued_writers(store, WRITERS, monkeypatch)
+    if durability != "group":
+        assert store.estadisticas_escritura()["confirmaciones"] == WRITERS
+
+    other = FileStore(tmp_path / "archivos.db")
+    assert all(other.obtener(f"archivo{i}.txt")["contenido"] == f"contenido {i}" for i in range(WRITERS))
+    other.cerrar()
+    store.cerrar()
+
+
+def test_unknown_durability_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Durabilidad no válida"):
+        FileStore(tmp_path / "archivos.db", durabilidad="a veces")
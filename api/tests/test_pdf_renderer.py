@@ -0,0 +1,116 @@
+"""PDF rendering: a valid document from the report Markdown, and a job round trip through the routes."""
+
+import re
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.modules import file_manager as file_manager_module
+from src.modules import report_generator as report_generator_module
+from src.modules import user_manager as user_manager_module
+from src.modules.pdf_renderer import codificar, maquetar, renderizar_pdf
+
+MARKDOWN = """# Reporte del Sistema
+
+## Resumen ✅
+
+Texto con **negritas**, `código`, acentos (año, señal) y una flecha → final.
+
+- elemento uno
+- elemento dos
+
+1. primero
+2. segundo
+
+| Métrica | Valor |
+|---------|-------|
+| archivos | 5 |
+
+```
+├── src
+└── tests
+```
+
+---
+"""
+
+
+def test_text_is_encoded_for_the_standard_fonts():
+    assert codificar("año €") == "año ".encode("latin-1") + b"\x80"
+    assert codificar("a → b ✅") == b"a -> b [OK]"
+    assert codificar("🚀 listo") == b" listo"
+
+
+def test_rendered_document_is_a_well_formed_pdf():
+    documento = renderizar_pdf(MARKDOWN, titulo="reporte")
+    assert documento.startswith(b"%PDF-")
+    assert documento.rstrip().endswith(b"%%EOF")
+    # startxref points at the cross-reference table
+    offset = int(re.search(rb"startxref\s+(\d+)", documento).group(1))
+    assert documento[offset:offset + 4] == b"xref"
+    assert documento.count(b"/Type /Page ") == 1
+
+
+def test_long_reports_are_split_into_pages():
+    markdown = "\n".join(f"Línea de texto número {i}" for i in range(300))
+    paginas = maquetar(markdown)
+    assert len(paginas) > 1
+    assert renderizar_pdf(markdown).count(b"/Type /Page ") == len(paginas)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "snapshot_path", "")
+    monkeypatch.setattr(user_manager_module, "_user_manager", None)
+    monkeypatch.setattr(file_manager_module, "_file_manager", None)
+    monkeypatch.setattr(report_generator_module, "_report_generator", None)
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+    if file_manager_module._file_manager is not None:
+        file_manager_module._file_manager.almacen.cerrar()
+
+
+def test_pdf_job_round_trip_with_ranged_download(client):
+    response = client.post("/advanced/reports/generate", params={"pdf": "true"})
+    assert response.status_code == 200
+    trabajo = response.json()["data"]["trabajo_pdf"]
+    assert trabajo["estado"] in ("en_cola", "procesando", "completado")
+
+    deadline = time.monotonic() + 30
+    while trabajo["estado"] not in ("completado", "error") and time.monotonic() < deadline:
+        time.sleep(0.05)
+        response = client.get(f"/advanced/reports/jobs/{trabajo['trabajo_id']}")
+        assert response.status_code == 200
+        trabajo = response.json()["data"]
+    assert trabajo["estado"] == "completado", trabajo["error"]
+    assert trabajo["paginas"] >= 1
+
+    full = client.get(trabajo["url_descarga"])
+    assert full.status_code == 200
+    assert full.headers["content-type"] == "application/pdf"
+    assert full.content.startswith(b"%PDF-")
+    assert len(full.content) == trabajo["tamaño_bytes"]
+
+    head = client.get(trabajo["url_descarga"], headers={"Range": "bytes=0-7"})
+    assert head.status_code == 206
+    assert head.content == full.content[:8]
+    assert head.headers["Content-Range"] == f"bytes 0-7/{len(full.content)}"
+    tail = client.get(trabajo["url_descarga"], headers={"Range": "bytes=-16"})
+    assert tail.status_code == 206
+    assert tail.content == full.content[-16:]
+    beyond = client.get(trabajo["url_descarga"], headers={"Range": f"bytes={len(full.content)}-"})
+    assert beyond.status_code == 416
+
+    # An up-to-date PDF is not converted again
+    again = client.post("/advanced/reports/generate", params={"pdf": "true"}).json()["data"]["trabajo_pdf"]
+    assert again["estado"] == "completado"
+    assert again["trabajo_id"] == trabajo["trabajo_id"]
+
+
+def test_unknown_job_is_not_found(client):
+    assert client.get("/advanced/reports/jobs/no_existe.pdf").status_code == 404
@@ -0,0 +1,64 @@
+"""Report section cache: unchanged inputs reuse the written report, `regenerar` re-renders only data sections."""
+
+import pytest
+
+from src.modules.report_generator import SECCIONES_REGENERABLES, ReportGenerator
+
+
+def _data(total_archivos=5, leidos=0, usuario="alice"):
+    return {
+        "usuario_actual": {"nombre": usuario},
+        "estadisticas_usuarios": {"total_usuarios_registrados": 3, "sesiones_actualmente_activas": 1},
+        "estadisticas_archivos": {
+            "resumen": {"total_archivos": total_archivos, "archivos_predefinidos": 5},
+            "operaciones_realizadas": {"archivos_leidos": leidos},
+            "directorio_trabajo": "file_manager",
+        },
+        "fecha_sistema": (1, 6, 2025),
+        "timestamp_reporte": "ignored by the fingerprint",
+    }
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = ReportGenerator()
+    yield generator
+    generator.cerrar_pdf()
+
+
+def test_unchanged_inputs_reuse_the_written_report(generator):
+    first = generator.generar_reporte_completo(_data())
+    assert first["exito"] and not first["reutilizado"]
+    assert set(first["secciones_renderizadas"]) == set(SECCIONES_REGENERABLES)
+    path = first["reporte_markdown"]["ruta_completa"]
+
+    second = generator.generar_reporte_completo(dict(_data(), timestamp_reporte="another time"))
+    assert second["reutilizado"] and second["secciones_renderizadas"] == []
+    assert second["reporte_markdown"]["ruta_completa"] == path
+    assert generator.metricas["reportes_escritos"] == 1
+    assert generator.metricas["reportes_reutilizados"] == 1
+
+
+def test_changed_inputs_render_only_the_affected_sections(generator):
+    generator.generar_reporte_completo(_data())
+    changed = generator.generar_reporte_completo(_data(leidos=4))
+    assert not changed["reutilizado"]
+    assert set(changed["secciones_renderizadas"]) == {"estadisticas", "operaciones"}
+    assert changed["huella"] != generator.generar_reporte_completo(_data())["huella"]
+
+
+def test_regenerar_rewrites_the_report_with_the_named_sections(generator):
+    generator.generar_reporte_completo(_data())
+    forced = generator.generar_reporte_completo(_data(), regenerar=["usuarios"])
+    assert not forced["reutilizado"]
+    assert forced["secciones_renderizadas"] == ["usuarios"]
+    assert generator.metricas["reportes_escritos"] == 2
+
+
+@pytest.mark.parametrize("seccion", ("resumen", "documentacion", "no_existe"))
+def test_regenerar_rejects_static_and_unknown_sections(generator, seccion):
+    generator.generar_reporte_completo(_data())
+    with pytest.raises(ValueError, match=seccion):
+        generator.generar_reporte_completo(_data(), regenerar=[seccion])
+    assert generator.metricas["reportes_escritos"] == 1
@@ -0,0 +1,99 @@
+"""Full-text search: BM25 ranking, prefix expansion and snippets."""
+
+import pytest
+
+from src.modules import search_index
+from src.modules.file_manager import FileManager
+from src.modules.search_index import IndiceBusqueda
+
+
+@pytest.fixture
+def index():
+    index = IndiceBusqueda()
+    index.indexar("credito.txt", "Solicitud de crédito aprobada.\nEl crédito se evaluó con el historial crediticio.")
+    index.indexar("acreditar.txt", "Hay que acreditar ingresos antes de la evaluación.")
+    index.indexar("manual.txt", "Manual de usuario: cómo crear archivos y generar reportes.")
+    return index
+
+
+def _names(results):
+    return [name for name, _, _ in results[0]]
+
+
+def test_terms_are_normalised_and_all_must_match(index):
+    assert _names(index.buscar("CRÉDITO")) == ["credito.txt"]
+    assert _names(index.buscar("evaluacion")) == ["acreditar.txt"]
+    assert index.buscar("credito manual") == ([], 0)
+    assert index.buscar("***") == ([], 0)
+
+
+def test_prefix_expands_to_every_term_starting_with_it(index):
+    results, total = index.buscar("cred*")
+    assert total == 1
+    name, _, matched = results[0]
+    assert name == "credito.txt"
+    assert set(matched) == {"credito", "crediticio"}  # never the infix in "acreditar"
+
+    assert set(_names(index.buscar("ev*"))) == {"credito.txt", "acreditar.txt"}
+    assert _names(index.buscar("acred* ingresos")) == ["acreditar.txt"]
+
+
+def test_prefix_expansion_is_capped_by_document_frequency(monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_EXPANSION_PREFIJO", 2)
+    index = IndiceBusqueda()
+    index.indexar("a.txt", "pala palo")
+    index.indexar("b.txt", "pala palo")
+    index.indexar("c.txt", "palma pala")
+    results, _ = index.buscar("pal*")
+    assert {term for _, _, matched in results for term in matched} == {"pala", "palo"}
+
+
+def test_bm25_prefers_frequent_and_rare_terms(index):
+    index.indexar("repetido.txt", "reporte reporte reporte final")
+    index.indexar("una_vez.txt", "reporte final con muchas otras palabras de relleno")
+    results, total = index.buscar("reporte")
+    assert total == 2  # "reportes" in manual.txt is another term
+    assert _names((results, total))[0] == "repetido.txt"
+    assert results[0][1] > results[1][1] > 0
+
+    # A term found in fewer files weighs more than a common one
+    common = dict((name, score) for name, score, _ in index.buscar("final")[0])
+    rare = dict((name, score) for name, score, _ in index.buscar("relleno")[0])
+    assert rare["una_vez.txt"] > common["una_vez.txt"]
+
+
+def test_reindexing_and_removing_update_the_postings(index):
+    index.indexar("manual.txt", "Ahora el manual habla de créditos.")
+    assert _names(index.buscar("reportes")) == []
+    assert set(_names(index.buscar("cred*"))) == {"credito.txt", "manual.txt"}
+    index.eliminar("credito.txt")
+    assert _names(index.buscar("cred*")) == ["manual.txt"]
+    assert index.estadisticas()["archivos_indexados"] == 2
+    assert "crediticio" not in index._vocabulario
+
+
+def test_snippet_surrounds_the_first_match_and_keeps_the_original_text(index, monkeypatch):
+    monkeypatch.setattr(search_index, "CONTEXTO_FRAGMENTO", 10)
+    contenido = "Encabezado largo del documento.\nLínea con Evaluación final del crédito y más texto al final."
+    snippet = index.fragmento(contenido, ["evaluacion"])
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "Evaluación" in snippet and "\n" not in snippet
+    assert len(snippet) <= len("Evaluación") + 2 * 10 + 2
+
+    assert index.fragmento("corto", ["nada"]) == "corto"
+
+
+def test_file_manager_search_follows_writes(tmp_path):
+    manager = FileManager(str(tmp_path))
+    manager.crear_archivo("notas.txt", "Primera nota sobre hipotecas.\nSegunda línea.", "ana")
+    found = manager.buscar_archivos("hipot*")
+    assert [r["nombre"] for r in found["resultados"]] == ["notas.txt"]
+    assert found["resultados"][0]["terminos"] == ["hipotecas"]
+    assert "hipotecas" in found["resultados"][0]["fragmento"]
+
+    manager.escribir_archivo("notas.txt", "Ahora trata de tarjetas.", "ana")
+    assert manager.buscar_archivos("hipot*")["resultados"] == []
+    assert [r["nombre"] for r in manager.buscar_archivos("tarjetas")["resultados"]] == ["notas.txt"]
+    with pytest.raises(ValueError):
+        manager.buscar_archivos("* ")
+    manager.almacen.cerrar()
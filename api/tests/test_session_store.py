@@ -0,0 +1,170 @@
+"""Tests for the in-process and shared session stores."""
+
+from src.modules.session_store import AlmacenSesiones, AlmacenSesionesCompartido
+
+
+def test_in_memory_sweep_removes_expired_sessions_including_spilled_ones(clock):
+    store = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=100, reloj=clock, max_residentes=2)
+    for i in range(5):
+        store.crear(f"user{i}")
+    assert store.estadisticas()["sesiones_en_disco"] > 0
+
+    assert store.barrer() == 0
+    clock.now += 11
+    assert store.barrer() == 5
+    assert len(store) == 0
+    assert store.metricas["barridos"] == 2
+
+
+def test_expired_spilled_sessions_are_not_counted_before_a_sweep(clock):
+    store = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=100, reloj=clock, max_residentes=2)
+    for i in range(5):
+        store.crear(f"user{i}")
+        clock.now += 1
+    assert store.estadisticas()["sesiones_en_disco"] > 0
+
+    clock.now += 10
+    assert len(store) == 0
+    assert store.recontar() == 0
+    assert store.estadisticas()["sesiones_en_disco"] == 0
+    assert store.metricas["caducadas_inactividad"] == 5
+    assert store.metricas["barridos"] == 0
+
+
+def test_shared_sweep_removes_expired_sessions(tmp_path, clock):
+    store = AlmacenSesionesCompartido(
+        tmp_path / "sesiones.db", inactividad_maxima=10, duracion_maxima=100, ttl_cache=0, reloj=clock
+    )
+    for i in range(3):
+        store.crear(f"user{i}")
+
+    assert store.barrer() == 0
+    clock.now += 11
+    assert store.barrer() == 3
+    assert len(store) == 0
+    assert store.metricas["barridos"] == 2
+
+
+def _shared(path, clock):
+    return AlmacenSesionesCompartido(path, inactividad_maxima=10, duracion_maxima=100, ttl_cache=0, reloj=clock)
+
+
+def test_shared_counts_include_other_workers_without_scanning(tmp_path, clock):
+    first = _shared(tmp_path / "sesiones.db", clock)
+    second = _shared(tmp_path / "sesiones.db", clock)
+    alice = first.crear("alice")["session_id"]
+    first.crear("alice")
+    second.crear("bob")
+
+    assert len(first) == len(second) == 3
+    assert first.estadisticas()["usuarios_con_sesion"] == 2
+    assert first.contar_usuario("alice") == 2
+
+    second.cerrar(alice)
+    second.cerrar_usuario("bob")
+    assert len(first) == first.recontar() == 1
+    assert first.estadisticas()["usuarios_con_sesion"] == 1
+    assert first.contar_usuario("bob") == 0
+
+    clock.now += 11
+    assert len(second) == 0
+    assert first.estadisticas()["usuarios_con_sesion"] == 0
+
+
+def test_shared_counters_are_built_for_an_existing_database(tmp_path, clock):
+    store = _shared(tmp_path / "sesiones.db", clock)
+    for nombre in ("alice", "alice", "bob"):
+        store.crear(nombre)
+    # A database written before the counters existed
+    store._conexion.executescript("DROP TABLE sesiones_contadores; DROP TABLE sesiones_por_usuario;")
+    store.cerrar_conexion()
+
+    store = _shared(tmp_path / "sesiones.db", clock)
+    assert len(store) == 3
+    assert store.estadisticas()["usuarios_con_sesion"] == 2
+    store.crear("carol")
+    assert len(store) == store.recontar() == 4
+
+
+def test_shared_reads_do_not_purge_before_the_first_expiry(tmp_path, clock):
+    store = _shared(tmp_path / "sesiones.db", clock)
+    store.crear("alice")
+    len(store)
+    statements = []
+    store._conexion.set_trace_callback(statements.append)
+
+    clock.now += 5
+    assert len(store) == 1
+    assert store.estadisticas()["sesiones_activas"] == 1
+    assert not [sql for sql in statements if sql.startswith("DELETE")]
+
+    clock.now += 6
+    assert len(store) == 0
+    assert [sql for sql in statements if sql.startswith("DELETE")]
+
+
+def test_activity_extends_a_session_up_to_its_absolute_limit(clock):
+    store = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=25, reloj=clock)
+    session_id = store.crear("alice")["session_id"]
+    assert store.obtener(session_id)["segundos_restantes"] == 10
+
+    clock.now += 8
+    assert store.extender(session_id)["segundos_restantes"] == 10
+    clock.now += 8
+    assert store.obtener(session_id)["segundos_restantes"] == 9  # the absolute limit is closer now
+    clock.now += 9
+    assert store.obtener(session_id) is None
+    assert store.metricas["extendidas"] == 1
+    assert store.metricas["caducadas_duracion"] == 1
+    assert store.metricas["caducadas_inactividad"] == 0
+    assert store.extender(session_id) is None
+    assert store.metricas["extendidas"] == 1
+
+
+def test_idle_session_expires_while_active_ones_stay(clock):
+    store = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=100, reloj=clock)
+    idle = store.crear("alice")["session_id"]
+    active = store.crear("bob")["session_id"]
+    for _ in range(3):
+        clock.now += 6
+        assert store.obtener(active) is not None
+    assert store.obtener(idle) is None
+    assert len(store) == 1
+    assert store.metricas["caducadas_inactividad"] == 1
+
+
+def test_sessions_are_indexed_by_user_in_memory_and_on_disk(clock):
+    store = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=100, reloj=clock, max_residentes=2)
+    ids = []
+    for nombre in ("alice", "bob", "alice", "carol", "alice"):
+        ids.append(store.crear(nombre)["session_id"])
+        clock.now += 1
+    assert store.estadisticas()["sesiones_en_disco"] >= 3
+
+    assert store.contar_usuario("alice") == 3
+    assert [s["session_id"] for s in store.sesiones_usuario("alice")] == [ids[0], ids[2], ids[4]]
+    assert store.estadisticas()["usuarios_con_sesion"] == 3
+
+    assert store.cerrar(ids[1])  # on disk
+    assert not store.cerrar(ids[1])
+    assert store.cerrar_usuario("alice") == 3
+    assert store.contar_usuario("alice") == 0
+    assert store.sesiones_usuario("alice") == []
+    assert len(store) == store.recontar() == 1
+    assert store.estadisticas()["usuarios_con_sesion"] == 1
+    assert store.metricas["cerradas"] == 4
+
+
+def test_exported_sessions_are_restored_with_their_remaining_time(clock):
+    store = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=100, reloj=clock, max_residentes=1)
+    old = store.crear("alice")["session_id"]
+    clock.now += 6
+    recent = store.crear("bob")["session_id"]
+    estado = store.exportar()
+
+    restored = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=100, reloj=clock)
+    # Five seconds passed while the process was down: the older session is past its limit
+    assert restored.restaurar(estado, transcurrido=5) == 1
+    assert restored.obtener(old) is None
+    assert restored.obtener(recent)["usuario"] == "bob"
+    assert restored.metricas["creadas"] == 2
@@ -0,0 +1,94 @@
+"""Per-worker snapshots: no worker overwrites another's state, and orphaned ones are merged on restore."""
+
+import asyncio
+import os
+
+import pytest
+
+from src.core.config import settings
+from src.modules import snapshot_store
+from src.modules.user_manager import UserManager
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = tmp_path / "estado.snap"
+    monkeypatch.setattr(settings, "snapshot_path", str(path))
+    monkeypatch.setattr(snapshot_store, "_cerrojos", [])
+    yield path
+    _exit_worker()
+
+
+def _start_worker(monkeypatch, workers):
+    """A fresh process: its own store, slot and user manager restored from the snapshots."""
+    monkeypatch.setattr(settings, "server_workers", workers)
+    monkeypatch.setattr(snapshot_store, "_instantaneas", None)
+    snapshots = snapshot_store.get_instantaneas()
+    manager = UserManager()
+    for estado, edad in snapshots.restaurables("usuarios"):
+        manager.restaurar_estado(estado, edad)
+    snapshots.registrar("usuarios", manager.exportar_estado)
+    return snapshots, manager
+
+
+def _exit_worker():
+    """Release the slot locks the way the OS does when a worker exits."""
+    for descriptor in snapshot_store._cerrojos:
+        os.close(descriptor)
+    snapshot_store._cerrojos.clear()
+
+
+def test_each_worker_keeps_its_own_snapshot(snapshot_path, monkeypatch):
+    first, first_users = _start_worker(monkeypatch, workers=2)
+    second, second_users = _start_worker(monkeypatch, workers=2)
+    assert (first.ruta, second.ruta) == (snapshot_path, snapshot_path.with_name("estado.1.snap"))
+
+    first_users.registrar_usuario("alice")
+    second_users.registrar_usuario("bob")
+    first.guardar()
+    second.guardar()
+    _exit_worker()
+
+    _, restarted_first = _start_worker(monkeypatch, workers=2)
+    _, restarted_second = _start_worker(monkeypatch, workers=2)
+    assert "alice" in restarted_first.usuarios_registrados
+    assert "bob" in restarted_second.usuarios_registrados
+
+
+def test_orphaned_snapshots_are_merged_then_removed(snapshot_path, monkeypatch):
+    for name in ("alice", "bob", "carol"):
+        snapshots, users = _start_worker(monkeypatch, workers=3)
+        users.registrar_usuario(name)
+        snapshots.guardar()
+    _exit_worker()
+
+    # Scaled down to one worker: it restores all three and takes over the extra files
+    snapshots, users = _start_worker(monkeypatch, workers=1)
+    assert {"alice", "bob", "carol"} <= set(users.usuarios_registrados)
+    users.verificar_contadores()
+    assert snapshots.estadisticas()["huerfanas_pendientes"] == 2
+
+    snapshots.guardar()
+    assert sorted(path.name for path in snapshot_path.parent.glob("*.snap")) == ["estado.snap"]
+    _exit_worker()
+    _, users = _start_worker(monkeypatch, workers=1)
+    assert {"alice", "bob", "carol"} <= set(users.usuarios_registrados)
+
+
+def test_periodic_save_counts_any_error(snapshot_path, monkeypatch):
+    snapshots, _ = _start_worker(monkeypatch, workers=1)
+
+    def broken_export():
+        raise ValueError("not serializable")
+
+    snapshots.registrar("rota", broken_export)
+
+    async def run_briefly():
+        task = asyncio.create_task(snapshot_store.guardar_instantaneas(0.01))
+        await asyncio.sleep(0.2)
+        assert not task.done()  # the loop survives errors other than OSError
+        task.cancel()
+
+    asyncio.run(run_briefly())
+    assert snapshots.metricas["errores"] >= 2
+    assert snapshots.metricas["guardadas"] == 0
@@ -0,0 +1,187 @@
+"""UserManager counters stay equal to a full recount (verificar_estadisticas mode)."""
+
+import asyncio
+import re
+import threading
+
+import pytest
+
+from src.modules import user_manager as user_manager_module
+from src.modules.session_store import AlmacenSesiones
+from src.modules.user_manager import MENSAJES_USUARIO, UserManager, validar_nombre
+
+
+def _manager(clock, max_residentes=None) -> UserManager:
+    sesiones = AlmacenSesiones(inactividad_maxima=10, duracion_maxima=100, reloj=clock, max_residentes=max_residentes)
+    return UserManager(verificar_estadisticas=True, sesiones=sesiones)
+
+
+def _assert_consistent(manager: UserManager) -> dict:
+    manager.verificar_contadores()
+    stats = manager.obtener_estadisticas_usuarios()
+    assert stats["sesiones_actualmente_activas"] == manager.recontar_estadisticas()["sesiones_activas"]
+    return stats
+
+
+def test_register_and_login(clock):
+    manager = _manager(clock)
+    _assert_consistent(manager)
+
+    manager.registrar_usuario("alice")
+    stats = _assert_consistent(manager)
+    assert stats["usuarios_con_sesiones"] == 0
+
+    manager.iniciar_sesion("alice")
+    manager.iniciar_sesion("alice")
+    manager.iniciar_sesion("bob")  # registered on the fly
+    stats = _assert_consistent(manager)
+    assert stats["usuarios_con_sesiones"] == 2
+    assert stats["total_sesiones_historicas"] == 3
+    assert stats["sesiones_actualmente_activas"] == 3
+
+
+def test_switch_user_with_and_without_session_id(clock):
+    manager = _manager(clock)
+    alice = manager.iniciar_sesion("alice")["session_id"]
+    manager.iniciar_sesion("bob")
+
+    cambio = manager.cambiar_usuario("carol", session_id=alice)
+    assert cambio["usuario_anterior"] == "alice"
+    assert manager.tocar_sesion(alice) is None
+    stats = _assert_consistent(manager)
+    assert stats["sesiones_actualmente_activas"] == 2
+
+    # Without a session nobody else's session is closed or reported as "current"
+    cambio = manager.cambiar_usuario("dave")
+    assert cambio["usuario_anterior"] is None
+    assert manager.obtener_usuario_actual() is None
+    assert manager.obtener_usuario_actual(cambio["sesion_info"]["session_id"])["nombre"] == "dave"
+    stats = _assert_consistent(manager)
+    assert stats["usuarios_con_sesiones"] == 4
+    assert stats["total_sesiones_historicas"] == 4
+    assert stats["sesiones_actualmente_activas"] == 3
+
+
+def test_session_expiry(clock):
+    manager = _manager(clock)
+    for nombre in ("alice", "bob", "carol"):
+        manager.iniciar_sesion(nombre)
+    clock.now += 5
+    manager.iniciar_sesion("dave")
+
+    clock.now += 6  # the first three are past their inactivity limit
+    stats = _assert_consistent(manager)
+    assert stats["sesiones_actualmente_activas"] == 1
+    assert stats["total_sesiones_historicas"] == 4
+
+    clock.now += 100
+    stats = _assert_consistent(manager)
+    assert stats["sesiones_actualmente_activas"] == 0
+    assert stats["sesiones"]["caducadas"] == 4
+
+
+def test_sessions_spilled_to_disk(clock):
+    manager = _manager(clock, max_residentes=2)
+    ids = []
+    for i in range(6):
+        ids.append(manager.iniciar_sesion(f"user{i}")["session_id"])
+        clock.now += 1
+    stats = _assert_consistent(manager)
+    assert stats["sesiones"]["sesiones_en_disco"] == 4
+    assert stats["sesiones_actualmente_activas"] == 6
+
+    # Switching from a session that lives on disk brings it back and closes it
+    manager.cambiar_usuario("user_nuevo", session_id=ids[0])
+    assert manager.tocar_sesion(ids[0]) is None
+    stats = _assert_consistent(manager)
+    assert stats["sesiones_actualmente_activas"] == 6
+    assert stats["sesiones"]["recuperadas_de_disco"] >= 1
+
+    clock.now += 11
+    stats = _assert_consistent(manager)
+    assert stats["sesiones_actualmente_activas"] == 0
+    assert stats["sesiones"]["sesiones_en_disco"] == 0
+
+
+def test_skewed_counter_is_reported(clock):
+    manager = _manager(clock)
+    manager.iniciar_sesion("alice")
+    _assert_consistent(manager)
+
+    manager.contadores.increment("sesiones_totales")
+    with pytest.raises(RuntimeError, match="sesiones_totales: 2 != 1"):
+        manager.verificar_contadores()
+    with pytest.raises(RuntimeError):
+        manager.obtener_estadisticas_usuarios()
+
+
+def test_periodic_sweep_runs_off_the_event_loop(clock, monkeypatch):
+    manager = _manager(clock)
+    manager.iniciar_sesion("alice")
+    clock.now += 11
+    sweep_threads = []
+    original_sweep = manager.sesiones_activas.barrer
+
+    def sweep():
+        sweep_threads.append(threading.current_thread())
+        return original_sweep()
+
+    monkeypatch.setattr(manager.sesiones_activas, "barrer", sweep)
+    monkeypatch.setattr(user_manager_module, "_user_manager", manager)
+
+    async def run_briefly():
+        task = asyncio.create_task(user_manager_module.barrer_sesiones(0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(run_briefly())
+    assert sweep_threads
+    assert all(thread is not threading.main_thread() for thread in sweep_threads)
+    assert _assert_consistent(manager)["sesiones_actualmente_activas"] == 0
+
+
+@pytest.mark.parametrize("nombre, mensaje", [
+    ("", "El nombre no puede estar vacío"),
+    ("   ", "El nombre no puede estar vacío"),
+    ("a", "El nombre debe tener al menos 2 caracteres"),
+    (" a ", "El nombre debe tener al menos 2 caracteres"),
+    ("a" * 21, "El nombre no puede tener más de 20 caracteres"),
+    ("ana maría", "El nombre solo puede contener letras, números, guiones y guiones bajos"),
+    ("ana\nbob", "El nombre solo puede contener letras, números, guiones y guiones bajos"),
+    ("josé", "El nombre solo puede contener letras, números, guiones y guiones bajos"),
+])
+def test_invalid_usernames_are_rejected_with_their_message(nombre, mensaje):
+    assert validar_nombre(nombre) == (False, mensaje)
+    assert UserManager().validar_nombre_usuario(nombre) == (False, mensaje)
+
+
+@pytest.mark.parametrize("nombre", ["ab", "a" * 20, "Ana_1", "bob-2", "  carol  ", "dave\n"])
+def test_valid_usernames_are_accepted(nombre):
+    assert validar_nombre(nombre) == (True, "")
+
+
+def test_invalid_username_is_not_registered():
+    manager = UserManager()
+    with pytest.raises(ValueError, match=MENSAJES_USUARIO["nombre_corto"]):
+        manager.registrar_usuario("a")
+    assert "a" not in manager.usuarios_registrados
+
+
+def test_welcome_messages(clock):
+    manager = _manager(clock)
+    nuevo = manager.generar_mensaje_bienvenida("alice")
+    assert nuevo.startswith("¡Hola alice! Bienvenido al Sistema Avanzado de Gestión de Archivos")
+    assert "\\nComo usuario nuevo, tendrás acceso a todas las funcionalidades del sistema." in nuevo
+    assert re.search(r"\\nSesión iniciada: \d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}$", nuevo)
+
+    manager.registrar_usuario("alice", tipo="admin")
+    manager.iniciar_sesion("alice")
+    manager.iniciar_sesion("alice")
+    registrado = manager.generar_mensaje_bienvenida("alice")
+    assert registrado.startswith(
+        "¡Bienvenido de nuevo alice! (Usuario admin)\\nHas accedido al Sistema Avanzado de Gestión de Archivos"
+        "\\nSesiones anteriores: 2\\nSesión iniciada: "
+    )
+    # The cached greeting follows the user's type
+    manager.usuarios_registrados["alice"]["tipo"] = "usuario"
+    assert "(Usuario usuario)" in manager.generar_mensaje_bienvenida("alice")
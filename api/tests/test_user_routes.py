@@ -0,0 +1,53 @@
+"""The /advanced/users routes resolve the current user from each client's X-Session-Id."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.modules import file_manager as file_manager_module
+from src.modules import user_manager as user_manager_module
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "snapshot_path", "")
+    monkeypatch.setattr(user_manager_module, "_user_manager", None)
+    monkeypatch.setattr(file_manager_module, "_file_manager", None)
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+    if file_manager_module._file_manager is not None:
+        file_manager_module._file_manager.almacen.cerrar()
+
+
+def _login(client, nombre):
+    response = client.post("/advanced/users/login", json={"nombre": nombre})
+    assert response.status_code == 200
+    return {"X-Session-Id": response.json()["data"]["session_id"]}
+
+
+def test_each_client_sees_its_own_user(client):
+    alice = _login(client, "alice")
+    bob = _login(client, "bob")
+
+    assert client.get("/advanced/users/current", headers=alice).json()["data"]["nombre"] == "alice"
+    assert client.get("/advanced/users/current", headers=bob).json()["data"]["nombre"] == "bob"
+    # Without a token there is no current user, not the last login of the worker
+    assert client.get("/advanced/users/current").json()["success"] is False
+
+    cambio = client.post("/advanced/users/change", json={"nombre_nuevo": "carol"}, headers=alice).json()["data"]
+    assert cambio["usuario_anterior"] == "alice"
+    assert client.get("/advanced/users/current", headers=bob).json()["data"]["nombre"] == "bob"
+
+
+def test_requests_with_a_token_keep_the_session_alive(client, monkeypatch):
+    alice = _login(client, "alice")
+    touched = []
+    manager = user_manager_module.get_user_manager()
+    original_touch = manager.tocar_sesion
+    monkeypatch.setattr(manager, "tocar_sesion", lambda session_id: touched.append(session_id) or original_touch(session_id))
+
+    client.get("/advanced/date/current", headers=alice)
+    assert touched == [alice["X-Session-Id"]]
@@ -0,0 +1,69 @@
+"""Version history: any revision is rebuilt exactly, across the snapshot boundary."""
+
+import random
+
+import pytest
+
+from src.modules.file_manager import FileManager
+from src.modules.version_store import INTERVALO_SNAPSHOT
+
+
+def _edit(lines, rng):
+    """One small line edit: change, insert or delete a line."""
+    lines = list(lines)
+    position = rng.randrange(len(lines))
+    action = rng.choice(("change", "insert", "delete") if len(lines) > 1 else ("change", "insert"))
+    if action == "change":
+        lines[position] = f"cambiada {rng.random():.6f}"
+    elif action == "insert":
+        lines.insert(position, f"nueva {rng.random():.6f}")
+    else:
+        del lines[position]
+    return lines
+
+
+def test_every_revision_is_rebuilt_across_snapshots(tmp_path):
+    manager = FileManager(str(tmp_path))
+    rng = random.Random(36)
+    lines = [f"linea {i}" for i in range(200)]
+    expected = ["\n".join(lines)]
+    manager.crear_archivo("historial.txt", expected[0], "ana")
+    for _ in range(2 * INTERVALO_SNAPSHOT + 8):
+        lines = _edit(lines, rng)
+        expected.append("\n".join(lines))
+        manager.escribir_archivo("historial.txt", expected[-1], "ana")
+
+    listing = manager.listar_versiones("historial.txt")
+    assert listing["total_versiones"] == len(expected)
+    assert listing["version_actual"] == len(expected)
+    # Small edits are stored as deltas; a full snapshot starts every chain
+    snapshots = [v["version"] for v in listing["versiones"] if v["almacenamiento"] == "completa"]
+    assert snapshots == [1, INTERVALO_SNAPSHOT + 1, 2 * INTERVALO_SNAPSHOT + 1]
+
+    for version, content in enumerate(expected, start=1):
+        assert manager.leer_version("historial.txt", version)["contenido"] == content
+    manager.almacen.cerrar()
+
+
+def test_diff_spans_chains(tmp_path):
+    manager = FileManager(str(tmp_path))
+    manager.crear_archivo("notas.txt", "uno\ndos\ntres", "ana")
+    for i in range(INTERVALO_SNAPSHOT + 2):
+        manager.escribir_archivo("notas.txt", f"uno\ndos\ntres\nextra {i}", "ana")
+
+    last = INTERVALO_SNAPSHOT + 3
+    diff = manager.comparar_versiones("notas.txt", 1, last)
+    assert diff["lineas_añadidas"] == 1 and diff["lineas_eliminadas"] == 0
+    assert f"+extra {INTERVALO_SNAPSHOT + 1}" in diff["diff"]
+    assert manager.comparar_versiones("notas.txt", last, last)["diff"] == []
+    manager.almacen.cerrar()
+
+
+def test_missing_version_is_reported(tmp_path):
+    manager = FileManager(str(tmp_path))
+    manager.crear_archivo("notas.txt", "uno", "ana")
+    with pytest.raises(FileNotFoundError, match="no tiene versión 2"):
+        manager.leer_version("notas.txt", 2)
+    with pytest.raises(FileNotFoundError, match="no tiene versión 5"):
+        manager.comparar_versiones("notas.txt", 1, 5)
+    manager.almacen.cerrar()
@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
+import { advancedAPI } from '@/services/advancedAPI';
 
-const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/advanced';
 interface WelcomeScreenProps {
   onUserLogin: (userData: any) => void;
 }
@@ -28,18 +28,10 @@ export const WelcomeScreen: React.FC<WelcomeScreenProps> = ({ onUserLogin }) =>
     setError('');
 
     try {
-      
-      const response = await fetch(`${API_BASE_URL}/users/login`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ nombre: username }),
-      });
+      // Guarda el session_id para enviarlo en X-Session-Id en las siguientes peticiones
+      const data = await advancedAPI.loginUser(username);
 
-      const data = await response.json();
-
-      if (data.success) {
+      if (data.success && data.data) {
         setWelcomeMessage(data.data.mensaje);
         setTimeout(() => {
           onUserLogin(data.data);
@@ -5,6 +5,9 @@
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/advanced';
 
+// Clave donde se guarda el session_id del login (por pestaña)
+const SESSION_STORAGE_KEY = 'advanced_session_id';
+
 // Tipos para las respuestas de la API
 export interface ApiResponse<T = any> {
   success: boolean;
@@ -78,17 +81,37 @@ export interface SystemStatus {
 }
 
 class AdvancedAPIService {
+  private sessionId: string | null = sessionStorage.getItem(SESSION_STORAGE_KEY);
+
+  /**
+   * Guarda la sesión del login: el backend resuelve el usuario actual a
+   * partir de la cabecera X-Session-Id, no del último login del servidor.
+   */
+  setSession(sessionId: string | null): void {
+    this.sessionId = sessionId;
+    if (sessionId) {
+      sessionStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+    } else {
+      sessionStorage.removeItem(SESSION_STORAGE_KEY);
+    }
+  }
+
+  private sessionHeaders(): Record<string, string> {
+    return this.sessionId ? { 'X-Session-Id': this.sessionId } : {};
+  }
+
   private async request<T>(
     endpoint: string,
     options: RequestInit = {}
   ): Promise<ApiResponse<T>> {
     try {
       const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+        ...options,
         headers: {
           'Content-Type': 'application/json',
+          ...this.sessionHeaders(),
           ...options.headers,
         },
-        ...options,
       });
 
       const data = await response.json();
@@ -107,17 +130,25 @@ class AdvancedAPIService {
   // ===== GESTIÓN DE USUARIOS =====
   
   async loginUser(nombre: string): Promise<ApiResponse<UserSession>> {
-    return this.request<UserSession>('/users/login', {
+    const response = await this.request<UserSession>('/users/login', {
       method: 'POST',
       body: JSON.stringify({ nombre }),
     });
+    if (response.success && response.data) {
+      this.setSession(response.data.session_id);
+    }
+    return response;
   }
 
   async changeUser(nombre_nuevo: string): Promise<ApiResponse<any>> {
-    return this.request('/users/change', {
+    const response = await this.request<any>('/users/change', {
       method: 'POST',
       body: JSON.stringify({ nombre_nuevo }),
     });
+    if (response.success && response.data?.sesion_info) {
+      this.setSession(response.data.sesion_info.session_id);
+    }
+    return response;
   }
 
   async getCurrentUser(): Promise<ApiResponse<any>> {
@@ -223,7 +254,9 @@ class AdvancedAPIService {
 
   async downloadReport(filename: string): Promise<void> {
     try {
-      const response = await fetch(`${API_BASE_URL}/reports/download/${filename}`);
+      const response = await fetch(`${API_BASE_URL}/reports/download/${filename}`, {
+        headers: this.sessionHeaders(),
+      });
       
       if (!response.ok) {
         throw new Error('Error al descargar reporte');